@@ -0,0 +1,71 @@
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.pipeline_scaling_benchmark import StageMonitor
+from src.utils.main_utils import save_numpy_data, load_numpy_data
+
+# Width of the transformed feature matrix (encoded and scaled schema columns)
+N_FEATURES = 10
+
+
+def write_arrays(directory: str, n_rows: int):
+    """
+    Writes the same transformed data in both layouts: the previous single float64 array with the
+    label as last column, and separate float32 features / int8 labels files.
+    """
+    rng = np.random.default_rng(42)
+    features = rng.standard_normal((n_rows, N_FEATURES), dtype=np.float32)
+    labels = (rng.random(n_rows) < 0.12).astype(np.int8)
+    save_numpy_data(os.path.join(directory, "combined.npy"), np.c_[features.astype(np.float64), labels])
+    save_numpy_data(os.path.join(directory, "features.npy"), np.ascontiguousarray(features))
+    save_numpy_data(os.path.join(directory, "labels.npy"), labels)
+
+
+def consume(directory: str, layout: str, n_estimators: int) -> dict:
+    """
+    Loads one layout the way the trainer does and fits a small forest, measuring memory in a fresh process.
+    """
+    with StageMonitor() as monitor:
+        if layout == "combined":
+            array = load_numpy_data(os.path.join(directory, "combined.npy"))
+            X, y = array[:, :-1], array[:, -1]
+        else:
+            X = load_numpy_data(os.path.join(directory, "features.npy"), mmap_mode="r")
+            y = load_numpy_data(os.path.join(directory, "labels.npy"), mmap_mode="r")
+        model = RandomForestClassifier(n_estimators=n_estimators, max_depth=8, random_state=42).fit(X, y)
+        model.predict(X)
+    return {"layout": layout, **monitor.result()}
+
+
+def run_benchmark(sizes: list, n_estimators: int) -> list:
+    """
+    Measures wall time and peak resident memory of both layouts for every size.
+    """
+    results = []
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_arrays(directory, n_rows)
+            for layout in ("combined", "memory_mapped"):
+                # A spawned process per run so peak memory is not inherited from the previous run
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(consume, directory, layout, n_estimators).result()
+                results.append({"rows": n_rows, "layout": result["layout"], "wall_s": result["wall_s"],
+                                "peak_rss_mb": result["peak_rss_mb"], "rss_growth_mb": result["rss_growth_mb"]})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of the combined float64 array vs memory-mapped float32 features and int8 labels")
+    parser.add_argument("--sizes", default="1000000,4000000", help="Comma separated training set sizes")
+    parser.add_argument("--n-estimators", type=int, default=4, help="Trees fitted on each layout")
+    args = parser.parse_args()
+
+    report = pd.DataFrame(run_benchmark([int(size) for size in args.sizes.split(",")], args.n_estimators))
+    print(report.to_string(index=False))
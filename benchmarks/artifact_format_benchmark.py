@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.constants import SCHEMA_FILE_PATH, ARTIFACT_FILE_EXTENSIONS
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.utils.main_utils import read_yaml, apply_schema_dtypes, save_dataframe, read_dataframe
+
+# Formats and compression codecs compared by this benchmark
+BENCHMARK_FORMATS = [("csv", None), ("parquet", "snappy"), ("parquet", "zstd"), ("feather", "lz4"), ("feather", "zstd")]
+
+
+def make_sample_dataframe(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Builds a dataframe shaped like a find() export of the vehicle-data collection.
+    """
+    dataframe = SyntheticVehicleData(seed=seed).generate(n_rows).drop(columns=["id"])
+    dataframe.insert(0, "_id", [f"{i:024x}" for i in range(n_rows)])
+    return dataframe
+
+
+def run_benchmark(n_rows: int, projected_columns: list) -> list:
+    """
+    Measures write time, full read time, projected read time and file size for each format.
+    """
+    dataframe = apply_schema_dtypes(make_sample_dataframe(n_rows), read_yaml(SCHEMA_FILE_PATH))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_format, compression in BENCHMARK_FORMATS:
+            file_path = os.path.join(tmp_dir, f"data_{compression}.{ARTIFACT_FILE_EXTENSIONS[file_format]}")
+
+            start = time.perf_counter()
+            save_dataframe(file_path, dataframe, compression=compression)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_dataframe(file_path)
+            read_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_dataframe(file_path, columns=projected_columns)
+            projected_read_time = time.perf_counter() - start
+
+            results.append({
+                "format": file_format,
+                "compression": compression or "-",
+                "write_s": round(write_time, 3),
+                "read_s": round(read_time, 3),
+                "projected_read_s": round(projected_read_time, 3),
+                "size_mb": round(os.path.getsize(file_path) / 1024 ** 2, 2),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ingestion artifact formats against CSV")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of rows to write and read")
+    args = parser.parse_args()
+
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    report = pd.DataFrame(run_benchmark(args.rows, schema_config["num_features"] + ["Response"]))
+    print(report.to_string(index=False))
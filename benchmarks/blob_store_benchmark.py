@@ -0,0 +1,107 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_access.blob_store import BlobStore
+from src.constants import CHECKPOINT_DIR_NAME
+
+# Artifacts of a simulated run and the share of runs in which each one changes
+RUN_ARTIFACTS = {
+    "data_ingestion/feature_store/data.parquet": 0.1,
+    "data_ingestion/ingested/train.parquet": 0.1,
+    "data_ingestion/ingested/test.parquet": 0.1,
+    "data_transformation/transformed/train.npy": 0.1,
+    "data_transformation/transformed/test.npy": 0.1,
+    "data_transformation/transformed_object/preprocessing.pkl": 0.1,
+    "model_trainer/trained_model/model.pkl": 1.0,
+}
+MODEL_FILE = "model_trainer/trained_model/model.pkl"
+
+
+def disk_usage_bytes(*dirs) -> int:
+    """
+    Returns the bytes used by the files of the directories, counting hard linked files once.
+    """
+    inodes = {}
+    for directory in dirs:
+        for root, _, file_names in os.walk(directory):
+            for file_name in file_names:
+                stat = os.stat(os.path.join(root, file_name))
+                inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+    return sum(inodes.values())
+
+
+def write_runs(artifacts_dir: str, n_runs: int, artifact_mb: float, push_every: int, seed: int = 42):
+    """
+    Writes n_runs run directories; an artifact keeps the content of the previous run unless it changes
+    (RUN_ARTIFACTS), and every push_every-th run pushes its model.
+    """
+    rng = np.random.default_rng(seed)
+    contents = {}
+    for run in range(n_runs):
+        run_dir = os.path.join(artifacts_dir, f"01_01_2026_00_{run // 60:02d}_{run % 60:02d}")
+        for relative_path, change_rate in RUN_ARTIFACTS.items():
+            if relative_path not in contents or rng.random() < change_rate:
+                contents[relative_path] = rng.bytes(int(artifact_mb * 1024 ** 2))
+            file_path = os.path.join(run_dir, relative_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as file_obj:
+                file_obj.write(contents[relative_path])
+        if push_every and (run + 1) % push_every == 0:
+            os.makedirs(os.path.join(run_dir, CHECKPOINT_DIR_NAME), exist_ok=True)
+            open(os.path.join(run_dir, CHECKPOINT_DIR_NAME, "model_pusher.json"), "w").close()
+        yield run_dir
+
+
+def run_benchmark(n_runs: int, artifact_mb: float, keep_last_runs: int, push_every: int) -> list:
+    """
+    Writes the same simulated runs without and with the blob store, and records the disk usage,
+    the time spent storing the runs and what the retention policy frees.
+    """
+    results = []
+    work_dir = tempfile.mkdtemp()
+    try:
+        plain_dir = os.path.join(work_dir, "plain")
+        list(write_runs(plain_dir, n_runs, artifact_mb, push_every))
+        plain_bytes = disk_usage_bytes(plain_dir)
+        results.append({"layout": "run directories", "runs": n_runs, "disk_mb": round(plain_bytes / 1024 ** 2, 1),
+                        "saved_pct": 0.0, "store_time_s": 0.0})
+
+        artifacts_dir, blob_dir = os.path.join(work_dir, "artifacts"), os.path.join(work_dir, "blob_store")
+        store = BlobStore(blob_dir)
+        store_time_s = 0.0
+        for run_dir in write_runs(artifacts_dir, n_runs, artifact_mb, push_every):
+            start = time.perf_counter()
+            store.ingest_run(run_dir)
+            store_time_s += time.perf_counter() - start
+        dedup_bytes = disk_usage_bytes(artifacts_dir, blob_dir)
+        results.append({"layout": "blob store", "runs": n_runs, "disk_mb": round(dedup_bytes / 1024 ** 2, 1),
+                        "saved_pct": round(100 * (1 - dedup_bytes / plain_bytes), 1), "store_time_s": round(store_time_s, 3)})
+
+        start = time.perf_counter()
+        report = store.collect_garbage(artifacts_dir, keep_last_runs=keep_last_runs, pushed_model_files=[MODEL_FILE])
+        retained_bytes = disk_usage_bytes(artifacts_dir, blob_dir)
+        results.append({"layout": f"blob store + retention (last {keep_last_runs}, pushed models)",
+                        "runs": len(report["kept_runs"]) + len(report["pruned_runs"]),
+                        "disk_mb": round(retained_bytes / 1024 ** 2, 1),
+                        "saved_pct": round(100 * (1 - retained_bytes / plain_bytes), 1),
+                        "store_time_s": round(time.perf_counter() - start, 3)})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blob store: disk usage of repeated runs with deduplication and retention")
+    parser.add_argument("--runs", type=int, default=20, help="Simulated training runs")
+    parser.add_argument("--artifact-mb", type=float, default=4.0, help="Size of every run artifact")
+    parser.add_argument("--keep-last-runs", type=int, default=5, help="Newest runs kept in full by the retention policy")
+    parser.add_argument("--push-every", type=int, default=4, help="Every n-th run pushes its model")
+    args = parser.parse_args()
+
+    print(pd.DataFrame(run_benchmark(args.runs, args.artifact_mb, args.keep_last_runs, args.push_every)).to_string(index=False))
@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import pandas as pd
+
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.entity.categorical_encoder import CategoricalEncoder
+from src.utils.main_utils import read_yaml, apply_schema_dtypes
+
+
+def legacy_encode(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The encoding previously done by DataTransformation.map_gender_column, map_vehicle_age and
+    map_vehicle_damage: one full-column map and cast per column.
+    """
+    if pd.api.types.is_numeric_dtype(df["Gender"]):
+        df["Gender"] = df["Gender"].astype("int8")
+    else:
+        df["Gender"] = df["Gender"].map({"Female": 0, "Male": 1}).astype("int8")
+    if not pd.api.types.is_numeric_dtype(df["Vehicle_Age"]):
+        df["Vehicle_Age"] = df["Vehicle_Age"].map({"< 1 Year": 0, "1-2 Year": 1, "> 2 Years": 2}).astype("int8")
+    else:
+        df["Vehicle_Age"] = df["Vehicle_Age"].astype("int8")
+    if pd.api.types.is_numeric_dtype(df["Vehicle_Damage"]):
+        df["Vehicle_Damage"] = df["Vehicle_Damage"].astype("int8")
+    else:
+        df["Vehicle_Damage"] = df["Vehicle_Damage"].map({"No": 0, "Yes": 1}).astype("int8")
+    return df
+
+
+def best_time(function, repeats: int) -> float:
+    """
+    Returns the best wall time of several calls.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmark(n_rows: int, repeats: int) -> list:
+    """
+    Times the legacy map methods against CategoricalEncoder on categorical (as ingested) and
+    plain string columns, and checks both produce the same codes.
+    """
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    raw = SyntheticVehicleData().generate(n_rows).drop(columns=["id", TARGET_COLUMN])
+    inputs = {"category": apply_schema_dtypes(raw, schema_config), "object": raw}
+    results = []
+    for input_dtype, features in inputs.items():
+        encoder = CategoricalEncoder(schema_config["categorical_mappings"]).fit(features)
+        if not legacy_encode(features.copy()).equals(encoder.transform(features)):
+            raise AssertionError(f"Encoders disagree on {input_dtype} input")
+        legacy_s = best_time(lambda: legacy_encode(features.copy()), repeats)
+        fused_s = best_time(lambda: encoder.transform(features), repeats)
+        results.append({
+            "input_dtype": input_dtype,
+            "rows": n_rows,
+            "legacy_map_s": round(legacy_s, 4),
+            "fused_encoder_s": round(fused_s, 4),
+            "speedup": round(legacy_s / fused_s, 1),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Legacy map_* encoding vs the fused CategoricalEncoder")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Number of synthetic rows")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed calls per encoder (best is kept)")
+    args = parser.parse_args()
+
+    print(pd.DataFrame(run_benchmark(args.rows, args.repeats)).to_string(index=False))
@@ -0,0 +1,62 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.artifact_format_benchmark import make_sample_dataframe
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.utils.main_utils import read_yaml, apply_schema_dtypes, save_dataframe, read_dataframe
+
+
+def frame_megabytes(dataframe: pd.DataFrame) -> float:
+    """
+    Returns the deep memory usage of a dataframe in MB.
+    """
+    return round(dataframe.memory_usage(deep=True).sum() / 1024 ** 2, 1)
+
+
+def encode_features(dataframe: pd.DataFrame, schema_config: dict, integer_dtype: str) -> pd.DataFrame:
+    """
+    Encodes the categorical columns the way DataTransformation does and drops the target.
+    """
+    features = dataframe.drop(columns=[TARGET_COLUMN, "_id"])
+    for column_name, mapping in schema_config["categorical_mappings"].items():
+        features[column_name] = features[column_name].map(mapping).astype(integer_dtype)
+    return features
+
+
+def measure_stages(raw_dataframe: pd.DataFrame, schema_config: dict, compact: bool, tmp_dir: str) -> dict:
+    """
+    Measures the memory held at the ingestion, validation and transformation stages.
+    """
+    ingested = apply_schema_dtypes(raw_dataframe, schema_config, compact=compact)
+    file_path = os.path.join(tmp_dir, f"train_{compact}.parquet")
+    save_dataframe(file_path, ingested, compression="zstd")
+    validated = read_dataframe(file_path)
+    features = encode_features(validated, schema_config, "int8" if compact else "int64")
+    array_dtype = np.float32 if compact else np.float64
+    array = np.concatenate([features.to_numpy(dtype=array_dtype),
+                            validated[[TARGET_COLUMN]].to_numpy(dtype=array_dtype)], axis=1)
+    return {
+        "dtypes": "compact" if compact else "default",
+        "ingestion_mb": frame_megabytes(ingested),
+        "validation_mb": frame_megabytes(validated),
+        "transformation_features_mb": frame_megabytes(features),
+        "transformation_array_mb": round(array.nbytes / 1024 ** 2, 1),
+        "artifact_file_mb": round(os.path.getsize(file_path) / 1024 ** 2, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage memory report for default vs schema-planned compact dtypes")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of synthetic rows")
+    args = parser.parse_args()
+
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    raw_dataframe = make_sample_dataframe(args.rows)
+    print(f"Raw export dataframe: {frame_megabytes(raw_dataframe)} MB")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = pd.DataFrame([measure_stages(raw_dataframe, schema_config, compact, tmp_dir) for compact in (False, True)])
+    print(report.to_string(index=False))
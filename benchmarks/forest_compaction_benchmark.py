@@ -0,0 +1,43 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.rebalancing_benchmark import make_training_arrays
+from src.components.forest_compaction import ForestCompactor
+from src.components.model_factory import ModelFactory
+
+# Threshold and leaf value precisions compared
+PRECISIONS = [("float32", "float16"), ("float32", "uint8"), ("float16", "uint8")]
+
+
+def run_benchmark(n_rows: int, n_validation_rows: int, max_f1_loss: float) -> list:
+    """
+    Trains the forest once and compacts it with every precision, recording trees kept, F1,
+    pickled size, load time and latency before and after.
+    """
+    X_train, y_train = make_training_arrays(n_rows)
+    X_validation, y_validation = make_training_arrays(n_validation_rows)
+    # Same class weights as the "class_weight" rebalancing strategy
+    counts = np.bincount(y_train)
+    class_weight = {label: len(y_train) / (len(counts) * count) for label, count in enumerate(counts)}
+    forest = ModelFactory().build(class_weight=class_weight, n_jobs=-1).fit(X_train, y_train)
+    results = []
+    for threshold_dtype, leaf_dtype in PRECISIONS:
+        compactor = ForestCompactor({"max_f1_loss": max_f1_loss, "threshold_dtype": threshold_dtype, "leaf_dtype": leaf_dtype})
+        _, report = compactor.compact(forest, X_validation, y_validation)
+        results.append({"thresholds": threshold_dtype, "leaves": leaf_dtype, "accepted": report["accepted"],
+                        "trees": f"{report['trees_before']} -> {report['trees_after']}",
+                        "f1": f"{report['f1_before']:.4f} -> {report['f1_after']:.4f}",
+                        **{f"{name}": f"{report['before'][name]} -> {report['after'][name]}" for name in report["before"]}})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forest compaction: trees kept, F1, size, load time and latency")
+    parser.add_argument("--rows", type=int, default=500_000, help="Training set size")
+    parser.add_argument("--validation-rows", type=int, default=100_000, help="Held-out rows used to rank trees and guard F1")
+    parser.add_argument("--max-f1-loss", type=float, default=0.005, help="F1 loss beyond which compaction is rejected")
+    args = parser.parse_args()
+
+    print(pd.DataFrame(run_benchmark(args.rows, args.validation_rows, args.max_f1_loss)).to_string(index=False))
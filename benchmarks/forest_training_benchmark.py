@@ -0,0 +1,77 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+from joblib import parallel_backend
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.rebalancing_benchmark import make_training_arrays
+from src.constants import (MODEL_TRAINER_MIN_SAMPLES_LEAF, MODEL_TRAINER_MIN_SAMPLES_SPLIT, MIN_SAMPLES_SPLIT_MAX_DEPTH,
+                           MIN_SAMPLES_SPLIT_CRITERION, MIN_SAMPLES_SPLIT_RANDOM_STATE)
+
+
+def make_forest(n_estimators: int, n_jobs: int) -> RandomForestClassifier:
+    """
+    Returns a forest with the model trainer hyperparameters.
+    """
+    return RandomForestClassifier(n_estimators=n_estimators, min_samples_leaf=MODEL_TRAINER_MIN_SAMPLES_LEAF,
+                                  min_samples_split=MODEL_TRAINER_MIN_SAMPLES_SPLIT, max_depth=MIN_SAMPLES_SPLIT_MAX_DEPTH,
+                                  criterion=MIN_SAMPLES_SPLIT_CRITERION, random_state=MIN_SAMPLES_SPLIT_RANDOM_STATE,
+                                  n_jobs=n_jobs)
+
+
+def timed_fit(model: RandomForestClassifier, X, y, backend: str, n_jobs: int) -> float:
+    """
+    Fits the model under the given joblib backend and returns the wall time.
+    """
+    start = time.perf_counter()
+    with parallel_backend(backend, n_jobs=n_jobs):
+        model.fit(X, y)
+    return round(time.perf_counter() - start, 3)
+
+
+def run_scaling(n_rows: int, n_estimators: int, core_counts: list, backends: list) -> list:
+    """
+    Measures forest training wall time by core count and backend, with the speedup over one core.
+    """
+    X, y = make_training_arrays(n_rows)
+    results = []
+    for backend in backends:
+        single_core_s = None
+        for n_jobs in core_counts:
+            wall_s = timed_fit(make_forest(n_estimators, n_jobs), X, y, backend, n_jobs)
+            single_core_s = single_core_s or wall_s
+            results.append({"rows": n_rows, "trees": n_estimators, "backend": backend, "n_jobs": n_jobs,
+                            "wall_s": wall_s, "speedup": round(single_core_s / wall_s, 2)})
+    return results
+
+
+def run_incremental(n_rows: int, n_estimators: int, n_new_estimators: int, n_jobs: int) -> list:
+    """
+    Compares growing a fitted forest with n_new_estimators trees on new data (warm_start)
+    against refitting all trees from scratch.
+    """
+    X, y = make_training_arrays(n_rows)
+    base = make_forest(n_estimators, n_jobs)
+    base.fit(X, y)
+    X_new, y_new = make_training_arrays(n_rows)
+    grow_s = timed_fit(base.set_params(warm_start=True, n_estimators=n_estimators + n_new_estimators), X_new, y_new, "threading", n_jobs)
+    refit_s = timed_fit(make_forest(n_estimators + n_new_estimators, n_jobs), X_new, y_new, "threading", n_jobs)
+    return [{"rows": n_rows, "mode": "warm_start", "trees_fit": n_new_estimators, "wall_s": grow_s},
+            {"rows": n_rows, "mode": "refit", "trees_fit": n_estimators + n_new_estimators, "wall_s": refit_s}]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forest training wall time by core count, and incremental (warm_start) growth")
+    parser.add_argument("--rows", type=int, default=500_000, help="Training set size")
+    parser.add_argument("--trees", type=int, default=100, help="Trees of the forest")
+    parser.add_argument("--new-trees", type=int, default=25, help="Trees added in incremental mode")
+    parser.add_argument("--cores", default=",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= (os.cpu_count() or 1)),
+                        help="Comma separated core counts")
+    parser.add_argument("--backends", default="threading,loky", help="Comma separated joblib backends")
+    args = parser.parse_args()
+
+    core_counts = [int(n_jobs) for n_jobs in args.cores.split(",")]
+    print(pd.DataFrame(run_scaling(args.rows, args.trees, core_counts, args.backends.split(","))).to_string(index=False))
+    print(pd.DataFrame(run_incremental(args.rows, args.trees, args.new_trees, core_counts[-1])).to_string(index=False))
@@ -0,0 +1,60 @@
+import argparse
+import os
+import time
+
+import dill
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+from threadpoolctl import threadpool_limits
+
+from benchmarks.rebalancing_benchmark import make_training_arrays
+from src.components.model_factory import MODEL_ESTIMATORS, ModelFactory
+
+
+def timed_predict(model, X, repeats: int) -> float:
+    """
+    Returns the mean wall time of predicting X over repeats runs, in milliseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(X)
+    return round((time.perf_counter() - start) / repeats * 1000, 3)
+
+
+def run_benchmark(n_rows: int, n_test_rows: int, estimators: list, n_jobs: int) -> list:
+    """
+    Trains every estimator of the model factory on the same arrays and records training time,
+    batch and single-row inference latency, pickled model size and test F1.
+    """
+    X_train, y_train = make_training_arrays(n_rows)
+    X_test, y_test = make_training_arrays(n_test_rows)
+    # Same class weights as the "class_weight" rebalancing strategy
+    counts = np.bincount(y_train)
+    class_weight = {label: len(y_train) / (len(counts) * count) for label, count in enumerate(counts)}
+    results = []
+    for estimator in estimators:
+        model = ModelFactory(estimator).build(class_weight=class_weight, n_jobs=n_jobs)
+        with threadpool_limits(limits=n_jobs, user_api="openmp"):
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_s = round(time.perf_counter() - start, 3)
+            y_pred = model.predict(X_test)
+            batch_ms = timed_predict(model, X_test, repeats=3)
+            single_row_ms = timed_predict(model, X_test[:1], repeats=50)
+        results.append({"estimator": estimator, "rows": n_rows, "fit_s": fit_s,
+                        "predict_batch_ms": batch_ms, "predict_row_ms": single_row_ms,
+                        "model_mb": round(len(dill.dumps(model)) / 1024 ** 2, 2),
+                        "f1_score": round(f1_score(y_test, y_pred), 4)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Random forest vs histogram gradient boosting: time, latency, size and F1")
+    parser.add_argument("--rows", type=int, default=500_000, help="Training set size")
+    parser.add_argument("--test-rows", type=int, default=100_000, help="Test set size")
+    parser.add_argument("--estimators", default=",".join(MODEL_ESTIMATORS), help="Comma separated model factory estimators")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1, help="Cores used to fit and predict")
+    args = parser.parse_args()
+
+    print(pd.DataFrame(run_benchmark(args.rows, args.test_rows, args.estimators.split(","), args.n_jobs)).to_string(index=False))
@@ -0,0 +1,85 @@
+import argparse
+import itertools
+import time
+
+import pandas as pd
+
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.constants import SCHEMA_FILE_PATH
+from src.data_access.proj_data import ProjData
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.utils.main_utils import read_yaml
+
+# Wire compression settings compared by this benchmark ("" disables compression)
+BENCHMARK_COMPRESSORS = ["", "snappy", "zstd"]
+
+
+def seed_collection(mongo_db_url: str, database_name: str, collection_name: str, n_rows: int):
+    """
+    Fills the benchmark collection with n_rows sample documents if it holds fewer.
+    """
+    collection = MongoDBClient(database_name=database_name, mongo_db_url=mongo_db_url).database[collection_name]
+    if collection.estimated_document_count() >= n_rows:
+        return
+    SyntheticVehicleData().load_into_collection(collection, n_rows)
+
+
+def server_bytes_out(mongo_client: MongoDBClient) -> int:
+    """
+    Returns the number of bytes the server has sent over the network so far.
+    """
+    return mongo_client.client.admin.command("serverStatus")["network"]["bytesOut"]
+
+
+def get_export_modes() -> dict:
+    """
+    Returns the export modes to compare: client-side cleaning and the server-side pipelines.
+    """
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    return {
+        "find": None,
+        "aggregate": ProjData.build_export_pipeline(schema_config),
+        "aggregate_encoded": ProjData.build_export_pipeline(schema_config, encode_categoricals=True),
+    }
+
+
+def run_benchmark(mongo_db_url: str, database_name: str, collection_name: str, repeats: int) -> list:
+    """
+    Exports the collection with each compressor and export mode, and measures wall time,
+    throughput and bytes sent by the server.
+    """
+    results = []
+    export_modes = get_export_modes()
+    for compressors in BENCHMARK_COMPRESSORS:
+        mongo_client = MongoDBClient(database_name=database_name, mongo_db_url=mongo_db_url,
+                                     compressors=compressors, bulk_read_preference="primary")
+        proj_data = ProjData(mongo_client=mongo_client)
+        for (export_mode, pipeline), _ in itertools.product(export_modes.items(), range(repeats)):
+            bytes_out = server_bytes_out(mongo_client)
+            start = time.perf_counter()
+            dataframe = proj_data.export_collection_as_dataframe(collection_name=collection_name, pipeline=pipeline)
+            wall_time = time.perf_counter() - start
+            results.append({
+                "compressors": compressors or "none",
+                "export_mode": export_mode,
+                "rows": len(dataframe),
+                "wall_s": round(wall_time, 3),
+                "rows_per_s": int(len(dataframe) / wall_time),
+                "mb_on_wire": round((server_bytes_out(mongo_client) - bytes_out) / 1024 ** 2, 2),
+            })
+    MongoDBClient.close_all()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure collection export throughput by wire compression and export mode")
+    parser.add_argument("--url", default="mongodb://localhost:27017", help="URL of the local mongod")
+    parser.add_argument("--database", default="vehicle-db-benchmark", help="Benchmark database name")
+    parser.add_argument("--collection", default="vehicle-data", help="Benchmark collection name")
+    parser.add_argument("--rows", type=int, default=500_000, help="Number of documents to seed")
+    parser.add_argument("--repeats", type=int, default=3, help="Exports per compressor")
+    args = parser.parse_args()
+
+    seed_collection(args.url, args.database, args.collection, args.rows)
+    report = pd.DataFrame(run_benchmark(args.url, args.database, args.collection, args.repeats))
+    print(report.groupby(["compressors", "export_mode"]).median(numeric_only=True).to_string())
@@ -0,0 +1,85 @@
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+from benchmarks.pipeline_scaling_benchmark import StageMonitor
+from src.components.data_transformation import DataTransformation
+from src.constants import SCHEMA_FILE_PATH
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.config_entity import DataTransformationConfig
+from src.utils.main_utils import DataFrameChunkWriter, apply_schema_dtypes, plan_schema_dtypes, read_yaml
+
+
+def write_split(directory: str, n_rows: int, batch_size: int = 500_000) -> DataIngestionArtifact:
+    """
+    Writes n_rows synthetic records as train/test parquet files (75/25), batch by batch.
+    """
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    generator = SyntheticVehicleData()
+    paths = {"train": os.path.join(directory, "train.parquet"), "test": os.path.join(directory, "test.parquet")}
+    dtypes = plan_schema_dtypes(schema_config)
+    with DataFrameChunkWriter(paths["train"], dtypes=dtypes) as train_writer, DataFrameChunkWriter(paths["test"], dtypes=dtypes) as test_writer:
+        for batch in generator.iter_batches(n_rows, batch_size=batch_size):
+            batch = apply_schema_dtypes(batch, schema_config)
+            split = int(len(batch) * 0.75)
+            train_writer.write(batch.iloc[:split])
+            test_writer.write(batch.iloc[split:])
+    return DataIngestionArtifact(trained_file_path=paths["train"], test_file_path=paths["test"])
+
+
+def transform(directory: str, mode: str, chunk_size: int) -> dict:
+    """
+    Runs the data transformation stage in the given mode and measures it in a fresh process.
+    """
+    output_dir = os.path.join(directory, mode)
+    config = DataTransformationConfig(
+        data_transformation_dir=output_dir,
+        transformed_train_file_path=os.path.join(output_dir, "train.npy"),
+        transformed_test_file_path=os.path.join(output_dir, "test.npy"),
+        transformed_train_label_file_path=os.path.join(output_dir, "train_labels.npy"),
+        transformed_test_label_file_path=os.path.join(output_dir, "test_labels.npy"),
+        transformed_object_file_path=os.path.join(output_dir, "preprocessing.pkl"),
+        rebalancing_strategy="class_weight",
+        transformation_mode=mode,
+        chunk_size=chunk_size,
+    )
+    data_transformation = DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(os.path.join(directory, "train.parquet"), os.path.join(directory, "test.parquet")),
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message="", validation_report_file_path=""),
+        data_transformation_config=config,
+    )
+    with StageMonitor() as monitor:
+        data_transformation.initiate_data_transformation()
+    return {"mode": mode, **monitor.result()}
+
+
+def run_benchmark(sizes: list, chunk_size: int) -> list:
+    """
+    Measures wall time and peak resident memory of both transformation modes for every size.
+    """
+    results = []
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_split(directory, n_rows)
+            for mode in ("in_memory", "out_of_core"):
+                # A spawned process per run so peak memory is not inherited from the previous run
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(transform, directory, mode, chunk_size).result()
+                results.append({"rows": n_rows, "mode": result["mode"], "wall_s": result["wall_s"],
+                                "peak_rss_mb": result["peak_rss_mb"], "rss_growth_mb": result["rss_growth_mb"]})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of in-memory vs out-of-core data transformation")
+    parser.add_argument("--sizes", default="1000000,4000000", help="Comma separated dataset sizes")
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="Rows per chunk in out-of-core mode")
+    args = parser.parse_args()
+
+    report = pd.DataFrame(run_benchmark([int(size) for size in args.sizes.split(",")], args.chunk_size))
+    print(report.to_string(index=False))
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.data_access.synthetic_data import SyntheticVehicleData
+
+# Interval between two resident memory samples while a stage runs
+RSS_SAMPLE_INTERVAL_S = 0.02
+
+
+def read_rss_bytes() -> int:
+    """
+    Returns the current resident memory of this process in bytes.
+    """
+    with open("/proc/self/status") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def read_io_counters() -> dict:
+    """
+    Returns the bytes this process has read from and written to storage, empty when /proc/self/io is unavailable.
+    """
+    try:
+        with open("/proc/self/io") as io_file:
+            counters = dict(line.split(": ") for line in io_file.read().splitlines())
+        return {key: int(counters[key]) for key in ("read_bytes", "write_bytes", "rchar", "wchar")}
+    except OSError:
+        return {}
+
+
+class StageMonitor:
+    """
+    Measures wall time, peak resident memory and disk I/O of the code run inside the context.
+    Peak memory is sampled by a background thread.
+    """
+
+    def __enter__(self):
+        self._io_before = read_io_counters()
+        self._rss_before = read_rss_bytes()
+        self._peak_rss = self._rss_before
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def _sample(self):
+        # Keep the highest resident memory seen until the stage ends
+        while not self._stopped.wait(RSS_SAMPLE_INTERVAL_S):
+            self._peak_rss = max(self._peak_rss, read_rss_bytes())
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_s = time.perf_counter() - self._start
+        self._stopped.set()
+        self._sampler.join()
+        self._peak_rss = max(self._peak_rss, read_rss_bytes())
+        self._io_after = read_io_counters()
+
+    def result(self) -> dict:
+        """
+        Returns the measurements of the stage; disk I/O counts bytes that reached storage,
+        logical I/O also counts reads served from the page cache.
+        """
+        io_delta = {key: self._io_after[key] - self._io_before[key] for key in self._io_after}
+        return {
+            "wall_s": round(self.wall_s, 3),
+            "peak_rss_mb": round(self._peak_rss / 1024 ** 2, 1),
+            "rss_growth_mb": round((self._peak_rss - self._rss_before) / 1024 ** 2, 1),
+            "disk_read_mb": round(io_delta["read_bytes"] / 1024 ** 2, 2) if io_delta else None,
+            "disk_write_mb": round(io_delta["write_bytes"] / 1024 ** 2, 2) if io_delta else None,
+            "logical_read_mb": round(io_delta["rchar"] / 1024 ** 2, 2) if io_delta else None,
+            "logical_write_mb": round(io_delta["wchar"] / 1024 ** 2, 2) if io_delta else None,
+        }
+
+
+def seed_collection(mongo_db_url: str, database_name: str, collection_name: str, n_rows: int):
+    """
+    Loads n_rows synthetic records into the collection unless it already holds exactly that many.
+    """
+    collection = MongoDBClient(database_name=database_name, mongo_db_url=mongo_db_url).database[collection_name]
+    if collection.estimated_document_count() == n_rows:
+        return
+    start = time.perf_counter()
+    SyntheticVehicleData().load_into_collection(collection, n_rows)
+    print(f"Seeded {collection_name} with {n_rows} records in {time.perf_counter() - start:.1f}s")
+
+
+def run_stages(n_rows: int, database_name: str, collection_name: str, with_s3: bool, keep_artifacts: bool) -> list:
+    """
+    Runs the pipeline stages one after the other on the collection and measures each of them.
+    Meant to run in a fresh process so memory peaks and the artifact directory belong to this size only.
+    """
+    from src.entity.config_entity import training_pipeline_config
+    from src.pipeline.training_pipeline import TrainPipeline
+
+    pipeline = TrainPipeline()
+    pipeline.data_ingestion_config.database_name = database_name
+    pipeline.data_ingestion_config.collection_name = collection_name
+    results = []
+
+    def measure(stage_name, start_stage, **kwargs):
+        with StageMonitor() as monitor:
+            artifact = start_stage(**kwargs)
+        results.append({"rows": n_rows, "stage": stage_name, **monitor.result()})
+        return artifact
+
+    try:
+        ingestion = measure("data_ingestion", pipeline.start_data_ingestion)
+        validation = measure("data_validation", pipeline.start_data_validation, data_ingestion_artifact=ingestion)
+        transformation = measure("data_transformation", pipeline.start_data_transformation,
+                                 data_ingestion_artifact=ingestion, data_validation_artifact=validation)
+        trainer = measure("model_trainer", pipeline.start_model_training, data_transformation_artifact=transformation)
+        # Evaluation and pushing talk to the model bucket, only run them when S3 is reachable
+        if with_s3:
+            evaluation = measure("model_evaluation", pipeline.start_model_evaluation,
+                                 data_ingestion_artifact=ingestion, data_transformation_artifact=transformation,
+                                 model_trainer_artifact=trainer)
+            if evaluation.is_model_accepted:
+                measure("model_pusher", pipeline.start_model_pusher, model_evaluation_artifact=evaluation)
+    finally:
+        if not keep_artifacts:
+            shutil.rmtree(training_pipeline_config.artifact_dir, ignore_errors=True)
+    return results
+
+
+def scaling_exponents(report: pd.DataFrame) -> pd.Series:
+    """
+    Fits wall time ~ rows^k per stage on a log-log scale; k close to 1 means linear scaling.
+    """
+    return report.groupby("stage", sort=False)[["rows", "wall_s"]].apply(
+        lambda stage: np.polyfit(np.log(stage["rows"]), np.log(stage["wall_s"].clip(lower=1e-3)), 1)[0]
+        if stage["rows"].nunique() > 1 else np.nan
+    ).round(2)
+
+
+def git_revision() -> str:
+    """
+    Returns the short hash of the checked out commit, or "unknown" outside a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling curve of the training pipeline stages on synthetic data")
+    parser.add_argument("--url", default="mongodb://localhost:27017", help="URL of the local mongod standing in for Atlas")
+    parser.add_argument("--database", default="vehicle-db-benchmark", help="Benchmark database name")
+    parser.add_argument("--sizes", default="100000,1000000,10000000", help="Comma separated dataset sizes")
+    parser.add_argument("--with-s3", action="store_true", help="Also run model evaluation and pushing (needs AWS credentials)")
+    parser.add_argument("--keep-artifacts", action="store_true", help="Keep the artifact directory of each run")
+    parser.add_argument("--output", default="benchmarks/results/pipeline_scaling.jsonl", help="JSON lines file the measurements are appended to")
+    args = parser.parse_args()
+
+    # Worker processes read the MongoDB URL from the environment at import time
+    os.environ["MONGO_DB_URL"] = args.url
+    run_info = {"run_at": datetime.now().isoformat(timespec="seconds"), "git_revision": git_revision(), "cpu_count": os.cpu_count()}
+    records = []
+    for n_rows in [int(size) for size in args.sizes.split(",")]:
+        collection_name = f"vehicle-data-{n_rows}"
+        seed_collection(args.url, args.database, collection_name, n_rows)
+        # One fresh process per size keeps peak memory and artifacts independent between sizes
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            stage_results = executor.submit(run_stages, n_rows, args.database, collection_name,
+                                             args.with_s3, args.keep_artifacts).result()
+        records.extend({**run_info, **stage_result} for stage_result in stage_results)
+        print(pd.DataFrame(stage_results).to_string(index=False))
+    MongoDBClient.close_all()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a") as output_file:
+        for record in records:
+            output_file.write(json.dumps(record) + "\n")
+
+    report = pd.DataFrame(records)
+    print("\nWall time (s) by stage and rows")
+    print(report.pivot(index="stage", columns="rows", values="wall_s").reindex(report["stage"].unique()).to_string())
+    print("\nPeak RSS (MB) by stage and rows")
+    print(report.pivot(index="stage", columns="rows", values="peak_rss_mb").reindex(report["stage"].unique()).to_string())
+    print("\nScaling exponent k (wall time ~ rows^k)")
+    print(scaling_exponents(report).to_string())
@@ -0,0 +1,63 @@
+import argparse
+import gc
+
+import numpy as np
+import pandas as pd
+from imblearn.combine import SMOTEENN
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.pipeline_scaling_benchmark import StageMonitor
+from src.components.rebalancer import Rebalancer, REBALANCING_STRATEGIES
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.entity.categorical_encoder import CategoricalEncoder
+from src.utils.main_utils import read_yaml
+
+
+def make_training_arrays(n_rows: int):
+    """
+    Returns encoded, scaled float32 features and int8 labels of n_rows synthetic records.
+    """
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    dataframe = SyntheticVehicleData().generate(n_rows).drop(columns=["id"])
+    features = CategoricalEncoder(schema_config["categorical_mappings"]).fit_transform(dataframe.drop(columns=[TARGET_COLUMN]))
+    return StandardScaler().fit_transform(features).astype(np.float32), dataframe[TARGET_COLUMN].to_numpy(dtype=np.int8)
+
+
+def run_benchmark(sizes: list, baseline_max_rows: int) -> list:
+    """
+    Runs every rebalancing strategy, and the previous imblearn SMOTEENN step on the smaller sizes,
+    and records wall time, memory growth and output size.
+    """
+    results = []
+    for n_rows in sizes:
+        X, y = make_training_arrays(n_rows)
+        strategies = REBALANCING_STRATEGIES + (["imblearn_smoteenn"] if n_rows <= baseline_max_rows else [])
+        for strategy in strategies:
+            gc.collect()
+            with StageMonitor() as monitor:
+                if strategy == "imblearn_smoteenn":
+                    X_out, y_out = SMOTEENN(sampling_strategy="minority").fit_resample(X, y)
+                else:
+                    X_out, y_out, _ = Rebalancer(strategy=strategy).fit_resample(X, y)
+            measurements = monitor.result()
+            results.append({
+                "rows": n_rows,
+                "strategy": strategy,
+                "wall_s": measurements["wall_s"],
+                "rss_growth_mb": measurements["rss_growth_mb"],
+                "rows_out": len(y_out),
+                "positive_share": round(float(np.mean(y_out == 1)), 3),
+            })
+            del X_out, y_out
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runtime and memory of the class rebalancing strategies by data size")
+    parser.add_argument("--sizes", default="100000,500000,2000000", help="Comma separated training set sizes")
+    parser.add_argument("--baseline-max-rows", type=int, default=500_000, help="Largest size the imblearn SMOTEENN baseline runs on")
+    args = parser.parse_args()
+
+    report = pd.DataFrame(run_benchmark([int(size) for size in args.sizes.split(",")], args.baseline_max_rows))
+    print(report.to_string(index=False))
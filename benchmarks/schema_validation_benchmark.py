@@ -0,0 +1,59 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.constants import SCHEMA_FILE_PATH, DATA_VALIDATION_CHUNK_SIZE
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.utils.main_utils import read_yaml, apply_schema_dtypes, DataFrameChunkWriter, iter_dataframe_chunks
+from src.utils.schema_validator import SchemaValidator
+
+
+def write_sample_file(file_path: str, n_rows: int, schema_config: dict, na_rate: float):
+    """
+    Writes n_rows synthetic records to an ingestion-like artifact, batch by batch.
+    """
+    with DataFrameChunkWriter(file_path, compression="zstd") as writer:
+        for batch in SyntheticVehicleData(na_rate=na_rate).iter_batches(n_rows, batch_size=1_000_000):
+            writer.write(apply_schema_dtypes(batch.drop(columns=["id"]), schema_config))
+
+
+def run_benchmark(n_rows: int, chunk_size: int, file_format: str) -> list:
+    """
+    Measures validation throughput in full and early-abort mode, on a clean file and on a file
+    with invalid categorical labels.
+    """
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    validator = SchemaValidator(schema_config)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for data, na_rate in (("clean", 0.0), ("dirty", 0.001)):
+            file_path = os.path.join(tmp_dir, f"{data}.{file_format}")
+            write_sample_file(file_path, n_rows, schema_config, na_rate)
+            for mode in ("full", "early_abort"):
+                start = time.perf_counter()
+                result = validator.validate(iter_dataframe_chunks(file_path, chunk_size), early_abort=mode == "early_abort")
+                wall_time = time.perf_counter() - start
+                results.append({
+                    "data": data,
+                    "mode": mode,
+                    "rows_validated": result["rows"],
+                    "valid": result["valid"],
+                    "wall_s": round(wall_time, 3),
+                    "rows_per_s": int(result["rows"] / wall_time),
+                    "file_mb_per_s": round(os.path.getsize(file_path) / 1024 ** 2 * result["rows"] / n_rows / wall_time, 1),
+                })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of the vectorized schema validator on large ingestion artifacts")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of synthetic rows")
+    parser.add_argument("--chunk-size", type=int, default=DATA_VALIDATION_CHUNK_SIZE, help="Rows validated per chunk")
+    parser.add_argument("--format", default="parquet", choices=["csv", "parquet", "arrow"], help="Artifact file format")
+    args = parser.parse_args()
+
+    report = pd.DataFrame(run_benchmark(args.rows, args.chunk_size, args.format))
+    print(report.to_string(index=False))
@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+
+from benchmarks.rebalancing_benchmark import make_training_arrays
+from src.components.model_factory import ModelFactory
+from src.components.sharded_training import ShardedForestTrainer
+
+
+def run_benchmark(n_rows: int, n_test_rows: int, n_estimators: int, shard_counts: list, coordinators: list) -> list:
+    """
+    Fits the forest at once on one core, then sharded across local worker processes (one core each)
+    with every coordinator, and records wall time, speedup and test F1.
+    """
+    X_test, y_test = make_training_arrays(n_test_rows)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        X_train, y_train = make_training_arrays(n_rows)
+        features_file_path, labels_file_path = os.path.join(directory, "train.npy"), os.path.join(directory, "train_labels.npy")
+        np.save(features_file_path, X_train)
+        np.save(labels_file_path, y_train)
+        # Same class weights as the "class_weight" rebalancing strategy
+        counts = np.bincount(y_train)
+        class_weight = {label: len(y_train) / (len(counts) * count) for label, count in enumerate(counts)}
+        del X_train, y_train
+        factory = ModelFactory(params={"n_estimators": n_estimators})
+
+        start = time.perf_counter()
+        model = factory.build(class_weight=class_weight, n_jobs=1).fit(np.load(features_file_path, mmap_mode="r"), np.load(labels_file_path, mmap_mode="r"))
+        single_s = round(time.perf_counter() - start, 3)
+        single_f1 = f1_score(y_test, model.predict(X_test))
+        results.append({"rows": n_rows, "coordinator": "none", "shards": 1, "wall_s": single_s, "speedup": 1.0,
+                        "f1_score": round(single_f1, 4), "f1_delta": 0.0})
+
+        for coordinator in coordinators:
+            for n_shards in shard_counts:
+                trainer = ShardedForestTrainer({"n_shards": n_shards, "coordinator": coordinator, "local_workers": n_shards,
+                                                "coordinator_dir": os.path.join(directory, "coordinator")})
+                start = time.perf_counter()
+                model = trainer.fit(factory.build(class_weight=class_weight, n_jobs=1), features_file_path, labels_file_path)
+                wall_s = round(time.perf_counter() - start, 3)
+                f1 = f1_score(y_test, model.predict(X_test))
+                results.append({"rows": n_rows, "coordinator": coordinator, "shards": n_shards, "wall_s": wall_s,
+                                "speedup": round(single_s / wall_s, 2), "f1_score": round(f1, 4), "f1_delta": round(f1 - single_f1, 4)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded forest training: scaling and accuracy parity with a single fit")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Training set size")
+    parser.add_argument("--test-rows", type=int, default=200_000, help="Test set size")
+    parser.add_argument("--trees", type=int, default=100, help="Trees of the forest")
+    parser.add_argument("--shards", default=",".join(str(n) for n in (2, 4, 8) if n <= (os.cpu_count() or 1)) or "2",
+                        help="Comma separated shard counts")
+    parser.add_argument("--coordinators", default="process,file", help="Comma separated coordinators")
+    args = parser.parse_args()
+
+    report = pd.DataFrame(run_benchmark(args.rows, args.test_rows, args.trees, [int(n) for n in args.shards.split(",")],
+                                        args.coordinators.split(",")))
+    print(report.to_string(index=False))
@@ -0,0 +1,73 @@
+import argparse
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.stage_dag import StageNode, StageDAGExecutor
+
+
+def wait_stage(seconds: float, *artifacts):
+    """
+    Stands in for an I/O bound stage (Mongo export, S3 download): sleeps, releasing the GIL.
+    """
+    time.sleep(seconds)
+    return seconds
+
+
+def compute_stage(seconds: float, *artifacts):
+    """
+    Stands in for a CPU bound stage (forest training): holds the GIL for the given time.
+    """
+    end = time.perf_counter() + seconds
+    total = 0.0
+    while time.perf_counter() < end:
+        total += float(np.sum(np.arange(1000)))
+    return total
+
+
+def make_pipeline_dag(ingestion_s: float, download_s: float, stage_s: float, training_s: float, training_executor: str) -> list:
+    """
+    Returns a DAG with the shape of the training pipeline, the production model download running beside the other stages.
+    """
+    return [
+        StageNode("data_ingestion", partial(wait_stage, ingestion_s)),
+        StageNode("champion_prefetch", partial(wait_stage, download_s), depends_on=["data_ingestion"]),
+        StageNode("data_validation", partial(compute_stage, stage_s), depends_on=["data_ingestion"]),
+        StageNode("data_transformation", partial(compute_stage, stage_s), depends_on=["data_ingestion", "data_validation"]),
+        StageNode("model_trainer", partial(compute_stage, training_s), depends_on=["data_transformation"], executor=training_executor),
+        StageNode("model_evaluation", partial(compute_stage, stage_s),
+                  depends_on=["data_ingestion", "data_transformation", "model_trainer", "champion_prefetch"]),
+    ]
+
+
+def run_benchmark(worker_budgets: list, ingestion_s: float, download_s: float, stage_s: float, training_s: float) -> list:
+    """
+    Runs the pipeline shaped DAG under every worker budget, training on a thread and on a process,
+    and records the wall time, the critical path and the achieved parallelism.
+    """
+    results = []
+    for training_executor in ("thread", "process"):
+        for max_workers in worker_budgets:
+            executor = StageDAGExecutor(max_workers=max_workers)
+            executor.run(make_pipeline_dag(ingestion_s, download_s, stage_s, training_s, training_executor))
+            report = executor.report()
+            results.append({"training_executor": training_executor, "max_workers": max_workers,
+                            "wall_time_s": report["wall_time_s"], "node_time_s": report["node_time_s"],
+                            "critical_path_s": report["critical_path_s"], "parallelism": report["parallelism"],
+                            "critical_path": " -> ".join(report["critical_path"])})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage DAG executor: wall time and critical path by worker budget")
+    parser.add_argument("--worker-budgets", default="1,2,4", help="Comma separated max_workers values")
+    parser.add_argument("--ingestion-s", type=float, default=1.0, help="Duration of the simulated Mongo export")
+    parser.add_argument("--download-s", type=float, default=2.0, help="Duration of the simulated production model download")
+    parser.add_argument("--stage-s", type=float, default=0.3, help="Duration of validation, transformation and evaluation")
+    parser.add_argument("--training-s", type=float, default=3.0, help="Duration of the simulated training")
+    args = parser.parse_args()
+
+    budgets = [int(budget) for budget in args.worker_budgets.split(",")]
+    print(pd.DataFrame(run_benchmark(budgets, args.ingestion_s, args.download_s, args.stage_s, args.training_s)).to_string(index=False))
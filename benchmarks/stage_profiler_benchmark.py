@@ -0,0 +1,47 @@
+import argparse
+import time
+
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.rebalancing_benchmark import make_training_arrays
+from src.pipeline.stage_profiler import StageProfiler, STAGE_PROFILE_MEMORY_METHODS
+
+
+def fit_forest(X, y, n_estimators: int):
+    """
+    Stand-in stage: fits a small random forest.
+    """
+    return RandomForestClassifier(n_estimators=n_estimators, n_jobs=1, random_state=42).fit(X, y)
+
+
+def run_benchmark(n_rows: int, n_estimators: int, sample_interval_s: float) -> list:
+    """
+    Times the same stage unprofiled and under every memory method of the profiler, and records
+    the overhead and the memory each method reports.
+    """
+    X, y = make_training_arrays(n_rows)
+    start = time.perf_counter()
+    fit_forest(X, y, n_estimators)
+    baseline_s = time.perf_counter() - start
+    results = [{"memory_method": "unprofiled", "wall_time_s": round(baseline_s, 3), "overhead_pct": 0.0}]
+    for memory_method in STAGE_PROFILE_MEMORY_METHODS:
+        profiler = StageProfiler(memory_method=memory_method, sample_interval_s=sample_interval_s)
+        with profiler.profile("model_trainer") as stage_profile:
+            fit_forest(X, y, n_estimators)
+            stage_profile.rows = n_rows
+        results.append({"memory_method": memory_method, "wall_time_s": stage_profile.wall_time_s,
+                        "overhead_pct": round(100 * (stage_profile.wall_time_s / baseline_s - 1), 1),
+                        "cpu_time_s": stage_profile.cpu_time_s, "peak_rss_mb": stage_profile.peak_rss_mb,
+                        "rss_delta_mb": stage_profile.rss_delta_mb, "peak_traced_mb": stage_profile.peak_traced_mb})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage profiler: overhead and reported memory by memory method")
+    parser.add_argument("--rows", type=int, default=200_000, help="Training set size")
+    parser.add_argument("--estimators", type=int, default=20, help="Trees of the profiled forest")
+    parser.add_argument("--sample-interval-s", type=float, default=0.05, help="Seconds between resident set size samples")
+    args = parser.parse_args()
+
+    print(pd.DataFrame(run_benchmark(args.rows, args.estimators, args.sample_interval_s)).to_string(index=False))
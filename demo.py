@@ -12,7 +12,15 @@
 #     logging.error(e)
 #     raise MyException(e,sys)
 
+import argparse
+
 from src.pipeline.training_pipeline import TrainPipeline
 
-pipeline = TrainPipeline()
-pipeline.run_pipeline()
\ No newline at end of file
+# Guarded so worker processes (hyperparameter search) can import this module without starting a run
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the training pipeline")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN_DIR",
+                        help="Resume a failed run (artifacts/<timestamp>) from its first incomplete stage; the latest run if no directory is given")
+    args = parser.parse_args()
+    pipeline = TrainPipeline(resume_run_dir=args.resume)
+    pipeline.run_pipeline()
\ No newline at end of file
@@ -58,6 +58,25 @@ class SimpleStorageService:
             logging.error(f"Error getting bucket '{bucket_name}': {e}")
             raise MyException(e, sys)
 
+    def get_object_etag(self, bucket_name, s3_key):
+        """
+        Get the ETag of an S3 object without downloading it; it changes whenever the object is overwritten.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            str: The ETag of the object.
+        """
+        try:
+            logging.info(f"Getting ETag of '{s3_key}' in bucket '{bucket_name}'.")
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+            return response["ETag"].strip('"')
+        except Exception as e:
+            logging.error(f"Error getting ETag of '{s3_key}': {e}")
+            raise MyException(e, sys)
+
     def get_file_object(self, file_name, bucket_name):
         """
         Retrieve file object(s) from the specified bucket and file name.
@@ -1,5 +1,6 @@
 import os
 import sys
+import numpy as np
 import pandas 
 from sklearn.model_selection import train_test_split
 
@@ -8,37 +9,62 @@ from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception import MyException
 from src.logger import logging
 from src.data_access.proj_data import ProjData
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.artifact_store import ArtifactStore
+from src.utils.main_utils import read_yaml, apply_schema_dtypes, plan_schema_dtypes, DataFrameChunkWriter
+
+# Number of hash buckets used to turn the split ratio into a threshold
+SPLIT_HASH_BUCKETS = 10000
 
 class DataIngestion:
 
-    def __init__(self,data_ingestion_config:DataIngestionConfig=DataIngestionConfig()):
+    def __init__(self,data_ingestion_config:DataIngestionConfig=DataIngestionConfig(),artifact_store:ArtifactStore=None):
         """
         Constructor for DataIngestion class.
-        Initializes the data ingestion configuration.
+        Initializes the data ingestion configuration and the artifact store used to persist outputs.
         """
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_store = artifact_store or ArtifactStore()
+            self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
         except Exception as e:
             raise MyException(e,sys)
         
+    def get_export_pipeline(self, keep_columns=None):
+        """
+        Returns the server-side aggregation pipeline in "aggregate" export mode, None in "find" mode.
+        """
+        if self.data_ingestion_config.export_mode != "aggregate":
+            return None
+        return ProjData.build_export_pipeline(
+            self._schema_config,
+            encode_categoricals=self.data_ingestion_config.encode_categoricals,
+            keep_columns=keep_columns
+        )
+
     def export_data_into_feature_store(self):
         """
-        Exports data from MongoDB and saves it as a CSV file in the feature store.
+        Exports data from MongoDB and saves it in the feature store, typed according to the schema.
         Returns the dataframe.
         """
         try:
             logging.info("Exporting data from mongoDB")
             my_data = ProjData()
+            # Build the server-side projection/cleaning pipeline when exporting in aggregate mode
+            pipeline = self.get_export_pipeline()
             # Export data from the specified MongoDB collection as a DataFrame
-            dataframe = my_data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name)
+            dataframe = my_data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name,
+                                                               database_name=self.data_ingestion_config.database_name,
+                                                               pipeline=pipeline)
             logging.info(f"Shape of dataframe {dataframe.shape}")
+            # Cast columns to the compact dtypes planned from the schema so columnar formats keep them
+            memory_before = dataframe.memory_usage(deep=True).sum()
+            dataframe = apply_schema_dtypes(dataframe, self._schema_config)
+            logging.info(f"Dataframe memory compacted from {memory_before} to {dataframe.memory_usage(deep=True).sum()} bytes")
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-            dir_path = os.path.dirname(feature_store_file_path)
-            # Create directory if it doesn't exist
-            os.makedirs(dir_path,exist_ok=True)
             logging.info(f"Saving exported data into feature store path: {feature_store_file_path}")
-            # Save DataFrame to CSV
-            dataframe.to_csv(feature_store_file_path,index=False,header=True)
+            # Save DataFrame in the configured artifact format
+            self.artifact_store.save_dataframe(feature_store_file_path,dataframe,compression=self.data_ingestion_config.compression)
             return dataframe
         except Exception as e:
             raise MyException(e,sys)
@@ -46,21 +72,21 @@ class DataIngestion:
 
     def split_data_as_train_test(self,dataframe):
         """
-        Splits the dataframe into train and test sets and saves them as CSV files.
+        Splits the dataframe into train and test sets and saves them in the configured artifact format.
         """
         try:
             # Split the data into train and test sets
             train_set , test_set = train_test_split(dataframe,test_size=self.data_ingestion_config.train_test_split_ratio)
             logging.info("Splitting into train and test set")
             logging.info("Exited train test method")
-            dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
-            # Create directory if it doesn't exist
-            os.makedirs(dir_path,exist_ok=True)
 
             logging.info(f"Exporting train and test filepath")
-            # Save train and test sets to CSV files
-            train_set.to_csv(self.data_ingestion_config.training_file_path,index=False,header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path,index=False,header=True)
+            # Save train and test sets in the configured artifact format, concurrently (columnar encoding and writes release the GIL)
+            compression = self.data_ingestion_config.compression
+            self.artifact_store.run_concurrently([
+                lambda: self.artifact_store.save_dataframe(self.data_ingestion_config.training_file_path,train_set,compression=compression),
+                lambda: self.artifact_store.save_dataframe(self.data_ingestion_config.testing_file_path,test_set,compression=compression),
+            ], max_workers=self.data_ingestion_config.split_workers)
 
             logging.info("Exported train and test file")
 
@@ -68,16 +94,88 @@ class DataIngestion:
             raise MyException(e,sys)
         
 
+    def get_test_mask(self, batch, class_counts=None):
+        """
+        Returns a boolean mask of the batch rows that belong to the test set.
+
+        The id of every record is hashed to a position in [0, 1) and the record goes to the test set
+        when the position falls below its test ratio: the split ratio, or when stratified the test
+        ratio of its target class. The assignment of a record only depends on its id (and class), so
+        inserting or deleting other records never moves it between train and test. Since the hash is
+        independent of the class, every class sends its ratio of rows to the test set up to sampling noise.
+        class_counts, when given, accumulates the (train, test) rows of every class.
+        """
+        ratio = self.data_ingestion_config.train_test_split_ratio
+        ids = batch[self.data_ingestion_config.split_id_column]
+        hashes = pandas.util.hash_pandas_object(ids, index=False, hash_key=self.data_ingestion_config.split_hash_key)
+        positions = (hashes.to_numpy() % SPLIT_HASH_BUCKETS) / SPLIT_HASH_BUCKETS
+        if not self.data_ingestion_config.stratify:
+            return positions < ratio
+        class_ratios = self.data_ingestion_config.stratify_class_ratios
+        labels = batch[TARGET_COLUMN]
+        thresholds = labels.map(lambda label: class_ratios.get(label, ratio)).to_numpy(dtype=np.float64)
+        is_test = positions < thresholds
+        if class_counts is not None:
+            for label, positions_in_class in labels.groupby(labels, observed=True).indices.items():
+                n_test = int(is_test[positions_in_class].sum())
+                train_rows, test_rows = class_counts.get(label, (0, 0))
+                class_counts[label] = (train_rows + len(positions_in_class) - n_test, test_rows + n_test)
+        return is_test
+
+    def stream_split_into_train_test(self):
+        """
+        Streams the collection from MongoDB batch by batch and writes every record straight to the
+        train or test artifact with a deterministic split on the record id, so the full dataset is
+        never held in memory and re-runs on the same data produce the same split.
+        Every record is also appended to the feature store, giving the same artifact layout as the in-memory split.
+        """
+        try:
+            logging.info("Streaming data from mongoDB into train and test sets")
+            my_data = ProjData()
+            id_column = self.data_ingestion_config.split_id_column
+            compression = self.data_ingestion_config.compression
+            class_counts = {}
+            batches = my_data.iter_collection_batches(
+                collection_name=self.data_ingestion_config.collection_name,
+                database_name=self.data_ingestion_config.database_name,
+                pipeline=self.get_export_pipeline(keep_columns=[id_column])
+            )
+            # File dtypes planned once from the schema ranges, so a later batch is never narrowed to the first one's dtypes
+            dtypes = plan_schema_dtypes(self._schema_config, encoded_categoricals=self.get_export_pipeline() is not None
+                                        and self.data_ingestion_config.encode_categoricals)
+            with DataFrameChunkWriter(self.data_ingestion_config.feature_store_file_path, compression=compression, dtypes=dtypes) as feature_store_writer, \
+                    DataFrameChunkWriter(self.data_ingestion_config.training_file_path, compression=compression, dtypes=dtypes) as train_writer, \
+                    DataFrameChunkWriter(self.data_ingestion_config.testing_file_path, compression=compression, dtypes=dtypes) as test_writer:
+                for batch in batches:
+                    is_test = self.get_test_mask(batch, class_counts)
+                    # The id is only needed for the split, drop it as the regular export does
+                    batch = apply_schema_dtypes(batch.drop(columns=[id_column]), self._schema_config)
+                    feature_store_writer.write(batch)
+                    train_writer.write(batch[~is_test])
+                    test_writer.write(batch[is_test])
+            for file_path in (self.data_ingestion_config.feature_store_file_path, self.data_ingestion_config.training_file_path,
+                              self.data_ingestion_config.testing_file_path):
+                self.artifact_store.record_disk_write(file_path)
+            logging.info(f"Streamed {train_writer.rows_written} train rows and {test_writer.rows_written} test rows")
+            for label, (train_rows, test_rows) in class_counts.items():
+                logging.info(f"Class {label}: {test_rows / (train_rows + test_rows):.4f} of {train_rows + test_rows} rows in the test set")
+        except Exception as e:
+            raise MyException(e,sys)
+
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         """
         Orchestrates the data ingestion process: exports data, splits it, and returns an artifact.
         """
         try:
-            # Export data from MongoDB to feature store
-            dataframe = self.export_data_into_feature_store()
-            logging.info("Got the data from mongodb")
-            # Split data into train and test sets
-            self.split_data_as_train_test(dataframe)
+            if self.data_ingestion_config.split_mode == "hash":
+                # Split records into train and test while they are read from MongoDB
+                self.stream_split_into_train_test()
+            else:
+                # Export data from MongoDB to feature store
+                dataframe = self.export_data_into_feature_store()
+                logging.info("Got the data from mongodb")
+                # Split data into train and test sets
+                self.split_data_as_train_test(dataframe)
             logging.info("Train test split performed on data")
             logging.info("Exited from initiate data ingestion method")
             # Create and return DataIngestionArtifact with file paths
@@ -1,7 +1,6 @@
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.compose import ColumnTransformer
-from imblearn.combine import SMOTEENN
 
 import sys
 import numpy as np
@@ -13,37 +12,48 @@ from src.logger import logging
 from src.entity.artifact_entity import DataValidationArtifact, DataIngestionArtifact, DataTransformationArtifact
 from src.entity.config_entity import DataValidationConfig, DataTransformationConfig
 from src.constants import SCHEMA_FILE_PATH,TARGET_COLUMN
-from src.utils.main_utils import read_yaml, save_object, save_numpy_data, load_numpy_data
+from src.data_access.artifact_store import ArtifactStore
+from src.entity.categorical_encoder import CategoricalEncoder
+from src.components.rebalancer import Rebalancer
+from src.utils.main_utils import read_yaml, read_dataframe, open_numpy_memmap, load_object
 
 
 class DataTransformation:
-    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact, data_transformation_config: DataTransformationConfig):
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact, data_transformation_config: DataTransformationConfig, artifact_store: ArtifactStore = None):
         """
-        Initialize DataTransformation with required artifacts and configs.
+        Initialize DataTransformation with required artifacts, configs and artifact store.
         Loads schema configuration from YAML.
         """
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_artifact = data_validation_artifact
             self.data_transformation_config = data_transformation_config
+            self.artifact_store = artifact_store or ArtifactStore()
             self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
         except Exception as e:
             raise MyException(e, sys)
         
     @staticmethod
-    def read_data(file_path):
+    def read_data(file_path, columns=None):
         """
-        Read CSV data from the given file path and return as a DataFrame.
+        Read a data artifact (csv, parquet or Arrow IPC) from the given file path and return as a DataFrame.
+        Only the given columns are read when columns is set.
         """
         try:
-            return pd.read_csv(file_path)
+            return read_dataframe(file_path, columns=columns)
         except Exception as e:
             raise MyException(e, sys)
 
 
+    def get_required_columns(self):
+        """
+        Return the columns needed for transformation: all numerical (incl. target) and categorical schema columns.
+        """
+        return self._schema_config["numerical_columns"] + self._schema_config["categorical_columns"]
+
     def get_data_transformer_object(self):
         """
-        Create and return a data transformation pipeline for numeric and min-max features.
+        Create and return a data transformation pipeline: categorical encoding, then scaling of numeric and min-max features.
         """
         logging.info("Entered get_data_transformer_object method")
         try:
@@ -67,8 +77,11 @@ class DataTransformation:
                 remainder="passthrough"
             )
 
-            # Wrap preprocessor in a pipeline
-            final_pipeline = Pipeline(steps=[("preprocessor",preprocessor)])
+            # Encode the categorical columns first so training and serving share the same encoding
+            categorical_encoder = CategoricalEncoder(self._schema_config["categorical_mappings"])
+
+            # Wrap encoder and preprocessor in a pipeline
+            final_pipeline = Pipeline(steps=[("encoder",categorical_encoder),("preprocessor",preprocessor)])
             logging.info("Final Pipeline created")
             logging.info("Exited get_data_transformer_object method")
             return final_pipeline
@@ -77,66 +90,248 @@ class DataTransformation:
             raise MyException(e,sys)
         
 
-    def map_gender_column(self,df):
+    def drop_id_columns(self,df):
         """
-        Map 'Gender' column to binary values: Female=0, Male=1.
+        Drop ID or unwanted columns as specified in schema config.
         """
-        logging.info("Mapping 'Gender' to binary values")
-        df["Gender"] = df["Gender"].map({"Female":0,"Male":1}).astype(int)
+        logging.info("Drop id column")
+        drop_col = self._schema_config["drop_columns"]
+        if drop_col in df.columns:
+            df = df.drop(drop_col,axis=1)
         return df
     
-    def map_vehicle_damage(self, df):
+    def split_features_and_target(self, df):
         """
-        Map 'Vehicle_Damage' column to binary values: No=0, Yes=1.
+        Split a frame into input features (id columns dropped) and target.
         """
-        logging.info("Mapping 'Vehicle_Damage' column to binary values: No=0, Yes=1")
-        df["Vehicle_Damage"] = df["Vehicle_Damage"].map({"No": 0, "Yes": 1}).astype(int)
-        logging.info("'Vehicle_Damage' column mapped successfully")
-        return df
+        input_feature_df = self.drop_id_columns(df.drop(columns=[TARGET_COLUMN],axis=1))
+        return input_feature_df, df[TARGET_COLUMN]
+
+    def get_rebalancer(self):
+        """
+        Create the rebalancer of the training set from the transformation config.
+        """
+        return Rebalancer(
+            strategy=self.data_transformation_config.rebalancing_strategy,
+            sampling_ratio=self.data_transformation_config.rebalancing_sampling_ratio,
+            n_jobs=self.data_transformation_config.rebalancing_n_jobs
+        )
+
+    def get_validation_split_ratio(self) -> float:
+        """
+        Returns the share of the training rows held out for validation, 0 when no stage uses them.
+        """
+        config = self.data_transformation_config
+        return config.validation_split_ratio if config.validation_split_enabled else 0.0
+
+    def split_validation_rows(self, labels):
+        """
+        Returns a boolean mask of the training rows held out for validation: the configured share of
+        every class, drawn with a fixed seed. The rows are held out before rebalancing, so validation
+        scores (hyperparameter search, forest compaction) never see synthetic or dropped rows.
+        """
+        labels = np.asarray(labels)
+        mask = np.zeros(len(labels), dtype=bool)
+        ratio = self.get_validation_split_ratio()
+        if ratio <= 0:
+            return mask
+        rng = np.random.default_rng(self.data_transformation_config.validation_random_state)
+        for label in np.unique(labels):
+            class_rows = np.flatnonzero(labels == label)
+            mask[rng.choice(class_rows, size=int(round(len(class_rows) * ratio)), replace=False)] = True
+        logging.info(f"Holding out {int(mask.sum())} of {len(labels)} training rows for validation")
+        return mask
+
+    def save_validation_rows(self, features, labels):
+        """
+        Saves the validation features and labels, returns their file paths (None, None without a split).
+        """
+        config = self.data_transformation_config
+        if len(labels) == 0:
+            return None, None
+        self.artifact_store.save_array(config.transformed_validation_file_path, np.ascontiguousarray(features, dtype=config.array_dtype))
+        self.artifact_store.save_array(config.transformed_validation_label_file_path, np.asarray(labels, dtype=config.label_dtype))
+        return config.transformed_validation_file_path, config.transformed_validation_label_file_path
+
+    def transform_in_memory(self, preprocessor):
+        """
+        Fit the preprocessor on the full training frame, transform train and test in memory,
+        hold out the validation rows, rebalance the rest of the training set and save the arrays.
+        Train and test are read and written concurrently, and the test set is transformed while
+        the training set is rebalanced.
+        Returns the class weights of the rebalancing and the validation file paths.
+        """
+        split_workers = self.data_transformation_config.split_workers
+        # Load train and test data, projecting only the feature and target columns
+        columns = self.get_required_columns()
+        train_df, test_df = self.artifact_store.run_concurrently([
+            lambda: self.artifact_store.read_dataframe(self.data_ingestion_artifact.trained_file_path,columns=columns),
+            lambda: self.artifact_store.read_dataframe(self.data_ingestion_artifact.test_file_path,columns=columns),
+        ], max_workers=split_workers)
+        logging.info("Tran and test loaded")
+
+        # Separate input features and target, dropping id columns; categorical encoding is part of the preprocessing pipeline
+        input_feature_train_df, target_feature_train_df = self.split_features_and_target(train_df)
+        input_feature_test_df, target_feature_test_df = self.split_features_and_target(test_df)
+        logging.info("Input and output both defined for train and test df")
+
+        # Transform train features, fitting the preprocessor unless it comes from the base model
+        if self.data_transformation_config.base_model_file_path:
+            input_feature_train_arr = preprocessor.transform(input_feature_train_df)
+        else:
+            input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
+
+        # Cast to the compact array dtype before rebalancing so synthetic rows are generated at that size
+        array_dtype = self.data_transformation_config.array_dtype
+        input_feature_train_arr = np.asarray(input_feature_train_arr, dtype=array_dtype)
+        target_feature_train_arr = target_feature_train_df.to_numpy()
+
+        # Hold out the validation rows before rebalancing so they keep the real class distribution
+        is_validation = self.split_validation_rows(target_feature_train_arr)
+        validation_paths = self.save_validation_rows(input_feature_train_arr[is_validation], target_feature_train_arr[is_validation])
+        input_feature_train_arr, target_feature_train_arr = input_feature_train_arr[~is_validation], target_feature_train_arr[~is_validation]
+
+        # Rebalance the training set only, the test set keeps the real class distribution; the fitted
+        # preprocessor transforms the test set meanwhile
+        (input_feature_train_final, target_feature_train_final, class_weight), input_feature_test_arr = self.artifact_store.run_concurrently([
+            lambda: self.get_rebalancer().fit_resample(input_feature_train_arr, target_feature_train_arr),
+            lambda: np.asarray(preprocessor.transform(input_feature_test_df), dtype=array_dtype),
+        ], max_workers=split_workers)
+        input_feature_test_final, target_feature_test_final = input_feature_test_arr, target_feature_test_df.to_numpy()
+        logging.info("Data transformation array created and rebalancing applied to train")
 
-    def map_vehicle_age(self, df):
-        """
-        Map 'Vehicle_Age' column to integer codes:
-        - "< 1 Year" -> 0
-        - "1-2 Year" -> 1
-        - "> 2 Years" -> 2
-        Handles both string and numeric input types.
-        """
-        logging.info("Mapping 'Vehicle_Age' column to integer codes")
-        if 'Vehicle_Age' in df.columns:
-            if df['Vehicle_Age'].dtype == 'object':
-                vehicle_age_mapping = {
-                    "< 1 Year": 0,
-                    "1-2 Year": 1,
-                    "> 2 Years": 2
-                }
-                df["Vehicle_Age"] = df["Vehicle_Age"].map(vehicle_age_mapping).astype(int)
-                logging.info("'Vehicle_Age' mapped from string to integer codes")
+        # Keep features and labels as separate contiguous arrays so they can be memory-mapped without slicing copies
+        label_dtype = self.data_transformation_config.label_dtype
+        train_features = np.ascontiguousarray(input_feature_train_final,dtype=array_dtype)
+        test_features = np.ascontiguousarray(input_feature_test_final,dtype=array_dtype)
+        train_labels = np.asarray(target_feature_train_final,dtype=label_dtype)
+        test_labels = np.asarray(target_feature_test_final,dtype=label_dtype)
+        logging.info(f"Feature tranformation done, train features {train_features.nbytes} bytes and test features {test_features.nbytes} bytes ({array_dtype})")
+
+        # Save transformed arrays
+        config = self.data_transformation_config
+        self.artifact_store.run_concurrently([
+            lambda: self.artifact_store.save_array(config.transformed_train_file_path,train_features),
+            lambda: self.artifact_store.save_array(config.transformed_test_file_path,test_features),
+            lambda: self.artifact_store.save_array(config.transformed_train_label_file_path,train_labels),
+            lambda: self.artifact_store.save_array(config.transformed_test_label_file_path,test_labels),
+        ], max_workers=split_workers)
+        return class_weight, validation_paths
+
+    def fit_preprocessor_in_chunks(self, preprocessor):
+        """
+        Fit the preprocessor over streamed chunks of the training data.
+        The pipeline is fitted on the first chunk, then every scaler of the column transformer keeps
+        accumulating its statistics with partial_fit over the remaining chunks. The result is the same
+        fitted pipeline as a fit on the full data, so MyModel uses it unchanged.
+        """
+        columns = self.get_required_columns()
+        chunk_size = self.data_transformation_config.chunk_size
+        n_rows = 0
+        for chunk in self.artifact_store.iter_dataframe_chunks(self.data_ingestion_artifact.trained_file_path, chunk_size, columns=columns):
+            input_feature_df, _ = self.split_features_and_target(chunk)
+            if n_rows == 0:
+                preprocessor.fit(input_feature_df)
             else:
-                df["Vehicle_Age"] = df["Vehicle_Age"].astype(int)
-                logging.info("'Vehicle_Age' column already numeric, converted to int type")
+                encoded_df = preprocessor.named_steps["encoder"].transform(input_feature_df)
+                for name, transformer, transformer_columns in preprocessor.named_steps["preprocessor"].transformers_:
+                    if hasattr(transformer, "partial_fit"):
+                        transformer.partial_fit(encoded_df[transformer_columns])
+            n_rows += len(chunk)
+        logging.info(f"Preprocessor fitted over {n_rows} training rows in chunks of {chunk_size}")
+        return preprocessor
+
+    def transform_in_chunks(self, preprocessor, input_file_path, features_file_path):
+        """
+        Transform a data artifact chunk by chunk into a memory-mapped features file.
+        Returns the labels (held in memory, one byte per row).
+        """
+        columns = self.get_required_columns()
+        chunk_size = self.data_transformation_config.chunk_size
+        n_rows = self.artifact_store.count_rows(input_file_path)
+        features, labels, position = None, [], 0
+        for chunk in self.artifact_store.iter_dataframe_chunks(input_file_path, chunk_size, columns=columns):
+            input_feature_df, target_feature = self.split_features_and_target(chunk)
+            transformed = preprocessor.transform(input_feature_df)
+            if features is None:
+                features = open_numpy_memmap(features_file_path, (n_rows, transformed.shape[1]), self.data_transformation_config.array_dtype)
+            features[position:position + len(transformed)] = transformed
+            labels.append(target_feature.to_numpy(dtype=self.data_transformation_config.label_dtype))
+            position += len(transformed)
+        if features is None:
+            raise ValueError(f"No rows to transform in {input_file_path}")
+        features.flush()
+        del features
+        self.artifact_store.record_disk_write(features_file_path)
+        return np.concatenate(labels)
+
+    def transform_out_of_core(self, preprocessor):
+        """
+        Fit the preprocessor with partial_fit over streamed chunks, then transform train and test
+        chunk by chunk into memory-mapped arrays, so data larger than RAM can be transformed.
+        Returns the class weights of the rebalancing and the validation file paths.
+
+        "none" and "class_weight" rebalancing keep the training rows as written when there is no validation
+        split; otherwise the rows left after the validation split are copied chunk by chunk, and the
+        resampling strategies need the resampled training set in memory.
+        """
+        config = self.data_transformation_config
+        if not config.base_model_file_path:
+            self.fit_preprocessor_in_chunks(preprocessor)
+
+        rebalancer = self.get_rebalancer()
+        keeps_rows = rebalancer.strategy in ("none", "class_weight") and self.get_validation_split_ratio() <= 0
+        # Training features that are split or resampled are written to their final path afterwards
+        train_features_file_path = config.transformed_train_file_path if keeps_rows else config.transformed_train_file_path.replace(".npy", "_unbalanced.npy")
+        # Train and test are transformed into their memory-mapped files concurrently
+        train_labels, test_labels = self.artifact_store.run_concurrently([
+            lambda: self.transform_in_chunks(preprocessor, self.data_ingestion_artifact.trained_file_path, train_features_file_path),
+            lambda: self.transform_in_chunks(preprocessor, self.data_ingestion_artifact.test_file_path, config.transformed_test_file_path),
+        ], max_workers=config.split_workers)
+        logging.info("Data transformation arrays written in chunks")
+
+        if keeps_rows:
+            _, train_labels, class_weight = rebalancer.fit_resample(self.artifact_store.load_array(train_features_file_path), train_labels)
+            validation_paths = (None, None)
         else:
-            logging.info("'Vehicle_Age' column not found, skipping mapping")
-        return df
+            # Hold out the validation rows before rebalancing so they keep the real class distribution
+            train_features = self.artifact_store.load_array(train_features_file_path)
+            is_validation = self.split_validation_rows(train_labels)
+            validation_paths = self.save_validation_rows(train_features[is_validation], train_labels[is_validation])
+            train_labels = train_labels[~is_validation]
+            if rebalancer.strategy in ("none", "class_weight"):
+                _, train_labels, class_weight = rebalancer.fit_resample(None, train_labels)
+                self.copy_rows_in_chunks(train_features, np.flatnonzero(~is_validation), config.transformed_train_file_path)
+            else:
+                train_features, train_labels, class_weight = rebalancer.fit_resample(train_features[~is_validation], train_labels)
+                self.artifact_store.save_array(config.transformed_train_file_path, np.ascontiguousarray(train_features, dtype=config.array_dtype))
+            del train_features
+            os.remove(train_features_file_path)
+        logging.info("Rebalancing applied to train")
 
-    
-    def drop_id_columns(self,df):
+        self.artifact_store.save_array(config.transformed_train_label_file_path, np.asarray(train_labels, dtype=config.label_dtype))
+        self.artifact_store.save_array(config.transformed_test_label_file_path, test_labels)
+        return class_weight, validation_paths
+
+    def copy_rows_in_chunks(self, features, rows, features_file_path):
         """
-        Drop ID or unwanted columns as specified in schema config.
+        Copies the given rows of a (memory-mapped) features array chunk by chunk into a new memory-mapped file.
         """
-        logging.info("Drop id column")
-        drop_col = self._schema_config["drop_columns"]
-        if drop_col in df.columns:
-            df = df.drop(drop_col,axis=1)
-        return df
-    
+        chunk_size = self.data_transformation_config.chunk_size
+        copied = open_numpy_memmap(features_file_path, (len(rows), features.shape[1]), self.data_transformation_config.array_dtype)
+        for start in range(0, len(rows), chunk_size):
+            copied[start:start + chunk_size] = features[rows[start:start + chunk_size]]
+        copied.flush()
+        del copied
+        self.artifact_store.record_disk_write(features_file_path)
+
     def initiate_data_transformation(self):
         """
         Main method to perform data transformation:
-        - Reads data
-        - Applies custom transformations
-        - Applies preprocessing pipeline
-        - Applies SMOTEENN for balancing
+        - Reads data, in memory or in chunks ("out_of_core" mode)
+        - Drops id columns
+        - Applies preprocessing pipeline (categorical encoding and scaling)
+        - Holds out validation rows, then rebalances the rest of the training set with the configured strategy
         - Saves transformed objects and arrays
         - Returns DataTransformationArtifact
         """
@@ -145,58 +340,23 @@ class DataTransformation:
             # Check validation status before proceeding
             if not self.data_validation_artifact.validation_status:
                 raise Exception(self.data_validation_artifact.message)
-            
-            # Load transformed train and test data
-            train_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
-            test_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.test_file_path)
-            logging.info("Tran and test loaded")
-
-            # Separate input features and target for train and test
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN],axis=1)
-            target_feature_train_df = train_df[TARGET_COLUMN]
-
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN],axis=1)
-            target_feature_test_df = test_df[TARGET_COLUMN]
-            logging.info("Input and output both defined for train and test df")
-
-            # Apply custom transformations to train data
-            input_feature_train_df = self.map_gender_column(input_feature_train_df)
-            input_feature_train_df = self.drop_id_columns(input_feature_train_df)
-            input_feature_train_df = self.map_vehicle_age(input_feature_train_df)
-            input_feature_train_df = self.map_vehicle_damage(input_feature_train_df)
-
-            # Apply custom transformations to test data
-            input_feature_test_df = self.map_gender_column(input_feature_test_df)
-            input_feature_test_df = self.drop_id_columns(input_feature_test_df)
-            input_feature_test_df = self.map_vehicle_age(input_feature_test_df)
-            input_feature_test_df = self.map_vehicle_damage(input_feature_test_df)
-            logging.info("Custom transformation applied")
-
-            # Get preprocessing pipeline
-            preprocessor = self.get_data_transformer_object()
-            logging.info("Got the preprocessor object")
-
-            # Transform train and test features
-            input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessor.transform(input_feature_test_df)
-            logging.info("Data transformation array created")
 
-            # Apply SMOTEENN for balancing classes
-            smt = SMOTEENN(sampling_strategy="minority")
-
-            input_feature_train_final, target_feature_train_final = smt.fit_resample(input_feature_train_arr,target_feature_train_df)
-            input_feature_test_final, target_feature_test_final = smt.fit_resample(input_feature_test_arr,target_feature_test_df)
-            logging.info("SMOTEEN applied to both test and train")
+            # Get preprocessing pipeline; incremental training reuses the fitted one of the base model so new
+            # trees are fit in the same feature space as the trees they are added to
+            if self.data_transformation_config.base_model_file_path:
+                preprocessor = load_object(self.data_transformation_config.base_model_file_path).preprocessing_obj
+                logging.info(f"Reusing the preprocessor of {self.data_transformation_config.base_model_file_path}")
+            else:
+                preprocessor = self.get_data_transformer_object()
+            logging.info("Got the preprocessor object")
 
-            # Concatenate features and targets for saving
-            train_arr = np.c_[input_feature_train_final,np.array(target_feature_train_final)]
-            test_arr = np.c_[input_feature_test_final,np.array(target_feature_test_final)]
-            logging.info("Feature tranformation done")
+            if self.data_transformation_config.transformation_mode == "out_of_core":
+                class_weight, validation_paths = self.transform_out_of_core(preprocessor)
+            else:
+                class_weight, validation_paths = self.transform_in_memory(preprocessor)
 
-            # Save preprocessor and transformed arrays
-            save_object(self.data_transformation_config.transformed_object_file_path,preprocessor)
-            save_numpy_data(self.data_transformation_config.transformed_train_file_path,train_arr)
-            save_numpy_data(self.data_transformation_config.transformed_test_file_path,test_arr)
+            # Save preprocessor
+            self.artifact_store.save_object(self.data_transformation_config.transformed_object_file_path,preprocessor)
             logging.info("Saving objects")
 
             logging.info("Data Transformation completed")
@@ -205,7 +365,12 @@ class DataTransformation:
             return DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path= self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path= self.data_transformation_config.transformed_test_file_path
+                transformed_test_file_path= self.data_transformation_config.transformed_test_file_path,
+                transformed_train_label_file_path=self.data_transformation_config.transformed_train_label_file_path,
+                transformed_test_label_file_path=self.data_transformation_config.transformed_test_label_file_path,
+                class_weight=class_weight,
+                transformed_validation_file_path=validation_paths[0],
+                transformed_validation_label_file_path=validation_paths[1]
             )
         
         except Exception as e:
@@ -2,6 +2,7 @@ import json
 import sys
 import os
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 from src.exception import MyException
 from src.logger import logging
@@ -9,115 +10,145 @@ from src.entity.artifact_entity import DataValidationArtifact, DataIngestionArti
 from src.entity.config_entity import DataValidationConfig
 from src.constants import SCHEMA_FILE_PATH
 
-from src.utils.main_utils import read_yaml
+from src.data_access.artifact_store import ArtifactStore
+from src.utils.main_utils import read_yaml, read_dataframe, get_previous_run_file_path, replace_file
+from src.utils.schema_validator import SchemaValidator
+from src.utils.column_profile import DataProfile, compare_profiles
 
 class DataValidation:
-    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_config: DataValidationConfig):
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_config: DataValidationConfig, artifact_store: ArtifactStore = None):
         """
-        Initialize DataValidation with ingestion artifact and validation config.
+        Initialize DataValidation with ingestion artifact, validation config and artifact store.
         Loads schema configuration from YAML file.
         """
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
+            self.artifact_store = artifact_store or ArtifactStore()
             self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
+            # Compile the schema once into vectorized per-column checks
+            self.schema_validator = SchemaValidator(self._schema_config)
         except Exception as e:
             raise MyException(e, sys)
         
-    def validate_number_of_columns(self, dataframe):
+    def validate_file(self, file_path: str):
         """
-        Validate if the number of columns in the dataframe matches the schema.
+        Validates one ingestion artifact chunk by chunk against the compiled schema rules and profiles it
+        in the same pass: every chunk is sketched on a worker thread and the sketches are merged into one profile.
+        In "early_abort" mode validation stops at the first failing chunk and no profile is returned.
+
+        Returns:
+            tuple: Validation result (dict) and DataProfile of the file (None when aborted).
         """
         try:
-            status = len(dataframe.columns) == len(self._schema_config["columns"])
-            logging.info(f"Is number of required columns present: [{status}]")
-            return status
+            early_abort = self.data_validation_config.validation_mode == "early_abort"
+            workers = self.data_validation_config.profile_workers
+            profile = DataProfile.from_schema(self._schema_config)
+            pending = []
+
+            def profiled_chunks(executor):
+                for chunk in self.artifact_store.iter_dataframe_chunks(file_path, self.data_validation_config.chunk_size):
+                    pending.append(executor.submit(DataProfile.from_schema(self._schema_config).update, chunk))
+                    # Merge finished sketches as we go so at most `workers` chunks are held at once
+                    while len(pending) > workers:
+                        profile.merge(pending.pop(0).result())
+                    yield chunk
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                result = self.schema_validator.validate(profiled_chunks(executor), early_abort=early_abort)
+                for future in pending:
+                    profile.merge(future.result())
+            logging.info(f"Validated {result['rows']} rows of {file_path}: {result['failures'] or 'no violations'}")
+            return result, None if result["aborted"] else profile
         except Exception as e:
             raise MyException(e, sys)
-        
-    def is_columns_exists(self, df):
+
+    def get_previous_profile_path(self):
         """
-        Check if all required numerical and categorical columns exist in the dataframe.
-        Logs missing columns if any.
+        Returns the column profile file of the most recent earlier pipeline run, None if there is none.
         """
         try:
-            dataframe_columns = df.columns
-            missing_numerical_columns = []
-            missing_categorical_columns = []
-
-            # Check for missing numerical columns
-            for column in self._schema_config["numerical_columns"]:
-                if column not in dataframe_columns:
-                    missing_numerical_columns.append(column)
-
-            if len(missing_numerical_columns) > 0:
-                logging.info(f"Missing numerical columns: {missing_numerical_columns}")
-
-            # Check for missing categorical columns
-            for column in self._schema_config["categorical_columns"]:
-                if column not in dataframe_columns:
-                    missing_categorical_columns.append(column)
-
-            if len(missing_categorical_columns) > 0:
-                logging.info(f"Missing categorical columns: {missing_categorical_columns}")
+            return get_previous_run_file_path(self.data_validation_config.profile_file_path)
+        except Exception as e:
+            raise MyException(e, sys)
 
-            # Return True if no columns are missing, else False
-            return False if len(missing_numerical_columns) > 0 or len(missing_categorical_columns) > 0 else True
-        
+    def detect_drift(self, profiles: dict) -> dict:
+        """
+        Compares the column profiles of this run with the previous run's (PSI and KS per column).
+        """
+        try:
+            previous_profile_path = self.get_previous_profile_path()
+            if previous_profile_path is None:
+                logging.info("No previous column profile found, skipping drift detection")
+                return {}
+            with open(previous_profile_path) as profile_file:
+                previous_profiles = json.load(profile_file)
+            logging.info(f"Comparing column profiles with {previous_profile_path}")
+            drift = {"previous_profile_file_path": previous_profile_path, "splits": {}}
+            for split_name, profile in profiles.items():
+                if split_name not in previous_profiles:
+                    continue
+                columns = compare_profiles(profile, previous_profiles[split_name])
+                drifted = [column_name for column_name, statistics in columns.items()
+                           if statistics["psi"] is not None and statistics["psi"] > self.data_validation_config.drift_psi_threshold]
+                drift["splits"][split_name] = {"drifted_columns": drifted, "columns": columns}
+            return drift
         except Exception as e:
             raise MyException(e, sys)
         
     @staticmethod
-    def read_data(file_path):
+    def read_data(file_path, columns=None):
         """
-        Read CSV data from the given file path and return as a DataFrame.
+        Read a data artifact (csv, parquet or Arrow IPC) from the given file path and return as a DataFrame.
+        Only the given columns are read when columns is set.
         """
         try:
-            return pd.read_csv(file_path)
+            return read_dataframe(file_path, columns=columns)
         except Exception as e:
             raise MyException(e, sys)
         
     def initiate_data_validation(self):
         """
         Perform data validation on train and test datasets.
-        Checks for correct number of columns and required columns.
+        Checks columns, dtypes, categorical levels, value ranges and null rates.
         Writes validation report to file and returns DataValidationArtifact.
         """
         try:
             validation_error_msg = ""
             logging.info("Starting data Validation")
 
-            # Read train and test data
-            train_df = DataValidation.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
-            test_df = DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path)
-
-            # Validate number of columns in train data
-            status = self.validate_number_of_columns(dataframe=train_df)
-            if not status:
-                validation_error_msg += "Columns are missing in training dataframe"
-            else:
-                logging.info("All required columns present in training dataframe")
-
-            # Validate number of columns in test data
-            status = self.validate_number_of_columns(dataframe=test_df)
-            if not status:
-                validation_error_msg += "Columns are missing in testing dataframe"
-            else:
-                logging.info("All required columns present in testing dataframe")
-
-            # Validate required columns in train data
-            status = self.is_columns_exists(df=train_df)
-            if not status:
-                validation_error_msg += "Columns are missing in training dataframe"
-            else:
-                logging.info("All required columns present in training dataframe")
-
-            # Validate required columns in test data
-            status = self.is_columns_exists(df=test_df)
-            if not status:
-                validation_error_msg += "Columns are missing in testing dataframe"
+            # Validate train and test data in one vectorized pass per chunk (served from memory when ingestion ran in the same process).
+            # The files are independent, so "full" mode validates them concurrently; "early_abort" keeps the
+            # order so the test file is skipped once the train file fails
+            file_results = {}
+            profiles = {}
+            splits = (("train", self.data_ingestion_artifact.trained_file_path),
+                      ("test", self.data_ingestion_artifact.test_file_path))
+            if self.data_validation_config.validation_mode == "early_abort":
+                split_results = (self.validate_file(file_path) for _, file_path in splits)
             else:
-                logging.info("All required columns present in testing dataframe")
+                split_results = self.artifact_store.run_concurrently(
+                    [lambda file_path=file_path: self.validate_file(file_path) for _, file_path in splits],
+                    max_workers=self.data_validation_config.split_workers
+                )
+            for (split_name, _), (file_results[split_name], profile) in zip(splits, split_results):
+                if profile is not None:
+                    profiles[split_name] = profile.to_dict()
+                if not file_results[split_name]["valid"]:
+                    validation_error_msg += f"{split_name} data: {'; '.join(file_results[split_name]['failures'])}. "
+                    if self.data_validation_config.validation_mode == "early_abort":
+                        break
+
+            # Compare the distributions with the previous run, then persist this run's profile for the next one
+            drift = self.detect_drift(profiles) if len(profiles) == 2 else {}
+            for split_name, split_drift in drift.get("splits", {}).items():
+                if split_drift["drifted_columns"]:
+                    logging.info(f"Drift detected in {split_name} data: {split_drift['drifted_columns']}")
+                    if self.data_validation_config.fail_on_drift:
+                        validation_error_msg += f"{split_name} data drifted: {split_drift['drifted_columns']}. "
+            if len(profiles) == 2:
+                with replace_file(self.data_validation_config.profile_file_path) as tmp_path, open(tmp_path, "w") as profile_file:
+                    json.dump(profiles, profile_file)
 
             # Determine overall validation status
             validation_status = len(validation_error_msg) == 0
@@ -136,11 +167,16 @@ class DataValidation:
             # Prepare validation report
             validation_report = {
                 "validation_status": validation_status,
-                "message": validation_error_msg.strip()
+                "message": validation_error_msg.strip(),
+                "validation_mode": self.data_validation_config.validation_mode,
+                # Per-column null and violation counts of each file
+                "files": file_results,
+                # PSI/KS of every column against the previous run's profile
+                "drift": drift
             }
 
             # Write validation report to file
-            with open(self.data_validation_config.validation_report_file_path, "w") as report_file:
+            with replace_file(self.data_validation_config.validation_report_file_path) as tmp_path, open(tmp_path, "w") as report_file:
                 json.dump(validation_report, report_file, indent=4) 
 
             logging.info("Data validation artifact created and saved")
@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from src.components.metrics_engine import ConfusionMatrixAccumulator, MetricsEngine
+from src.data_access.artifact_store import ArtifactStore
+from src.entity.categorical_encoder import CategoricalEncoder
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import get_file_digest
+
+
+class ChampionPredictionCache:
+    """
+    Predictions of the production model on a test set, kept across runs.
+
+    Entries are keyed by the model version (S3 ETag) and the test set content, so they are
+    reused until either the production model is replaced or the test data changes.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int):
+        """
+        Args:
+            cache_dir (str): Directory holding the cached prediction files.
+            max_entries (int): Files kept, least recently used removed first.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(model_uri: str, model_version: str, test_fingerprint: str) -> str:
+        """
+        Returns the cache key of a model version scored on a test set.
+        """
+        return hashlib.blake2b(f"{model_uri}|{model_version}|{test_fingerprint}".encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key: str):
+        """
+        Returns the cached predictions (memory-mapped), or None.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        # Mark as recently used
+        os.utime(path)
+        return np.load(path, mmap_mode="r")
+
+    def put(self, key: str, predictions: np.ndarray):
+        """
+        Stores the predictions atomically, then removes the least recently used files beyond max_entries.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as file_obj:
+                np.save(file_obj, predictions)
+            os.replace(tmp_path, self._path(key))
+            entries = sorted((os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".npy")),
+                             key=os.path.getmtime, reverse=True)
+            for path in entries[self.max_entries:]:
+                os.remove(path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+
+class EvaluationEngine:
+    """
+    Scores the newly trained model (challenger) and the production model (champion) on the test set.
+
+    Both models are scored chunk by chunk into streaming confusion matrices, so memory stays
+    bounded by the chunk size, and concurrently, so the champion download and scoring overlap
+    the challenger scoring. The challenger scores the transformed test arrays; the champion
+    scores the raw test data through its own preprocessor, and its predictions are cached by
+    model version and test set fingerprint. A champion whose preprocessor has no categorical
+    encoder (trained before the encoder joined the pipeline) gets the rows encoded beforehand
+    with the schema mappings, as its training data was; a champion that still cannot score the
+    rows is reported as unscorable instead of failing the evaluation.
+    """
+
+    def __init__(self, chunk_size: int, prediction_cache: ChampionPredictionCache, artifact_store: ArtifactStore = None,
+                 categorical_mappings: dict = None):
+        """
+        Args:
+            chunk_size (int): Test rows scored at once by each model.
+            prediction_cache (ChampionPredictionCache): Cache of the champion predictions.
+            artifact_store (ArtifactStore, optional): Store the test data is read from.
+            categorical_mappings (dict, optional): Schema categorical_mappings, encoding the rows of champions without an encoder.
+        """
+        self.categorical_mappings = categorical_mappings or {}
+        self.chunk_size = chunk_size
+        self.metrics_engine = MetricsEngine(chunk_size=chunk_size)
+        self.prediction_cache = prediction_cache
+        self.artifact_store = artifact_store or ArtifactStore()
+
+    def score_challenger(self, model, X_test, y_test) -> dict:
+        """
+        Scores a fitted model on the transformed test features, chunk by chunk.
+        """
+        try:
+            metrics, elapsed_s = self.metrics_engine.score(model, X_test, y_test)
+            return {**metrics, "score_time_s": round(elapsed_s, 3), "cached": False}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_champion_key(self, estimator, test_file_path: str) -> str:
+        """
+        Returns the prediction cache key of the production model version on the test data.
+        """
+        return self.prediction_cache.make_key(f"{estimator.bucket_name}/{estimator.model_path}",
+                                              estimator.get_model_version(), get_file_digest(test_file_path))
+
+    def prefetch_champion(self, estimator, test_file_path: str):
+        """
+        Downloads the production model ahead of scoring (e.g. while the challenger trains), unless
+        its predictions on the test data are cached and the download is not needed.
+        """
+        try:
+            if self.prediction_cache.get(self.get_champion_key(estimator, test_file_path)) is not None:
+                logging.info("Production model predictions are cached, model download skipped")
+            elif estimator.loaded_model is None:
+                estimator.loaded_model = estimator.load_model()
+            return estimator
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_champion_encoder(self, model):
+        """
+        Returns an encoder of the categorical columns for a production model whose preprocessor does
+        not encode them itself, None when it does.
+        """
+        preprocessor = model.preprocessing_obj
+        if isinstance(preprocessor, Pipeline) and any(isinstance(step, CategoricalEncoder) for _, step in preprocessor.steps):
+            return None
+        logging.warning("Production model preprocessor has no categorical encoder, its test rows are encoded with the schema mappings")
+        return CategoricalEncoder(self.categorical_mappings)
+
+    @staticmethod
+    def get_missing_champion_columns(model, feature_columns: list) -> list:
+        """
+        Returns the input columns the production model preprocessor was fitted on that the test data lacks.
+        """
+        expected_columns = getattr(model.preprocessing_obj, "feature_names_in_", None)
+        return [] if expected_columns is None else [column for column in expected_columns if column not in feature_columns]
+
+    def score_champion(self, estimator, test_file_path: str, feature_columns: list, y_test) -> dict:
+        """
+        Scores the production model on the raw test data, chunk by chunk, through its own preprocessor.
+        Cached predictions of the same model version on the same test data are reused without
+        downloading the model.
+        Returns {"unscorable": True, ...} when the production model expects input columns the test data
+        lacks (see get_missing_champion_columns); any other failure is raised.
+        """
+        try:
+            start = time.perf_counter()
+            key = self.get_champion_key(estimator, test_file_path)
+            accumulator = ConfusionMatrixAccumulator()
+            predictions = self.prediction_cache.get(key)
+            cached = predictions is not None and len(predictions) == len(y_test)
+            if cached:
+                logging.info(f"Production model predictions reused from the prediction cache ({key})")
+                for begin in range(0, len(y_test), self.chunk_size):
+                    end = begin + self.chunk_size
+                    accumulator.update(y_test[begin:end], predictions[begin:end])
+            else:
+                if estimator.loaded_model is None:
+                    estimator.loaded_model = estimator.load_model()
+                missing_columns = self.get_missing_champion_columns(estimator.loaded_model, feature_columns)
+                if missing_columns:
+                    logging.warning(f"Production model expects columns missing from the test data {missing_columns}, it cannot be scored")
+                    return {"unscorable": True, "missing_columns": missing_columns}
+                encoder = self.get_champion_encoder(estimator.loaded_model)
+                predictions, position = np.empty(len(y_test), dtype=np.int8), 0
+                for chunk in self.artifact_store.iter_dataframe_chunks(test_file_path, self.chunk_size, columns=feature_columns):
+                    if encoder is not None:
+                        chunk = encoder.fit(chunk).transform(chunk)
+                    end = position + len(chunk)
+                    predictions[position:end] = estimator.predict(chunk)
+                    accumulator.update(y_test[position:end], predictions[position:end])
+                    position = end
+                self.prediction_cache.put(key, predictions)
+            return {**accumulator.metrics(), "score_time_s": round(time.perf_counter() - start, 3), "cached": cached}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def evaluate(self, challenger_model, X_test, y_test, champion=None, test_file_path: str = None, feature_columns: list = None) -> tuple:
+        """
+        Scores the challenger and, when given, the champion concurrently.
+        Returns the challenger metrics and the champion metrics (None without a champion).
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                challenger_future = executor.submit(self.score_challenger, challenger_model, X_test, y_test)
+                champion_future = executor.submit(self.score_champion, champion, test_file_path, feature_columns, y_test) \
+                    if champion is not None else None
+                challenger_metrics = challenger_future.result()
+                champion_metrics = champion_future.result() if champion_future is not None else None
+            logging.info(f"Challenger metrics: {challenger_metrics}, champion metrics: {champion_metrics}")
+            return challenger_metrics, champion_metrics
+        except Exception as e:
+            raise MyException(e, sys)
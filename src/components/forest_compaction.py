@@ -0,0 +1,133 @@
+import sys
+import json
+import time
+
+import dill
+import numpy as np
+
+from src.components.metrics_engine import ConfusionMatrixAccumulator
+from src.constants import (MODEL_TRAINER_COMPACTION_MAX_F1_LOSS, MODEL_TRAINER_COMPACTION_MIN_TREES,
+                           MODEL_TRAINER_COMPACTION_VALIDATION_FRACTION, MODEL_TRAINER_COMPACTION_THRESHOLD_DTYPE,
+                           MODEL_TRAINER_COMPACTION_LEAF_DTYPE)
+from src.entity.compact_forest import CompactForest
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import replace_file
+
+# Single-row predictions timed for the latency report
+LATENCY_REPEATS = 20
+
+
+def f1_of(y_true, y_pred) -> float:
+    return ConfusionMatrixAccumulator().update(y_true, y_pred).metrics()["f1_score"]
+
+
+class ForestCompactor:
+    """
+    Post-training compaction of a random forest into a CompactForest.
+
+    The validation rows (held out of training, never the test set) are split into ranking rows, on
+    which trees are ranked by their contribution to F1 (the F1 lost when the tree is left out of the
+    forest) and the fewest top-ranked trees within max_f1_loss of the full forest are kept, and guard
+    rows, on which the compact forest (reduced-precision thresholds and leaf values) must also stay
+    within max_f1_loss of the full forest, otherwise the compaction is rejected and the forest is kept.
+    """
+
+    def __init__(self, compaction_config: dict):
+        """
+        Args:
+            compaction_config (dict): compaction section of config/model.yaml.
+        """
+        self.max_f1_loss = compaction_config.get("max_f1_loss", MODEL_TRAINER_COMPACTION_MAX_F1_LOSS)
+        self.min_trees = compaction_config.get("min_trees", MODEL_TRAINER_COMPACTION_MIN_TREES)
+        self.validation_fraction = compaction_config.get("validation_fraction", MODEL_TRAINER_COMPACTION_VALIDATION_FRACTION)
+        self.threshold_dtype = compaction_config.get("threshold_dtype", MODEL_TRAINER_COMPACTION_THRESHOLD_DTYPE)
+        self.leaf_dtype = compaction_config.get("leaf_dtype", MODEL_TRAINER_COMPACTION_LEAF_DTYPE)
+        self.report = {}
+
+    def rank_trees(self, forest, X_ranking, y_ranking) -> tuple:
+        """
+        Returns the tree indices ordered by F1 contribution and the ranking F1 of every prefix
+        of that order (prefix_f1[k - 1] is the F1 of the top k trees).
+        """
+        # Positive-class probability of every tree on the ranking rows
+        probabilities = np.column_stack([tree.predict_proba(X_ranking)[:, 1] for tree in forest.estimators_]).astype(np.float32)
+        n_trees = probabilities.shape[1]
+        total = probabilities.sum(axis=1)
+        full_f1 = f1_of(y_ranking, total > 0.5 * n_trees)
+        contributions = np.array([full_f1 - f1_of(y_ranking, total - probabilities[:, tree] > 0.5 * (n_trees - 1))
+                                  for tree in range(n_trees)])
+        order = np.argsort(-contributions, kind="stable")
+        cumulative = np.cumsum(probabilities[:, order], axis=1)
+        prefix_f1 = np.array([f1_of(y_ranking, cumulative[:, k - 1] > 0.5 * k) for k in range(1, n_trees + 1)])
+        return order, prefix_f1
+
+    @staticmethod
+    def measure(model, X) -> dict:
+        """
+        Returns the pickled size, load time, batch and single-row prediction latency of a model.
+        """
+        payload = dill.dumps(model)
+        start = time.perf_counter()
+        dill.loads(payload)
+        load_time_s = time.perf_counter() - start
+        start = time.perf_counter()
+        model.predict(X)
+        batch_time_s = time.perf_counter() - start
+        row_times = []
+        for row in range(min(LATENCY_REPEATS, len(X))):
+            start = time.perf_counter()
+            model.predict(X[row:row + 1])
+            row_times.append(time.perf_counter() - start)
+        return {"size_mb": round(len(payload) / 1024 ** 2, 3), "load_time_ms": round(load_time_s * 1000, 3),
+                "batch_predict_ms": round(batch_time_s * 1000, 3), "row_predict_ms": round(float(np.median(row_times)) * 1000, 3)}
+
+    def compact(self, forest, X_validation, y_validation) -> tuple:
+        """
+        Compacts a fitted binary forest using validation rows held out of its training data; the
+        test set is kept out so the test metrics of the compacted model stay unbiased.
+        Returns the compact forest, or the original forest when the accuracy guard rejects it, and the report.
+        """
+        try:
+            rows = np.random.default_rng(0).permutation(len(y_validation))
+            n_ranking = int(len(rows) * self.validation_fraction)
+            ranking_rows, guard_rows = np.sort(rows[:n_ranking]), np.sort(rows[n_ranking:])
+            X_ranking, y_ranking = np.asarray(X_validation[ranking_rows], dtype=np.float32), np.asarray(y_validation[ranking_rows])
+            X_guard, y_guard = np.asarray(X_validation[guard_rows], dtype=np.float32), np.asarray(y_validation[guard_rows])
+
+            order, prefix_f1 = self.rank_trees(forest, X_ranking, y_ranking)
+            n_trees = len(order)
+            min_trees = min(self.min_trees, n_trees)
+            within_loss = np.flatnonzero(prefix_f1[min_trees - 1:] >= prefix_f1[-1] - self.max_f1_loss)
+            n_kept = min_trees + int(within_loss[0]) if len(within_loss) else n_trees
+            compact = CompactForest([forest.estimators_[tree] for tree in order[:n_kept]], forest.classes_, forest.n_features_in_,
+                                    threshold_dtype=self.threshold_dtype, leaf_dtype=self.leaf_dtype)
+
+            forest_f1, compact_f1 = f1_of(y_guard, forest.predict(X_guard)), f1_of(y_guard, compact.predict(X_guard))
+            accepted = forest_f1 - compact_f1 <= self.max_f1_loss
+            before, after = self.measure(forest, X_guard), self.measure(compact, X_guard)
+            self.report = {
+                "accepted": bool(accepted),
+                "max_f1_loss": self.max_f1_loss,
+                "trees_before": n_trees, "trees_after": n_kept,
+                "threshold_dtype": self.threshold_dtype, "leaf_dtype": self.leaf_dtype,
+                "ranking_rows": len(ranking_rows), "guard_rows": len(guard_rows),
+                "f1_before": forest_f1, "f1_after": compact_f1,
+                "before": before, "after": after,
+                "savings": {name: round(1 - after[name] / before[name], 3) if before[name] else None for name in before},
+            }
+            logging.info(f"Forest compaction {'accepted' if accepted else 'rejected'}: {n_trees} -> {n_kept} trees, "
+                         f"F1 {forest_f1:.4f} -> {compact_f1:.4f}, size {before['size_mb']} -> {after['size_mb']} MB")
+            return (compact if accepted else forest), self.report
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def save_report(self, file_path: str):
+        """
+        Writes the compaction report (trees kept, F1, size, load time and latency before and after) to a JSON file.
+        """
+        try:
+            with replace_file(file_path) as tmp_path, open(tmp_path, "w") as report_file:
+                json.dump(self.report, report_file, indent=4)
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import math
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+from joblib import effective_n_jobs
+from sklearn.metrics import f1_score
+from threadpoolctl import threadpool_limits
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from src.constants import (MODEL_TRAINER_SEARCH_METHOD, MODEL_TRAINER_SEARCH_N_CANDIDATES, MODEL_TRAINER_SEARCH_ETA,
+                           MODEL_TRAINER_SEARCH_MIN_SAMPLES, MODEL_TRAINER_SEARCH_MAX_SAMPLES,
+                           MODEL_TRAINER_SEARCH_MAX_WORKERS, MODEL_TRAINER_SEARCH_RANDOM_STATE)
+from src.components.model_factory import ModelFactory
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import check_choice, replace_file
+
+# Search methods accepted in the search section of config/model.yaml
+SEARCH_METHODS = ["successive_halving", "hyperband"]
+
+
+def evaluate_candidate(features_file_path: str, labels_file_path: str, rows_file_path: str, n_samples: int,
+                       validation_features_file_path: str, validation_labels_file_path: str,
+                       estimator: str, params: dict, class_weight: dict) -> dict:
+    """
+    Fits a model with the candidate parameters on the first n_samples rows of the shuffled row order
+    and scores it on the validation rows. Runs in a worker process; the features, labels and
+    row order are memory-mapped, so all workers share the same pages.
+    """
+    X = np.load(features_file_path, mmap_mode="r")
+    y = np.load(labels_file_path, mmap_mode="r")
+    rows = np.load(rows_file_path, mmap_mode="r")
+    X_validation = np.load(validation_features_file_path, mmap_mode="r")
+    y_validation = np.load(validation_labels_file_path, mmap_mode="r")
+    # Sorted rows read the mapped files sequentially
+    train_rows = np.sort(rows[:n_samples])
+    model = ModelFactory(estimator).build(params, class_weight=class_weight, n_jobs=1)
+    # One core per worker, the pool provides the parallelism
+    with threadpool_limits(limits=1, user_api="openmp"):
+        start = time.perf_counter()
+        model.fit(X[train_rows], y[train_rows])
+        fit_time_s = time.perf_counter() - start
+        start = time.perf_counter()
+        y_pred = model.predict(X_validation)
+        predict_time_s = time.perf_counter() - start
+    return {"f1_score": float(f1_score(y_validation, y_pred)),
+            "fit_time_s": round(fit_time_s, 3), "predict_time_s": round(predict_time_s, 3)}
+
+
+class HyperparameterSearch:
+    """
+    Searches the parameters of the model factory estimator with successive halving.
+
+    Candidates are sampled from the search space of config/model.yaml. In every rung all remaining
+    candidates are fit concurrently in worker processes on a subset of the training rows and scored
+    (F1) on the validation rows held out by the transformation stage before rebalancing; the best 1/eta go on to the next rung with eta times more rows.
+    "hyperband" runs several such brackets, trading more candidates for smaller first budgets.
+    Every trial is recorded in a leaderboard.
+    """
+
+    def __init__(self, search_config: dict, base_params: dict, estimator: str = "random_forest"):
+        """
+        Args:
+            search_config (dict): search section of config/model.yaml.
+            base_params (dict): Model parameters used for the parameters outside the search space.
+            estimator (str): Model factory estimator whose parameters are searched.
+        """
+        self.estimator = estimator
+        self.method = search_config.get("method", MODEL_TRAINER_SEARCH_METHOD)
+        check_choice("search method", self.method, SEARCH_METHODS)
+        self.space = {name: list(values) for name, values in (search_config.get("space") or {}).items()}
+        self.n_candidates = search_config.get("n_candidates", MODEL_TRAINER_SEARCH_N_CANDIDATES)
+        self.eta = search_config.get("eta", MODEL_TRAINER_SEARCH_ETA)
+        self.min_samples = search_config.get("min_samples", MODEL_TRAINER_SEARCH_MIN_SAMPLES)
+        self.max_samples = search_config.get("max_samples", MODEL_TRAINER_SEARCH_MAX_SAMPLES)
+        self.max_workers = effective_n_jobs(search_config.get("max_workers", MODEL_TRAINER_SEARCH_MAX_WORKERS))
+        self.random_state = search_config.get("random_state", MODEL_TRAINER_SEARCH_RANDOM_STATE)
+        self.base_params = base_params
+        self.trials = []
+        self._n_sampled = 0
+
+    def sample_candidates(self, n_candidates: int) -> list:
+        """
+        Returns up to n_candidates distinct parameter sets: the base parameters overridden by values of the space.
+        """
+        grid_size = len(ParameterGrid(self.space)) if self.space else 1
+        sampled = ParameterSampler(self.space, n_iter=min(n_candidates, grid_size),
+                                   random_state=self.random_state + self._n_sampled) if self.space else [{}]
+        self._n_sampled += 1
+        return [{**self.base_params, **params} for params in sampled]
+
+    def _run_rung(self, executor, data: dict, candidates: list, n_samples: int, bracket: int, rung: int) -> list:
+        # Fit every candidate of the rung concurrently and record the trials
+        futures = [executor.submit(evaluate_candidate, data["features"], data["labels"], data["rows"], n_samples,
+                                   data["validation_features"], data["validation_labels"], self.estimator, params, data["class_weight"]) for params in candidates]
+        results = []
+        for params, future in zip(candidates, futures):
+            trial = {"trial": len(self.trials), "bracket": bracket, "rung": rung, "n_samples": n_samples,
+                     "params": params, **future.result()}
+            self.trials.append(trial)
+            results.append(trial)
+        logging.info(f"Bracket {bracket} rung {rung}: {len(candidates)} candidates on {n_samples} rows, "
+                     f"best F1 {max(trial['f1_score'] for trial in results):.4f}")
+        return results
+
+    def successive_halving(self, executor, data: dict, candidates: list, n_samples: int, max_samples: int, bracket: int) -> dict:
+        """
+        Runs one bracket: keeps the best 1/eta candidates of every rung until one is left or all rows are used.
+        Returns the best trial of the last rung.
+        """
+        rung = 0
+        while True:
+            results = sorted(self._run_rung(executor, data, candidates, n_samples, bracket, rung),
+                             key=lambda trial: trial["f1_score"], reverse=True)
+            if len(results) == 1 or n_samples >= max_samples:
+                return results[0]
+            candidates = [trial["params"] for trial in results[:max(1, len(results) // self.eta)]]
+            n_samples = min(n_samples * self.eta, max_samples)
+            rung += 1
+
+    def run(self, features_file_path: str, labels_file_path: str, validation_features_file_path: str,
+            validation_labels_file_path: str, class_weight: dict = None) -> dict:
+        """
+        Runs the search on the training arrays and returns the best parameters.
+
+        Args:
+            features_file_path (str): .npy file of the (rebalanced) training features.
+            labels_file_path (str): .npy file of the training labels.
+            validation_features_file_path (str): .npy file of the validation features, held out before rebalancing.
+            validation_labels_file_path (str): .npy file of the validation labels.
+            class_weight (dict, optional): Class weights of the forest ("class_weight" rebalancing).
+        """
+        try:
+            if not validation_features_file_path or not validation_labels_file_path:
+                raise ValueError("The hyperparameter search needs the validation split of the transformation stage, "
+                                 "set validation_split_ratio above 0")
+            n_rows = len(np.load(labels_file_path, mmap_mode="r"))
+            max_samples = min(self.max_samples or n_rows, n_rows)
+            min_samples = min(self.min_samples, max_samples)
+            self.trials = []
+            with tempfile.TemporaryDirectory() as work_dir:
+                # A shuffled row order shared by all workers: rung subsets are prefixes
+                rows_file_path = os.path.join(work_dir, "rows.npy")
+                np.save(rows_file_path, np.random.default_rng(self.random_state).permutation(n_rows))
+                data = {"features": features_file_path, "labels": labels_file_path, "rows": rows_file_path,
+                        "validation_features": validation_features_file_path,
+                        "validation_labels": validation_labels_file_path, "class_weight": class_weight}
+                with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn")) as executor:
+                    if self.method == "successive_halving":
+                        best = self.successive_halving(executor, data, self.sample_candidates(self.n_candidates),
+                                                       min_samples, max_samples, bracket=0)
+                    else:
+                        best = self.hyperband(executor, data, min_samples, max_samples)
+            logging.info(f"Best candidate {best['params']} with validation F1 {best['f1_score']:.4f}")
+            return best["params"]
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def hyperband(self, executor, data: dict, min_samples: int, max_samples: int) -> dict:
+        """
+        Runs successive halving brackets from many candidates on few rows to few candidates on all rows.
+        Returns the best final trial over the brackets.
+        """
+        s_max = int(math.floor(math.log(max_samples / min_samples, self.eta) + 1e-9)) if max_samples > min_samples else 0
+        finals = []
+        for s in range(s_max, -1, -1):
+            n_candidates = int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+            n_samples = max(min_samples, int(math.ceil(max_samples / self.eta ** s)))
+            finals.append(self.successive_halving(executor, data, self.sample_candidates(n_candidates),
+                                                  n_samples, max_samples, bracket=s_max - s))
+        return max(finals, key=lambda trial: (trial["n_samples"], trial["f1_score"]))
+
+    def leaderboard(self) -> list:
+        """
+        Returns the trials, largest budget and best F1 first.
+        """
+        return sorted(self.trials, key=lambda trial: (-trial["n_samples"], -trial["f1_score"]))
+
+    def save_leaderboard(self, file_path: str):
+        """
+        Writes the leaderboard with per-trial time and F1 to a JSON file.
+        """
+        try:
+            with replace_file(file_path) as tmp_path, open(tmp_path, "w") as leaderboard_file:
+                json.dump({"estimator": self.estimator, "method": self.method, "eta": self.eta, "trials": self.leaderboard()},
+                          leaderboard_file, indent=4)
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,146 @@
+import sys
+import time
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import check_choice
+
+# Sources of the training metrics: out-of-bag estimates of the forest, or a prediction pass over the training set
+TRAINING_METRICS_SOURCES = ["oob", "predict"]
+
+
+class ConfusionMatrixAccumulator:
+    """
+    Binary confusion matrix built chunk by chunk, from which all classification metrics are derived.
+    """
+
+    def __init__(self):
+        # Counts indexed by 2 * label + prediction: tn, fp, fn, tp
+        self.counts = np.zeros(4, dtype=np.int64)
+
+    def update(self, y_true, y_pred):
+        """
+        Adds the labels and predictions of one chunk.
+        """
+        self.counts += np.bincount(2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64), minlength=4)[:4]
+        return self
+
+    def merge(self, other: "ConfusionMatrixAccumulator"):
+        """
+        Adds the counts of another accumulator (e.g. of a chunk scored elsewhere).
+        """
+        self.counts += other.counts
+        return self
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.counts.sum())
+
+    def metrics(self) -> dict:
+        """
+        Returns accuracy, F1, precision and recall of the positive class (0 when undefined, like zero_division=0).
+        """
+        tn, fp, fn, tp = (int(count) for count in self.counts)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        return {
+            "accuracy_score": (tp + tn) / self.n_samples if self.n_samples else 0.0,
+            "f1_score": 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
+            "precision_score": precision,
+            "recall_score": recall,
+        }
+
+
+class MetricsEngine:
+    """
+    Computes all acceptance metrics of a model from a single scoring pass per dataset.
+
+    Test metrics come from one prediction pass, streamed in chunks so memory-mapped features are
+    not copied at once. Training metrics come from one prediction pass as well, or with training_source
+    "oob" from the out-of-bag estimates of a forest fit with oob_score=True, which are a by-product of
+    fitting, so the training set is never re-predicted; estimators without out-of-bag estimates fall
+    back to the prediction pass. Out-of-bag accuracy is lower than the accuracy on re-predicted
+    training rows, so the expected_accuracy gate must be set for the chosen source.
+    """
+
+    def __init__(self, training_source: str = "predict", chunk_size: int = 500_000):
+        """
+        Args:
+            training_source (str): One of TRAINING_METRICS_SOURCES.
+            chunk_size (int): Rows predicted at once.
+        """
+        check_choice("training metrics source", training_source, TRAINING_METRICS_SOURCES)
+        self.training_source = training_source
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def supports_oob(model) -> bool:
+        """
+        Returns True when the model can produce out-of-bag estimates (bootstrapped forests).
+        """
+        params = model.get_params()
+        return "oob_score" in params and params.get("bootstrap", False)
+
+    def prepare(self, model):
+        """
+        Enables out-of-bag estimates on the unfitted model when they are the training metrics source.
+        A forest grown with warm_start gets them disabled: sklearn regenerates the bootstrap of its
+        existing trees against the new training set, so their out-of-bag rows are not out of bag,
+        and the training metrics come from a prediction pass instead (estimates left from the
+        base fit are dropped too).
+        """
+        if not self.supports_oob(model):
+            return model
+        if model.get_params().get("warm_start", False):
+            logging.info("Out-of-bag estimates disabled for the warm-started forest, training metrics use a prediction pass")
+            model.set_params(oob_score=False)
+            self.release_oob(model)
+        elif self.training_source == "oob":
+            model.set_params(oob_score=True)
+        return model
+
+    @staticmethod
+    def release_oob(model):
+        """
+        Drops the out-of-bag estimates (one row per training sample) so they are not saved with the model.
+        """
+        for attribute in ("oob_decision_function_", "oob_score_"):
+            if hasattr(model, attribute):
+                delattr(model, attribute)
+        return model
+
+    def score(self, model, X, y) -> tuple:
+        """
+        Predicts X once, chunk by chunk, and returns the metrics and the prediction time.
+        """
+        try:
+            accumulator = ConfusionMatrixAccumulator()
+            start = time.perf_counter()
+            for begin in range(0, len(y), self.chunk_size):
+                end = begin + self.chunk_size
+                accumulator.update(y[begin:end], model.predict(X[begin:end]))
+            return accumulator.metrics(), time.perf_counter() - start
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def score_training(self, model, X_train, y_train) -> tuple:
+        """
+        Returns the training metrics, their source and the time spent: out-of-bag estimates when the
+        model was fit with them, otherwise a prediction pass over the training set.
+        """
+        try:
+            oob_decision = getattr(model, "oob_decision_function_", None)
+            if oob_decision is None:
+                metrics, elapsed_s = self.score(model, X_train, y_train)
+                return metrics, "predict", elapsed_s
+            start = time.perf_counter()
+            # Rows left in the bag of every tree have no estimate
+            has_estimate = ~np.isnan(oob_decision).any(axis=1) & (oob_decision.sum(axis=1) > 0)
+            if not has_estimate.all():
+                logging.info(f"{int((~has_estimate).sum())} training rows have no out-of-bag estimate and are left out")
+            y_oob = model.classes_[oob_decision[has_estimate].argmax(axis=1)]
+            metrics = ConfusionMatrixAccumulator().update(np.asarray(y_train)[has_estimate], y_oob).metrics()
+            return metrics, "oob", time.perf_counter() - start
+        except Exception as e:
+            raise MyException(e, sys)
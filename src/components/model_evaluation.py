@@ -1,11 +1,12 @@
 from src.entity.config_entity import ModelEvaluationConfig
-from src.entity.artifact_entity import ModelTrainerArtifact, DataTransformationArtifact, ModelEvaluationArtifact
-from sklearn.metrics import f1_score
+from src.entity.artifact_entity import ModelTrainerArtifact, DataIngestionArtifact, DataTransformationArtifact, ModelEvaluationArtifact
 from src.exception import MyException
-from src.utils.main_utils import load_object,load_numpy_data
+from src.data_access.artifact_store import ArtifactStore
+from src.components.evaluation_engine import EvaluationEngine, ChampionPredictionCache
 from src.logger import logging
-from src.constants import TARGET_COLUMN
+from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH
 from src.entity.s3_estimator import VehicleEstimator
+from src.utils.main_utils import read_yaml
 from dataclasses import dataclass
 import sys
 
@@ -22,15 +23,32 @@ class ModelEvaluation:
 
     def __init__(self,
                  model_eval_config: ModelEvaluationConfig,
+                 data_ingestion_artifact: DataIngestionArtifact,
                  data_transformation_artifact:DataTransformationArtifact,
-                 model_trainer_artifact: ModelTrainerArtifact):
+                 model_trainer_artifact: ModelTrainerArtifact,
+                 artifact_store: ArtifactStore = None,
+                 best_model: VehicleEstimator = None):
         """
-        Initializes ModelEvaluation with config and artifacts.
+        Initializes ModelEvaluation with config, artifacts, artifact store and evaluation engine.
+        The raw test data of the ingestion artifact is scored by the production model, which
+        applies its own preprocessing. best_model is the production model prefetched by
+        prefetch_best_model, for which the ingestion artifact alone is needed.
         """
         try:
             self.model_eval_config = model_eval_config
+            self.data_ingestion_artifact = data_ingestion_artifact
             self.data_transformation_artifact = data_transformation_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.artifact_store = artifact_store or ArtifactStore()
+            self.best_model = best_model
+            self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
+            self.evaluation_engine = EvaluationEngine(
+                chunk_size=self.model_eval_config.chunk_size,
+                prediction_cache=ChampionPredictionCache(self.model_eval_config.prediction_cache_dir,
+                                                         self.model_eval_config.prediction_cache_max_entries),
+                artifact_store=self.artifact_store,
+                categorical_mappings=self._schema_config["categorical_mappings"]
+            )
         except Exception as e:
             raise MyException(e,sys)
         
@@ -49,38 +67,62 @@ class ModelEvaluation:
             
         except Exception as e:
             raise MyException(e,sys)
-        
+
+    def prefetch_best_model(self):
+        """
+        Loads the best model from S3 if present, downloading it now unless its test predictions are cached.
+        """
+        try:
+            best_model = self.get_best_model()
+            if best_model is not None:
+                self.evaluation_engine.prefetch_champion(best_model, self.data_ingestion_artifact.test_file_path)
+            return best_model
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_feature_columns(self):
+        """
+        Returns the raw input columns of the models: schema columns without the target and id columns.
+        """
+        columns = self._schema_config["numerical_columns"] + self._schema_config["categorical_columns"]
+        return [column for column in columns if column not in (TARGET_COLUMN, self._schema_config["drop_columns"])]
     
     def evaluate_model(self):
         """
         Compares the trained model with the best model (if any) using F1 score.
+        Both are scored chunk by chunk and concurrently by the evaluation engine.
         Returns an EvaluateModelResponse.
         """
         try:
-            # Load transformed test data
-            test_df = load_numpy_data(self.data_transformation_artifact.transformed_test_file_path)
-
-            x = test_df[:, :-1]  # All columns except last
-            y = test_df[:, -1]   # Last column as target
+            # Open transformed test features and labels (memory-mapped when not held in memory)
+            x = self.artifact_store.load_array(self.data_transformation_artifact.transformed_test_file_path)
+            y = self.artifact_store.load_array(self.data_transformation_artifact.transformed_test_label_file_path)
 
             logging.info("Test data loaded and transformed")
 
             # Load the newly trained model
-            trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
+            trained_model = self.artifact_store.load_object(self.model_trainer_artifact.trained_model_file_path)
             logging.info("Trained model loaded")
 
-            # Get F1 score of the trained model
-            trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
-            logging.info(f"F1 score: {trained_model_f1_score}")
+            best_model = self.best_model if self.best_model is not None else self.get_best_model()
 
-            best_model_f1_score = None
-            best_model = self.get_best_model()
+            # Score the trained model on the transformed test set and the best model (if any) on the raw test set
+            logging.info("Computing f1 score for the trained model" + (" and the production model" if best_model is not None else ""))
+            trained_model_metrics, best_model_metrics = self.evaluation_engine.evaluate(
+                trained_model.trained_model_obj, x, y,
+                champion=best_model,
+                test_file_path=self.data_ingestion_artifact.test_file_path,
+                feature_columns=self.get_feature_columns()
+            )
+            trained_model_f1_score = trained_model_metrics["f1_score"]
+            logging.info(f"F1 score: {trained_model_f1_score}")
 
-            # If a best model exists, compute its F1 score
-            if best_model is not None:
-                logging.info(f"Computing f1 score for production model")
-                y_hat = best_model.predict(x)
-                best_model_f1_score = f1_score(y,y_hat)
+            # A production model that cannot score the test data is kept: the trained model is not accepted over it
+            best_model_unscorable = best_model_metrics is not None and best_model_metrics.get("unscorable", False)
+            if best_model_unscorable:
+                logging.warning(f"Production model cannot be scored ({best_model_metrics}), the trained model is not accepted")
+            best_model_f1_score = None if best_model_metrics is None or best_model_unscorable else best_model_metrics["f1_score"]
+            if best_model_f1_score is not None:
                 logging.info(f"F1-score prod: {best_model_f1_score} and F1-score new:{trained_model_f1_score}")
 
             # If no best model, set score to 0
@@ -89,7 +131,7 @@ class ModelEvaluation:
             # Prepare evaluation response
             result = EvaluateModelResponse(trained_model_f1_score=trained_model_f1_score,
                                            best_model_f1_score=best_model_f1_score,
-                                           is_model_accepted=trained_model_f1_score>tmp_best_model_score,
+                                           is_model_accepted=trained_model_f1_score>tmp_best_model_score and not best_model_unscorable,
                                            difference=trained_model_f1_score-tmp_best_model_score)
             
             logging.info(f"Result: {result}")
@@ -0,0 +1,86 @@
+import sys
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+
+from src.constants import (MODEL_TRAINER_ESTIMATOR, MODEL_TRAINER_N_ESTIMATORS, MODEL_TRAINER_MIN_SAMPLES_SPLIT,
+                           MODEL_TRAINER_MIN_SAMPLES_LEAF, MIN_SAMPLES_SPLIT_MAX_DEPTH, MIN_SAMPLES_SPLIT_CRITERION,
+                           MIN_SAMPLES_SPLIT_RANDOM_STATE, MODEL_TRAINER_HGB_MAX_ITER, MODEL_TRAINER_HGB_LEARNING_RATE,
+                           MODEL_TRAINER_HGB_MAX_LEAF_NODES, MODEL_TRAINER_HGB_MIN_SAMPLES_LEAF, MODEL_TRAINER_HGB_MAX_BINS,
+                           MODEL_TRAINER_HGB_EARLY_STOPPING)
+from src.exception import MyException
+from src.utils.main_utils import check_choice
+
+# Estimators the factory can build, by the name used in config/model.yaml
+MODEL_ESTIMATORS = {
+    "random_forest": RandomForestClassifier,
+    "hist_gradient_boosting": HistGradientBoostingClassifier,
+}
+
+# Default parameters of every estimator
+MODEL_DEFAULT_PARAMS = {
+    "random_forest": {
+        "n_estimators": MODEL_TRAINER_N_ESTIMATORS,
+        "min_samples_split": MODEL_TRAINER_MIN_SAMPLES_SPLIT,
+        "min_samples_leaf": MODEL_TRAINER_MIN_SAMPLES_LEAF,
+        "max_depth": MIN_SAMPLES_SPLIT_MAX_DEPTH,
+        "criterion": MIN_SAMPLES_SPLIT_CRITERION,
+        "random_state": MIN_SAMPLES_SPLIT_RANDOM_STATE,
+    },
+    "hist_gradient_boosting": {
+        "max_iter": MODEL_TRAINER_HGB_MAX_ITER,
+        "learning_rate": MODEL_TRAINER_HGB_LEARNING_RATE,
+        "max_leaf_nodes": MODEL_TRAINER_HGB_MAX_LEAF_NODES,
+        "min_samples_leaf": MODEL_TRAINER_HGB_MIN_SAMPLES_LEAF,
+        "max_bins": MODEL_TRAINER_HGB_MAX_BINS,
+        "early_stopping": MODEL_TRAINER_HGB_EARLY_STOPPING,
+        "random_state": MIN_SAMPLES_SPLIT_RANDOM_STATE,
+    },
+}
+
+
+class ModelFactory:
+    """
+    Builds the model selected in the model section of config/model.yaml.
+
+    - "random_forest": sklearn RandomForestClassifier, trees fit in parallel by joblib.
+    - "hist_gradient_boosting": sklearn HistGradientBoostingClassifier, which bins every feature into
+      at most 255 uint8 bins once and grows each boosted tree on the bins with OpenMP threads.
+
+    Every built model is a plain sklearn classifier, so it plugs into MyModel, evaluation and pushing.
+    """
+
+    def __init__(self, estimator: str = MODEL_TRAINER_ESTIMATOR, params: dict = None, default_params: dict = None):
+        """
+        Args:
+            estimator (str): One of MODEL_ESTIMATORS.
+            params (dict, optional): Parameter overrides from config/model.yaml.
+            default_params (dict, optional): Replaces the built-in defaults of the estimator.
+        """
+        check_choice("estimator", estimator, MODEL_ESTIMATORS)
+        self.estimator = estimator
+        self.params = dict(params or {})
+        self.default_params = dict(MODEL_DEFAULT_PARAMS[estimator] if default_params is None else default_params)
+
+    def get_params(self, params: dict = None) -> dict:
+        """
+        Returns the default parameters overridden by the config overrides and the given parameters.
+        """
+        return {**self.default_params, **self.params, **(params or {})}
+
+    def build(self, params: dict = None, class_weight: dict = None, n_jobs: int = None):
+        """
+        Returns an unfitted model.
+
+        Args:
+            params (dict, optional): Parameters taking precedence over the config (e.g. from the search).
+            class_weight (dict, optional): Class weights ("class_weight" rebalancing).
+            n_jobs (int, optional): Cores of estimators parallelized by joblib; OpenMP-based estimators
+                are limited with threadpoolctl by the caller instead.
+        """
+        try:
+            estimator_class = MODEL_ESTIMATORS[self.estimator]
+            model_params = {**self.get_params(params), "class_weight": class_weight}
+            if "n_jobs" in estimator_class().get_params():
+                model_params["n_jobs"] = n_jobs
+            return estimator_class(**model_params)
+        except Exception as e:
+            raise MyException(e, sys)
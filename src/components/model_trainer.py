@@ -1,7 +1,9 @@
 import sys
+import time
 import numpy as np
+from joblib import parallel_backend, effective_n_jobs
+from threadpoolctl import threadpool_limits
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 
 from src.exception import MyException
 from src.logger import logging
@@ -9,49 +11,220 @@ from src.utils.main_utils import *
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import ModelTrainerArtifact, DataTransformationArtifact, ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.data_access.artifact_store import ArtifactStore
+from src.components.hyperparameter_search import HyperparameterSearch
+from src.components.model_factory import ModelFactory
+from src.components.metrics_engine import MetricsEngine
+from src.components.sharded_training import ShardedForestTrainer
+from src.components.forest_compaction import ForestCompactor
+from src.constants import (MODEL_TRAINER_ESTIMATOR, MODEL_TRAINER_N_JOBS, MODEL_TRAINER_PARALLEL_BACKEND, MODEL_TRAINER_MAX_MEMORY_MB,
+                           MODEL_TRAINER_INCREMENTAL_N_ESTIMATORS, MODEL_TRAINER_TRAINING_METRICS_SOURCE,
+                           MODEL_TRAINER_SCORING_CHUNK_SIZE)
+
+# Estimated memory of one tree being built, per training row (sample indices, weights, feature buffer and nodes)
+FOREST_WORKER_BYTES_PER_SAMPLE = 48
+# Estimated fixed memory of a worker process (interpreter and imported libraries) with a process backend
+PROCESS_WORKER_OVERHEAD_BYTES = 150 * 1024 ** 2
 
 class ModelTrainer:
-    def __init__(self,data_transformation_artifact:DataTransformationArtifact,model_trainer_config: ModelTrainerConfig):
-        # Initialize ModelTrainer with data transformation artifact and config
+    def __init__(self,data_transformation_artifact:DataTransformationArtifact,model_trainer_config: ModelTrainerConfig,artifact_store: ArtifactStore = None):
+        # Initialize ModelTrainer with data transformation artifact, config, artifact store and model.yaml settings
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.artifact_store = artifact_store or ArtifactStore()
+        self.model_config = self.load_model_config(self.model_trainer_config.model_config_file_path)
+        # The forest defaults come from the trainer config, other estimators use the factory defaults
+        estimator = self.model_config["model"]["estimator"]
+        self.model_factory = ModelFactory(
+            estimator=estimator,
+            params=self.model_config["model"]["params"],
+            default_params=self.get_forest_config_params() if estimator == "random_forest" else None
+        )
+        self.metrics_engine = MetricsEngine(training_source=self.model_config["metrics"]["training_source"],
+                                            chunk_size=self.model_config["metrics"]["chunk_size"])
+
+    @staticmethod
+    def load_model_config(file_path: str) -> dict:
+        """
+        Reads config/model.yaml, filling the model, parallelism, incremental, sharding, compaction, metrics and search sections
+        with the defaults from constants.
+        """
+        try:
+            model_config = read_yaml(file_path) or {}
+            model = {"estimator": MODEL_TRAINER_ESTIMATOR, "params": {}}
+            model.update(model_config.get("model") or {})
+            model["params"] = model["params"] or {}
+            parallelism = {"n_jobs": MODEL_TRAINER_N_JOBS, "backend": MODEL_TRAINER_PARALLEL_BACKEND,
+                           "max_memory_mb": MODEL_TRAINER_MAX_MEMORY_MB}
+            parallelism.update(model_config.get("parallelism") or {})
+            incremental = {"enabled": False, "n_new_estimators": MODEL_TRAINER_INCREMENTAL_N_ESTIMATORS, "base_model_path": None}
+            incremental.update(model_config.get("incremental") or {})
+            sharding = {"enabled": False}
+            sharding.update(model_config.get("sharding") or {})
+            compaction = {"enabled": False}
+            compaction.update(model_config.get("compaction") or {})
+            metrics = {"training_source": MODEL_TRAINER_TRAINING_METRICS_SOURCE, "chunk_size": MODEL_TRAINER_SCORING_CHUNK_SIZE}
+            metrics.update(model_config.get("metrics") or {})
+            search = {"enabled": False}
+            search.update(model_config.get("search") or {})
+            return {**model_config, "model": model, "parallelism": parallelism, "incremental": incremental,
+                    "sharding": sharding, "compaction": compaction, "metrics": metrics, "search": search}
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_effective_n_jobs(self, n_samples: int) -> int:
+        """
+        Returns the number of parallel workers: the configured core count, lowered so the estimated
+        memory of the workers stays below parallelism.max_memory_mb.
+        """
+        parallelism = self.model_config["parallelism"]
+        n_jobs = effective_n_jobs(parallelism["n_jobs"])
+        worker_bytes = n_samples * FOREST_WORKER_BYTES_PER_SAMPLE
+        if parallelism["backend"] != "threading":
+            worker_bytes += PROCESS_WORKER_OVERHEAD_BYTES
+        max_workers = max(1, int(parallelism["max_memory_mb"] * 1024 ** 2 // worker_bytes))
+        if n_jobs > max_workers:
+            logging.info(f"Parallel workers capped from {n_jobs} to {max_workers} by the {parallelism['max_memory_mb']} MB memory limit")
+        return min(n_jobs, max_workers)
+
+    def get_forest_config_params(self) -> dict:
+        """
+        Returns the forest parameters from the trainer config.
+        """
+        return {
+            "n_estimators": self.model_trainer_config._n_estimators,
+            "min_samples_leaf": self.model_trainer_config._min_samples_leaf,
+            "min_samples_split": self.model_trainer_config._min_samples_split,
+            "max_depth": self.model_trainer_config._max_depth,
+            "criterion": self.model_trainer_config._criterion,
+            "random_state": self.model_trainer_config._random_state,
+        }
+
+    def get_default_params(self) -> dict:
+        """
+        Returns the parameters of the configured model: its defaults overridden by model.params of config/model.yaml.
+        """
+        return self.model_factory.get_params()
+
+    def search_hyperparameters(self):
+        """
+        Runs the hyperparameter search of config/model.yaml on the training arrays and saves its leaderboard.
+        Returns the best parameters, None when the search is disabled or a base forest is grown.
+        """
+        try:
+            if not self.model_config["search"]["enabled"]:
+                return None
+            if self.model_trainer_config.base_model_file_path:
+                logging.info("Hyperparameter search skipped, incremental training keeps the base forest parameters")
+                return None
+            search = HyperparameterSearch(self.model_config["search"], self.get_default_params(),
+                                          estimator=self.model_factory.estimator)
+            params = search.run(self.data_transformation_artifact.transformed_train_file_path,
+                                self.data_transformation_artifact.transformed_train_label_file_path,
+                                self.data_transformation_artifact.transformed_validation_file_path,
+                                self.data_transformation_artifact.transformed_validation_label_file_path,
+                                class_weight=self.data_transformation_artifact.class_weight)
+            search.save_leaderboard(self.model_trainer_config.search_leaderboard_file_path)
+            return params
+        except Exception as e:
+            raise MyException(e,sys)
 
-    def get_model_object_and_report(self,train,test):
+    def get_model_object(self, n_jobs: int, params: dict = None):
+        """
+        Returns the model to fit: the base model's forest set up to grow n_new_estimators trees
+        (warm_start) in incremental mode, otherwise a new model from the model factory with the
+        given parameters (the configured parameters by default).
+        """
+        # Set when the training set was not resampled ("class_weight" rebalancing)
+        class_weight = self.data_transformation_artifact.class_weight
+        base_model_file_path = self.model_trainer_config.base_model_file_path
+        if base_model_file_path:
+            model = load_object(base_model_file_path).trained_model_obj
+            if not isinstance(model, RandomForestClassifier):
+                raise Exception(f"Incremental training needs a RandomForestClassifier base model, got {type(model).__name__}")
+            n_estimators = model.n_estimators + self.model_config["incremental"]["n_new_estimators"]
+            logging.info(f"Growing the forest of {base_model_file_path} from {model.n_estimators} to {n_estimators} trees")
+            return model.set_params(warm_start=True, n_estimators=n_estimators, n_jobs=n_jobs, class_weight=class_weight)
+        # Build the configured model with parameters from config or the search
+        return self.model_factory.build(params, class_weight=class_weight, n_jobs=n_jobs)
+
+    def compact_model(self, model, X_validation, y_validation):
+        """
+        Compacts a trained forest on the validation rows when enabled in config/model.yaml and saves the compaction report.
+        Returns the compact forest, or the model itself when compaction is disabled, not applicable or rejected.
         """
-        Trains a RandomForestClassifier on the training data and evaluates it on the test data.
+        try:
+            if not self.model_config["compaction"]["enabled"]:
+                return model
+            if not isinstance(model, RandomForestClassifier):
+                logging.info(f"Compaction skipped, it applies to random forests only, got {type(model).__name__}")
+                return model
+            if y_validation is None:
+                logging.info("Compaction skipped, it needs the validation split of the transformation stage")
+                return model
+            compactor = ForestCompactor(self.model_config["compaction"])
+            model, _ = compactor.compact(model, X_validation, y_validation)
+            compactor.save_report(self.model_trainer_config.compaction_report_file_path)
+            return model
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_model_object_and_report(self,X_train,y_train,X_test,y_test,params=None,X_validation=None,y_validation=None):
+        """
+        Trains the configured model on the training data and evaluates it on the test data.
+        Features and labels are separate (possibly memory-mapped) arrays, consumed without copies.
+        Forest trees are fit in parallel with the configured joblib backend, gradient boosting uses
+        as many OpenMP threads.
+        With sharding enabled in config/model.yaml, the forest is fit as sub-forests on shards of the
+        training rows by separate workers and merged. With compaction enabled, the trained forest is
+        replaced by a CompactForest when it passes the accuracy guard on the validation rows.
+        Test and training metrics come from the metrics engine: one prediction pass over the test set,
+        and out-of-bag estimates (or one prediction pass) for the training set.
         Returns the trained model and a metric artifact.
         """
         try:
-            logging.info("Training RandomForestClassifier with specified parameters")
-            # Split features and labels for train and test sets
-            X_train,y_train,X_test,y_test = train[:,:-1],train[:,-1],test[:,:-1],test[:,-1]
-            logging.info("train and test split done")
-
-            # Initialize RandomForestClassifier with parameters from config
-            model = RandomForestClassifier(
-                n_estimators=self.model_trainer_config._n_estimators,
-                min_samples_leaf=self.model_trainer_config._min_samples_leaf,
-                min_samples_split=self.model_trainer_config._min_samples_split,
-                max_depth=self.model_trainer_config._max_depth,
-                criterion=self.model_trainer_config._criterion,
-                random_state=self.model_trainer_config._random_state
-            )
+            logging.info(f"Training {self.model_factory.estimator} with specified parameters")
+            n_jobs = self.get_effective_n_jobs(len(X_train))
+            model = self.metrics_engine.prepare(self.get_model_object(n_jobs, params))
 
-            logging.info("Model Training going on")
-            # Train the model
-            model.fit(X_train,y_train)
-            logging.info("Model Training Done")
+            logging.info(f"Model Training going on with {n_jobs} workers ({self.model_config['parallelism']['backend']} backend)")
+            with parallel_backend(self.model_config["parallelism"]["backend"], n_jobs=n_jobs), \
+                    threadpool_limits(limits=n_jobs, user_api="openmp"):
+                # Train the model
+                start = time.perf_counter()
+                if self.model_config["sharding"]["enabled"]:
+                    model = ShardedForestTrainer(self.model_config["sharding"]).fit(
+                        model,
+                        self.data_transformation_artifact.transformed_train_file_path,
+                        self.data_transformation_artifact.transformed_train_label_file_path
+                    )
+                else:
+                    model.fit(X_train,y_train)
+                fit_time_s = time.perf_counter() - start
+                # Later fits of the saved model start from scratch
+                model.set_params(warm_start=False)
+                logging.info("Model Training Done")
 
-            # Predict on test set
-            y_pred = model.predict(X_test)
-            # Calculate evaluation metrics
-            accuracy = accuracy_score(y_test,y_pred)
-            f1 = f1_score(y_test,y_pred)
-            precision = precision_score(y_test,y_pred)
-            recall = recall_score(y_test,y_pred)
+                # Score the training set once, then the test set once with the model that is saved
+                training_metrics, training_source, training_score_time_s = self.metrics_engine.score_training(model, X_train, y_train)
+                self.metrics_engine.release_oob(model)
+                model = self.compact_model(model, X_validation, y_validation)
+                test_metrics, test_score_time_s = self.metrics_engine.score(model, X_test, y_test)
+            logging.info(f"Test metrics: {test_metrics}, training metrics ({training_source}): {training_metrics}")
 
             # Create metric artifact
-            metric_artifact = ClassificationMetricArtifact(f1_score=f1,precision_score=precision,recall_score=recall)
+            metric_artifact = ClassificationMetricArtifact(
+                f1_score=test_metrics["f1_score"],
+                precision_score=test_metrics["precision_score"],
+                recall_score=test_metrics["recall_score"],
+                accuracy_score=test_metrics["accuracy_score"],
+                training_accuracy_score=training_metrics["accuracy_score"],
+                training_f1_score=training_metrics["f1_score"],
+                training_metrics_source=training_source,
+                fit_time_s=round(fit_time_s, 3),
+                test_score_time_s=round(test_score_time_s, 3),
+                training_score_time_s=round(training_score_time_s, 3)
+            )
             return model, metric_artifact
         
         except Exception as e:
@@ -69,28 +242,40 @@ class ModelTrainer:
             print("-------------------------------------------------------")
             print("Starting Model Trainer")
 
-            # Load transformed training and testing data
-            train_arr = load_numpy_data(self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_data(self.data_transformation_artifact.transformed_test_file_path)
+            # Open transformed training and testing features and labels (memory-mapped when not held in memory)
+            X_train = self.artifact_store.load_array(self.data_transformation_artifact.transformed_train_file_path)
+            y_train = self.artifact_store.load_array(self.data_transformation_artifact.transformed_train_label_file_path)
+            X_test = self.artifact_store.load_array(self.data_transformation_artifact.transformed_test_file_path)
+            y_test = self.artifact_store.load_array(self.data_transformation_artifact.transformed_test_label_file_path)
+            # Validation rows held out before rebalancing, absent when the transformation stage has no validation split
+            X_validation = y_validation = None
+            if self.data_transformation_artifact.transformed_validation_label_file_path:
+                X_validation = self.artifact_store.load_array(self.data_transformation_artifact.transformed_validation_file_path)
+                y_validation = self.artifact_store.load_array(self.data_transformation_artifact.transformed_validation_label_file_path)
             logging.info("Train and test data loaded")
 
+            # Search the forest parameters when enabled in config/model.yaml
+            params = self.search_hyperparameters()
+
             # Train model and get metrics
-            trained_model, metric_artifact = self.get_model_object_and_report(train_arr,test_arr)
+            trained_model, metric_artifact = self.get_model_object_and_report(X_train,y_train,X_test,y_test,params,X_validation,y_validation)
             logging.info("Model oject and artifact loaded")
 
             # Load preprocessing object
-            preprocessing_obj = load_object(self.data_transformation_artifact.transformed_object_file_path)
+            preprocessing_obj = self.artifact_store.load_object(self.data_transformation_artifact.transformed_object_file_path)
             logging.info("Preprocessing object loaded")
 
-            # Check if model meets expected accuracy on training data
-            if accuracy_score(train_arr[:,-1],trained_model.predict(train_arr[:,:-1])) < self.model_trainer_config.expected_accuracy:
+            # Check if model meets expected accuracy on training data (computed with the other metrics)
+            logging.info(f"Expected accuracy gate on the training accuracy {metric_artifact.training_accuracy_score:.4f} "
+                         f"from {metric_artifact.training_metrics_source} estimates")
+            if metric_artifact.training_accuracy_score < self.model_trainer_config.expected_accuracy:
                 logging.info("No model found with score above the base score")
                 raise Exception("No model found with score above the base score")
             
             logging.info("Saving new model as performance is better than previous one")
             # Create and save final model object
             my_model = MyModel(preprocessing_obj,trained_model)
-            save_object(self.model_trainer_config.trained_model_file_path,my_model)
+            self.artifact_store.save_object(self.model_trainer_config.trained_model_file_path,my_model)
             logging.info("Saved final model object")
 
             # Create and return model trainer artifact
@@ -0,0 +1,180 @@
+import sys
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+from src.constants import (REBALANCING_STRATEGY, REBALANCING_SAMPLING_RATIO, REBALANCING_SMOTE_NEIGHBORS,
+                           REBALANCING_ENN_NEIGHBORS, REBALANCING_ENN_REFERENCE_SIZE, REBALANCING_CHUNK_SIZE,
+                           REBALANCING_N_JOBS, REBALANCING_RANDOM_STATE)
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import check_choice
+
+# Strategies accepted by Rebalancer
+REBALANCING_STRATEGIES = ["none", "class_weight", "undersample", "smote", "smote_enn"]
+
+
+class Rebalancer:
+    """
+    Rebalances the classes of the training set with a configurable strategy:
+
+    - "none": data is left as is.
+    - "class_weight": data is left as is and balanced class weights are returned for the trainer.
+    - "undersample": majority rows are randomly dropped down to the sampling ratio.
+    - "smote": minority rows are synthesized up to the sampling ratio by interpolating towards one of
+      their k nearest minority neighbors; neighbors are searched chunk by chunk on all cores.
+    - "smote_enn": "smote" followed by Edited Nearest Neighbours on the majority class, with neighbors
+      searched in a random reference sample of the data (approximate, bounded cost).
+
+    Only the training set should be rebalanced; the test set keeps the real class distribution.
+    """
+
+    def __init__(self, strategy: str = REBALANCING_STRATEGY, sampling_ratio: float = REBALANCING_SAMPLING_RATIO,
+                 smote_neighbors: int = REBALANCING_SMOTE_NEIGHBORS, enn_neighbors: int = REBALANCING_ENN_NEIGHBORS,
+                 enn_reference_size: int = REBALANCING_ENN_REFERENCE_SIZE, chunk_size: int = REBALANCING_CHUNK_SIZE,
+                 n_jobs: int = REBALANCING_N_JOBS, random_state: int = REBALANCING_RANDOM_STATE):
+        """
+        Args:
+            strategy (str): One of REBALANCING_STRATEGIES.
+            sampling_ratio (float): Target size of every other class relative to the majority class, above 0.
+            smote_neighbors (int): Minority neighbors considered when synthesizing a row.
+            enn_neighbors (int): Neighbors that must all agree with a majority row for it to be kept.
+            enn_reference_size (int): Rows sampled as the neighbor search space of ENN.
+            chunk_size (int): Rows queried or synthesized per chunk.
+            n_jobs (int): Cores used by the neighbor searches (-1 for all).
+            random_state (int): Seed of the sampling.
+        """
+        check_choice("rebalancing strategy", strategy, REBALANCING_STRATEGIES)
+        if sampling_ratio <= 0:
+            try:
+                raise ValueError(f"Rebalancing sampling ratio must be above 0, got {sampling_ratio}")
+            except ValueError as e:
+                raise MyException(e, sys)
+        self.strategy = strategy
+        self.sampling_ratio = sampling_ratio
+        self.smote_neighbors = smote_neighbors
+        self.enn_neighbors = enn_neighbors
+        self.enn_reference_size = enn_reference_size
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self._rng = np.random.default_rng(random_state)
+
+    @staticmethod
+    def get_class_counts(y: np.ndarray) -> dict:
+        """
+        Returns the number of rows of every class.
+        """
+        classes, counts = np.unique(y, return_counts=True)
+        return {int(label): int(count) for label, count in zip(classes, counts)}
+
+    @staticmethod
+    def get_class_weights(y: np.ndarray) -> dict:
+        """
+        Returns balanced class weights (n_samples / (n_classes * class count)), as sklearn's "balanced".
+        """
+        classes, counts = np.unique(y, return_counts=True)
+        return {int(label): float(len(y) / (len(classes) * count)) for label, count in zip(classes, counts)}
+
+    def fit_resample(self, X: np.ndarray, y: np.ndarray):
+        """
+        Rebalances the training set. A training set with a single class is returned unchanged.
+
+        Returns:
+            tuple: Resampled features, resampled labels and class weights (None unless strategy is "class_weight").
+        """
+        try:
+            y = np.asarray(y)
+            logging.info(f"Rebalancing {len(y)} rows with strategy {self.strategy}, class counts {self.get_class_counts(y)}")
+            class_weights = None
+            if len(np.unique(y)) < 2:
+                logging.warning("Training set holds a single class, it is not rebalanced")
+                return X, y, class_weights
+            if self.strategy == "class_weight":
+                class_weights = self.get_class_weights(y)
+            elif self.strategy == "undersample":
+                X, y = self.undersample(X, y)
+            elif self.strategy in ("smote", "smote_enn"):
+                X, y = self.smote(X, y)
+                if self.strategy == "smote_enn":
+                    X, y = self.edited_nearest_neighbours(X, y)
+            logging.info(f"Rebalanced to {len(y)} rows, class counts {self.get_class_counts(y)}")
+            return X, y, class_weights
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _majority_class(self, y: np.ndarray):
+        # Label and count of the most frequent class
+        classes, counts = np.unique(y, return_counts=True)
+        return classes[np.argmax(counts)], counts.max(), classes, counts
+
+    def undersample(self, X: np.ndarray, y: np.ndarray):
+        """
+        Randomly drops majority rows so the largest other class reaches sampling_ratio of the majority.
+        """
+        majority, majority_count, classes, counts = self._majority_class(y)
+        largest_other = counts[classes != majority].max()
+        keep_count = min(majority_count, int(largest_other / self.sampling_ratio))
+        majority_rows = np.flatnonzero(y == majority)
+        dropped = self._rng.choice(majority_rows, size=majority_count - keep_count, replace=False)
+        keep = np.ones(len(y), dtype=bool)
+        keep[dropped] = False
+        return X[keep], y[keep]
+
+    def _kneighbors(self, reference: np.ndarray, queries: np.ndarray, n_neighbors: int) -> np.ndarray:
+        # Indices (into reference) of the nearest neighbors of every query row, searched chunk by chunk in parallel
+        search = NearestNeighbors(n_neighbors=n_neighbors, n_jobs=self.n_jobs).fit(reference)
+        neighbors = np.empty((len(queries), n_neighbors), dtype=np.int64)
+        for start in range(0, len(queries), self.chunk_size):
+            neighbors[start:start + self.chunk_size] = search.kneighbors(queries[start:start + self.chunk_size], return_distance=False)
+        return neighbors
+
+    def smote(self, X: np.ndarray, y: np.ndarray):
+        """
+        Synthesizes rows of every non-majority class up to sampling_ratio of the majority class.
+        Neighbors are computed once per minority row; synthetic rows are generated in chunks
+        directly into the preallocated output.
+        """
+        majority, majority_count, classes, counts = self._majority_class(y)
+        to_generate = {label: max(int(majority_count * self.sampling_ratio) - count, 0)
+                       for label, count in zip(classes, counts) if label != majority}
+        total = sum(to_generate.values())
+        X_out = np.empty((len(X) + total, X.shape[1]), dtype=X.dtype)
+        y_out = np.empty(len(y) + total, dtype=y.dtype)
+        X_out[:len(X)], y_out[:len(y)] = X, y
+        position = len(X)
+        for label, n_samples in to_generate.items():
+            minority = X[y == label]
+            if n_samples == 0 or len(minority) < 2:
+                continue
+            # The first neighbor of every row is the row itself
+            neighbors = self._kneighbors(minority, minority, min(self.smote_neighbors + 1, len(minority)))[:, 1:]
+            for start in range(0, n_samples, self.chunk_size):
+                size = min(self.chunk_size, n_samples - start)
+                base = self._rng.integers(len(minority), size=size)
+                neighbor = neighbors[base, self._rng.integers(neighbors.shape[1], size=size)]
+                gap = self._rng.random((size, 1), dtype=np.float32 if X.dtype == np.float32 else np.float64)
+                X_out[position:position + size] = minority[base] + gap * (minority[neighbor] - minority[base])
+                y_out[position:position + size] = label
+                position += size
+        return X_out[:position], y_out[:position]
+
+    def edited_nearest_neighbours(self, X: np.ndarray, y: np.ndarray):
+        """
+        Drops majority rows whose enn_neighbors nearest neighbors do not all share their class.
+        Neighbors are searched in a random reference sample of at most enn_reference_size rows
+        instead of the whole set, which bounds the cost on large data.
+        """
+        majority = self._majority_class(y)[0]
+        reference_rows = np.arange(len(y))
+        if len(y) > self.enn_reference_size:
+            reference_rows = np.sort(self._rng.choice(len(y), size=self.enn_reference_size, replace=False))
+        majority_rows = np.flatnonzero(y == majority)
+        # One extra neighbor covers a majority row finding itself in the reference sample
+        neighbors = self._kneighbors(X[reference_rows], X[majority_rows], self.enn_neighbors + 1)
+        neighbor_rows = reference_rows[neighbors]
+        is_self = neighbor_rows == majority_rows[:, None]
+        # Drop the row itself if found, otherwise the farthest of the extra neighbors
+        is_self[~is_self.any(axis=1), -1] = True
+        agree = (y[neighbor_rows] == majority) | is_self
+        keep = np.ones(len(y), dtype=bool)
+        keep[majority_rows[~agree.all(axis=1)]] = False
+        return X[keep], y[keep]
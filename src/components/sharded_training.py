@@ -0,0 +1,282 @@
+import os
+import sys
+import time
+import shutil
+import socket
+import argparse
+import traceback
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from uuid import uuid4
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.constants import (MODEL_TRAINER_SHARDING_N_SHARDS, MODEL_TRAINER_SHARDING_COORDINATOR,
+                           MODEL_TRAINER_SHARDING_N_JOBS_PER_WORKER, MODEL_TRAINER_SHARDING_COORDINATOR_DIR,
+                           MODEL_TRAINER_SHARDING_LOCAL_WORKERS, MODEL_TRAINER_SHARDING_TIMEOUT_S)
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import load_object, save_object, check_choice
+
+# Coordinators accepted in the sharding section of config/model.yaml
+SHARDING_COORDINATORS = ["process", "file"]
+# Seconds between two scans of the file coordinator directory
+FILE_COORDINATOR_POLL_INTERVAL_S = 1.0
+
+
+def get_shard_rows(shard: int, n_shards: int, n_rows: int) -> np.ndarray:
+    """
+    Returns the training rows of a shard: every n_shards-th row, so every shard sees the whole row order.
+    """
+    return np.arange(shard, n_rows, n_shards)
+
+
+def fit_shard(features_file_path: str, labels_file_path: str, shard: int, n_shards: int, params: dict) -> dict:
+    """
+    Fits a sub-forest on one shard of the training rows. Runs in a worker process or on another
+    host; only the shard rows are read from the memory-mapped training arrays.
+    Returns the sub-forest with its shard, fit time and host.
+    """
+    X = np.load(features_file_path, mmap_mode="r")
+    y = np.load(labels_file_path, mmap_mode="r")
+    rows = get_shard_rows(shard, n_shards, len(y))
+    start = time.perf_counter()
+    forest = RandomForestClassifier(**params).fit(X[rows], y[rows])
+    return {"shard": shard, "forest": forest, "n_rows": len(rows), "fit_time_s": round(time.perf_counter() - start, 3),
+            "host": socket.gethostname()}
+
+
+def merge_forests(results: list, n_rows: int) -> RandomForestClassifier:
+    """
+    Merges the sub-forests of all shards into one forest holding all their trees.
+    Out-of-bag estimates of the shards are placed at their rows: trees of other shards never saw
+    these rows, so the estimates stay out-of-bag for the merged forest.
+    """
+    results = sorted(results, key=lambda result: result["shard"])
+    merged = results[0]["forest"]
+    for result in results[1:]:
+        forest = result["forest"]
+        if not np.array_equal(forest.classes_, merged.classes_) or forest.n_features_in_ != merged.n_features_in_:
+            raise ValueError(f"Shard {result['shard']} learned classes {forest.classes_} on {forest.n_features_in_} features, "
+                             f"expected {merged.classes_} on {merged.n_features_in_}")
+    merged.estimators_ = [tree for result in results for tree in result["forest"].estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    if all(hasattr(result["forest"], "oob_decision_function_") for result in results):
+        oob_decision = np.full((n_rows, len(merged.classes_)), np.nan)
+        for result in results:
+            oob_decision[get_shard_rows(result["shard"], len(results), n_rows)] = result["forest"].oob_decision_function_
+        merged.oob_decision_function_ = oob_decision
+        if hasattr(merged, "oob_score_"):
+            del merged.oob_score_
+    return merged
+
+
+class FileShardCoordinator:
+    """
+    Hands shard tasks to workers through a shared directory.
+
+    Every job gets a directory <coordinator_dir>/<job_id> with tasks/, claimed/, results/ and failed/.
+    A worker claims a task by renaming it from tasks/ to claimed/ (atomic, so a task runs once),
+    fits the shard and writes its result; the trainer polls results/ until every shard is done.
+    Workers run as local processes or on other hosts sharing the directory and the training arrays:
+
+        python -m src.components.sharded_training --coordinator-dir <coordinator_dir> --idle-timeout 600
+    """
+
+    def __init__(self, coordinator_dir: str, timeout_s: float = MODEL_TRAINER_SHARDING_TIMEOUT_S,
+                 poll_interval_s: float = FILE_COORDINATOR_POLL_INTERVAL_S):
+        """
+        Args:
+            coordinator_dir (str): Directory shared by the trainer and the workers.
+            timeout_s (float): Time to wait for all shards before failing.
+            poll_interval_s (float): Seconds between two scans of the directory.
+        """
+        self.coordinator_dir = os.path.abspath(coordinator_dir)
+        self.timeout_s = timeout_s
+        self.poll_interval_s = poll_interval_s
+
+    def submit(self, tasks: list) -> str:
+        """
+        Writes the tasks of a new job and returns its directory.
+        """
+        job_dir = os.path.join(self.coordinator_dir, uuid4().hex)
+        for sub_dir in ("tasks", "claimed", "results", "failed"):
+            os.makedirs(os.path.join(job_dir, sub_dir), exist_ok=True)
+        for task in tasks:
+            # Written under a temporary name first so workers never claim a partial task
+            tmp_path = os.path.join(job_dir, f"shard_{task['shard']}.tmp")
+            save_object(tmp_path, task)
+            os.replace(tmp_path, os.path.join(job_dir, "tasks", f"shard_{task['shard']}.pkl"))
+        logging.info(f"Submitted {len(tasks)} shard tasks to {job_dir}")
+        return job_dir
+
+    def wait(self, job_dir: str, n_tasks: int, workers: list = ()) -> list:
+        """
+        Waits until every task has a result and returns them. Fails on the first failed task,
+        when a local worker is killed, or when the timeout expires.
+        """
+        deadline = time.monotonic() + self.timeout_s
+        results_dir, failed_dir = os.path.join(job_dir, "results"), os.path.join(job_dir, "failed")
+        while True:
+            failed = sorted(os.listdir(failed_dir))
+            if failed:
+                with open(os.path.join(failed_dir, failed[0])) as failed_file:
+                    raise RuntimeError(f"Shard task {failed[0]} failed:\n{failed_file.read()}")
+            done = [name for name in os.listdir(results_dir) if name.endswith(".pkl")]
+            if len(done) == n_tasks:
+                return [load_object(os.path.join(results_dir, name)) for name in done]
+            crashed = [worker.returncode for worker in workers if worker.poll() not in (None, 0)]
+            if crashed:
+                raise RuntimeError(f"A local shard worker exited with code {crashed[0]}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{n_tasks - len(done)} of {n_tasks} shard tasks unfinished after {self.timeout_s}s")
+            time.sleep(self.poll_interval_s)
+
+    def claim(self):
+        """
+        Claims a pending task of any job. Returns the job directory and the task, or None.
+        """
+        if not os.path.isdir(self.coordinator_dir):
+            return None
+        for job_id in sorted(os.listdir(self.coordinator_dir)):
+            tasks_dir = os.path.join(self.coordinator_dir, job_id, "tasks")
+            try:
+                names = sorted(os.listdir(tasks_dir))
+            except FileNotFoundError:
+                # Job being submitted or already cleaned up
+                continue
+            for name in names:
+                claimed_path = os.path.join(self.coordinator_dir, job_id, "claimed", name)
+                try:
+                    os.rename(os.path.join(tasks_dir, name), claimed_path)
+                except (FileNotFoundError, PermissionError):
+                    # Claimed by another worker
+                    continue
+                return os.path.join(self.coordinator_dir, job_id), load_object(claimed_path)
+        return None
+
+    def run_worker(self, idle_timeout_s: float = 0) -> int:
+        """
+        Claims and fits shard tasks until none has been available for idle_timeout_s.
+        Returns the number of tasks run.
+        """
+        n_tasks, idle_since = 0, time.monotonic()
+        while True:
+            claimed = self.claim()
+            if claimed is None:
+                if time.monotonic() - idle_since >= idle_timeout_s:
+                    return n_tasks
+                time.sleep(self.poll_interval_s)
+                continue
+            job_dir, task = claimed
+            name = f"shard_{task['shard']}"
+            try:
+                result = fit_shard(task["features_file_path"], task["labels_file_path"], task["shard"], task["n_shards"], task["params"])
+                save_object(os.path.join(job_dir, f"{name}.result.tmp"), result)
+                os.replace(os.path.join(job_dir, f"{name}.result.tmp"), os.path.join(job_dir, "results", f"{name}.pkl"))
+            except Exception:
+                with open(os.path.join(job_dir, "failed", f"{name}.txt"), "w") as failed_file:
+                    failed_file.write(f"{socket.gethostname()}\n{traceback.format_exc()}")
+            n_tasks += 1
+            idle_since = time.monotonic()
+
+
+class ShardedForestTrainer:
+    """
+    Data-parallel forest training for training sets too large for one fit.
+
+    The training rows are split into n_shards interleaved shards. Every worker fits a sub-forest
+    with its share of the trees and its own seed on one shard, reading only those rows from the
+    memory-mapped training arrays, and the sub-forests are merged into one RandomForestClassifier,
+    so the trained model plugs into MyModel like a forest fit at once.
+
+    - "process" coordinator: shards are fit by local worker processes.
+    - "file" coordinator: shards are handed out through a FileShardCoordinator directory, to
+      local_workers processes started here and/or workers on other hosts.
+    """
+
+    def __init__(self, sharding_config: dict):
+        """
+        Args:
+            sharding_config (dict): sharding section of config/model.yaml.
+        """
+        self.n_shards = sharding_config.get("n_shards", MODEL_TRAINER_SHARDING_N_SHARDS)
+        self.coordinator = sharding_config.get("coordinator", MODEL_TRAINER_SHARDING_COORDINATOR)
+        check_choice("coordinator", self.coordinator, SHARDING_COORDINATORS)
+        self.n_jobs_per_worker = sharding_config.get("n_jobs_per_worker", MODEL_TRAINER_SHARDING_N_JOBS_PER_WORKER)
+        self.coordinator_dir = sharding_config.get("coordinator_dir") or MODEL_TRAINER_SHARDING_COORDINATOR_DIR
+        self.local_workers = sharding_config.get("local_workers", MODEL_TRAINER_SHARDING_LOCAL_WORKERS)
+        self.timeout_s = sharding_config.get("timeout_s", MODEL_TRAINER_SHARDING_TIMEOUT_S)
+        self.shard_results = []
+
+    def get_shard_tasks(self, model: RandomForestClassifier, features_file_path: str, labels_file_path: str) -> list:
+        """
+        Returns one task per shard: the model parameters with the shard's trees, seed and cores.
+        """
+        params = model.get_params()
+        if params.get("warm_start"):
+            raise ValueError("Sharded training cannot grow a base forest (incremental mode)")
+        n_trees = [params["n_estimators"] // self.n_shards + (shard < params["n_estimators"] % self.n_shards)
+                   for shard in range(self.n_shards)]
+        if min(n_trees) == 0:
+            raise ValueError(f"{params['n_estimators']} trees cannot be split into {self.n_shards} shards")
+        seeds = np.random.SeedSequence(params["random_state"]).generate_state(self.n_shards)
+        return [{"shard": shard, "n_shards": self.n_shards,
+                 "features_file_path": os.path.abspath(features_file_path), "labels_file_path": os.path.abspath(labels_file_path),
+                 "params": {**params, "n_estimators": n_trees[shard], "random_state": int(seeds[shard]),
+                            "n_jobs": self.n_jobs_per_worker}}
+                for shard in range(self.n_shards)]
+
+    def fit(self, model, features_file_path: str, labels_file_path: str) -> RandomForestClassifier:
+        """
+        Fits the unfitted forest `model` shard by shard on the training arrays and returns the merged forest.
+        """
+        try:
+            if not isinstance(model, RandomForestClassifier):
+                raise ValueError(f"Sharded training needs a RandomForestClassifier, got {type(model).__name__}")
+            tasks = self.get_shard_tasks(model, features_file_path, labels_file_path)
+            logging.info(f"Fitting {model.n_estimators} trees on {self.n_shards} shards ({self.coordinator} coordinator)")
+            if self.coordinator == "process":
+                with ProcessPoolExecutor(max_workers=self.n_shards, mp_context=get_context("spawn")) as executor:
+                    futures = [executor.submit(fit_shard, task["features_file_path"], task["labels_file_path"],
+                                               task["shard"], task["n_shards"], task["params"]) for task in tasks]
+                    results = [future.result() for future in futures]
+            else:
+                results = self.fit_with_file_coordinator(tasks)
+            self.shard_results = [{key: value for key, value in result.items() if key != "forest"} for result in results]
+            logging.info(f"Shards fit: {self.shard_results}")
+            return merge_forests(results, len(np.load(labels_file_path, mmap_mode="r")))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def fit_with_file_coordinator(self, tasks: list) -> list:
+        """
+        Submits the tasks to the file coordinator, starts the local workers and waits for all shards.
+        """
+        coordinator = FileShardCoordinator(self.coordinator_dir, timeout_s=self.timeout_s)
+        job_dir = coordinator.submit(tasks)
+        workers = [subprocess.Popen([sys.executable, "-m", "src.components.sharded_training",
+                                     "--coordinator-dir", coordinator.coordinator_dir])
+                   for _ in range(min(self.local_workers, len(tasks)))]
+        try:
+            return coordinator.wait(job_dir, len(tasks), workers)
+        except Exception:
+            for worker in workers:
+                worker.terminate()
+            raise
+        finally:
+            for worker in workers:
+                worker.wait()
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded forest training worker of the file coordinator")
+    parser.add_argument("--coordinator-dir", default=MODEL_TRAINER_SHARDING_COORDINATOR_DIR, help="Directory shared with the trainer")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="Seconds to wait for new tasks before exiting")
+    args = parser.parse_args()
+
+    n_tasks = FileShardCoordinator(args.coordinator_dir).run_worker(idle_timeout_s=args.idle_timeout)
+    logging.info(f"Shard worker on {socket.gethostname()} exited after {n_tasks} tasks")
@@ -1,37 +1,117 @@
 import os
 import pymongo
 import sys
+import threading
+from pymongo.read_preferences import ReadPreference
 
 from src.exception import MyException
 from src.logger import logging
-from src.constants import DATABASE_NAME, MONGODB_URL_KEY
+from src.constants import (DATABASE_NAME, MONGODB_URL_KEY, MONGO_DB_MAX_POOL_SIZE, MONGO_DB_MIN_POOL_SIZE,
+                           MONGO_DB_SOCKET_TIMEOUT_MS, MONGO_DB_CONNECT_TIMEOUT_MS,
+                           MONGO_DB_SERVER_SELECTION_TIMEOUT_MS, MONGO_DB_COMPRESSORS,
+                           MONGO_DB_BULK_READ_PREFERENCE)
+
+# Read preferences that can be selected by name for bulk reads
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
 
 class MongoDBClient:
-    # Class variable to hold the MongoDB client instance (singleton pattern)
-    client = None
+    # Class-level cache of pooled MongoDB clients, one per connection URL and option set
+    clients = {}
+    _lock = threading.Lock()
 
-    def __init__(self, database_name: str = DATABASE_NAME):
+    def __init__(self,
+                 database_name: str = DATABASE_NAME,
+                 mongo_db_url: str = None,
+                 max_pool_size: int = MONGO_DB_MAX_POOL_SIZE,
+                 min_pool_size: int = MONGO_DB_MIN_POOL_SIZE,
+                 socket_timeout_ms: int = MONGO_DB_SOCKET_TIMEOUT_MS,
+                 connect_timeout_ms: int = MONGO_DB_CONNECT_TIMEOUT_MS,
+                 server_selection_timeout_ms: int = MONGO_DB_SERVER_SELECTION_TIMEOUT_MS,
+                 compressors: str = MONGO_DB_COMPRESSORS,
+                 bulk_read_preference: str = MONGO_DB_BULK_READ_PREFERENCE):
         """
         Initializes the MongoDBClient instance.
-        Establishes a connection to the MongoDB database if not already connected.
+        Reuses the pooled client for the same URL and options, creating it on first use.
+
+        Args:
+            database_name (str): Default database for this instance.
+            mongo_db_url (str, optional): Connection URL, defaults to the MONGO_DB_URL environment variable.
+            max_pool_size (int): Maximum number of connections in the pool.
+            min_pool_size (int): Minimum number of idle connections kept in the pool.
+            socket_timeout_ms (int): Socket read/write timeout.
+            connect_timeout_ms (int): Timeout for establishing a connection.
+            server_selection_timeout_ms (int): Timeout for finding a suitable server.
+            compressors (str): Comma separated wire compressors in order of preference (e.g. "zstd,snappy"),
+                empty to disable compression.
+            bulk_read_preference (str): Read preference used for bulk exports (e.g. "secondaryPreferred").
         """
         try:
-            # Check if the client is already initialized
-            if MongoDBClient.client is None:
-                mongo_db_url = MONGODB_URL_KEY  # Get MongoDB URL from constants
-                if mongo_db_url is None:
-                    # Raise exception if the MongoDB URL is not set
-                    raise Exception(f"Environment Variable is not set")
-                
-                # Create a new MongoDB client
-                MongoDBClient.client = pymongo.MongoClient(mongo_db_url)
-
-                # Assign the client and database to instance variables
-                self.client = MongoDBClient.client
-                self.database = self.client[database_name]
-                self.database_name = database_name
-                logging.info("MongoDB connection is established")
+            mongo_db_url = mongo_db_url or MONGODB_URL_KEY  # Get MongoDB URL from constants
+            if mongo_db_url is None:
+                # Raise exception if the MongoDB URL is not set
+                raise Exception(f"Environment Variable is not set")
+
+            # Get (or create) the pooled client and assign the default database
+            self.client = MongoDBClient.get_client(
+                mongo_db_url=mongo_db_url,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+                socketTimeoutMS=socket_timeout_ms,
+                connectTimeoutMS=connect_timeout_ms,
+                serverSelectionTimeoutMS=server_selection_timeout_ms,
+                compressors=compressors or None
+            )
+            self.bulk_read_preference = bulk_read_preference
+            self.database_name = database_name
+            self.database = self.client[database_name]
 
         except Exception as e:
             # Raise a custom exception if any error occurs
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    @classmethod
+    def get_client(cls, mongo_db_url: str, **client_options) -> pymongo.MongoClient:
+        """
+        Returns the pooled MongoClient for the URL and options, creating it if needed.
+        """
+        key = (mongo_db_url, tuple(sorted(client_options.items())))
+        with cls._lock:
+            if key not in cls.clients:
+                cls.clients[key] = pymongo.MongoClient(mongo_db_url, **client_options)
+                logging.info(f"MongoDB connection pool is established with options: {client_options}")
+            return cls.clients[key]
+
+    def get_database(self, database_name: str = None, bulk_read: bool = False):
+        """
+        Returns a handle to the given database (the default database if not given).
+
+        Args:
+            database_name (str, optional): Name of the database.
+            bulk_read (bool): Use the bulk read preference, e.g. to offload exports to secondaries.
+        """
+        try:
+            database_name = database_name or self.database_name
+            if bulk_read:
+                return self.client.get_database(
+                    database_name, read_preference=READ_PREFERENCES[self.bulk_read_preference]
+                )
+            return self.client[database_name]
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @classmethod
+    def close_all(cls):
+        """
+        Closes every pooled client.
+        """
+        with cls._lock:
+            for client in cls.clients.values():
+                client.close()
+            cls.clients.clear()
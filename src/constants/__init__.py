@@ -15,9 +15,69 @@ DATABASE_NAME = "vehicle-db"  # Name of the MongoDB database
 COLLECTION_NAME = "vehicle-data"  # Name of the main collection
 MONGODB_URL_KEY = MONGO_DB_URL  # MongoDB connection URL
 
+# MongoDB connection pool and wire protocol configuration
+MONGO_DB_MAX_POOL_SIZE: int = 50  # Maximum number of pooled connections per client
+MONGO_DB_MIN_POOL_SIZE: int = 0  # Minimum number of idle pooled connections
+MONGO_DB_SOCKET_TIMEOUT_MS: int = 120000  # Socket read/write timeout (large exports need long reads)
+MONGO_DB_CONNECT_TIMEOUT_MS: int = 20000  # Timeout for opening a connection
+MONGO_DB_SERVER_SELECTION_TIMEOUT_MS: int = 30000  # Timeout for selecting a server
+MONGO_DB_COMPRESSORS: str = "zstd,snappy"  # Wire compressors in order of preference ("" disables compression)
+MONGO_DB_BULK_READ_PREFERENCE: str = "secondaryPreferred"  # Read preference for bulk exports
+MONGO_DB_EXPORT_BATCH_SIZE: int = 10000  # Documents fetched per cursor batch during exports
+
 # Pipeline and artifact directory configuration
 PIPELINE_NAME : str = ""  # Name of the pipeline (to be set as needed)
 ARTFACT_DIR: str = "artifacts"  # Directory to store pipeline artifacts
+RUN_TIMESTAMP_FORMAT: str = "%m_%d_%Y_%H_%M_%S"  # Format of the per-run artifact directory name
+ARTIFACT_STORE_MEMORY_BUDGET_MB: int = 2048  # Memory budget for artifacts handed between stages in one run
+ARTIFACT_STORE_REPORT_FILE_NAME: str = "artifact_io_report.json"  # Per-stage artifact read/write report
+ARTIFACT_STORE_MMAP_MODE: str = "r"  # Array artifacts not held in memory are memory-mapped read-only (None loads them fully)
+
+# Run checkpoints (resume a failed run from its first incomplete stage)
+CHECKPOINT_DIR_NAME: str = "checkpoints"  # Directory of the stage completion manifests inside a run directory
+RESUME_LATEST_RUN: str = "latest"  # Resumes the most recent run holding checkpoints
+
+# Pipeline stage DAG (independent stages run concurrently)
+PIPELINE_DAG_MAX_WORKERS: int = 2  # Stages running at once, across thread and process stages
+PIPELINE_DAG_REPORT_FILE_NAME: str = "pipeline_dag_report.json"  # Per-run stage timings and critical path
+
+# Stage profiling (wall and CPU time, memory, rows and bytes of every pipeline stage)
+STAGE_PROFILE_MEMORY_METHOD: str = "rss"  # "rss" samples the resident set size, "tracemalloc" also traces Python/numpy allocations (slower)
+STAGE_PROFILE_SAMPLE_INTERVAL_S: float = 0.05  # Seconds between resident set size samples
+STAGE_PROFILE_REPORT_FILE_NAME: str = "stage_profile_report.json"  # Per-run stage profile report
+STAGE_PROFILE_REGRESSION_THRESHOLD: float = 0.2  # Relative increase of a stage metric reported as a regression by the run diff
+STAGE_PROFILE_REGRESSION_MIN_DELTAS: dict = {  # Absolute increase below which a metric change is noise, not a regression
+    "wall_time_s": 1.0,
+    "cpu_time_s": 1.0,
+    "peak_rss_mb": 64,
+    "rss_delta_mb": 64,
+    "peak_traced_mb": 64,
+    "bytes_read": 16 * 1024 ** 2,
+    "bytes_written": 16 * 1024 ** 2,
+    "os_bytes_read": 16 * 1024 ** 2,
+    "os_bytes_written": 16 * 1024 ** 2,
+}
+
+# Content-addressed artifact storage (identical run outputs stored once) and retention
+BLOB_STORE_ENABLED: bool = False  # Opt-in: store run artifacts in the blob store and apply the retention policy after every run; otherwise run it with python -m src.data_access.blob_store gc (--dry-run first)
+BLOB_STORE_DIR: str = "blob_store"  # Directory of the blobs shared by all runs (same filesystem as the artifacts, for hard links)
+BLOB_MANIFEST_FILE_NAME: str = "blob_manifest.json"  # Per-run mapping of artifact paths to blob digests
+RETENTION_KEEP_LAST_RUNS: int = 5  # Newest run directories kept in full
+RETENTION_KEEP_PUSHED_MODELS: bool = True  # Older runs that pushed their model keep the trained model
+RETENTION_MAX_SIZE_MB: int = 20480  # Size cap of the blobs of the kept runs; the oldest runs are dropped beyond it
+
+# Stage cache configuration (reuse stage artifacts of earlier runs when their inputs did not change)
+STAGE_CACHE_ENABLED: bool = True  # Look up and store stage artifacts in the stage cache
+STAGE_CACHE_DIR: str = "stage_cache"  # Directory shared by all runs holding the cached stage artifacts
+STAGE_CACHE_MAX_SIZE_MB: int = 4096  # Size of the cache beyond which the least recently used entries are evicted
+STAGE_CACHE_REPORT_FILE_NAME: str = "stage_cache_report.json"  # Per-run report of skipped stages and time saved
+STAGE_CACHE_STAGES: list = ["data_ingestion", "data_validation", "data_transformation", "model_trainer"]  # Cacheable stages
+STAGE_CACHE_SCHEMA_SECTIONS: dict = {  # Schema sections each cached stage depends on
+    "data_ingestion": ["columns", "drop_columns", "export_drop_columns", "categorical_mappings", "compact_dtypes"],
+    "data_validation": ["columns", "drop_columns", "export_drop_columns", "categorical_mappings", "value_ranges", "max_null_rates"],
+    "data_transformation": ["numerical_columns", "categorical_columns", "num_features", "mm_columns", "drop_columns", "categorical_mappings"],
+    "model_trainer": [],
+}
 
 # File names for data processing
 FILE_NAME: str = "data.csv"  # Raw data file name
@@ -30,18 +90,61 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"  # Directory for data ingestion
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"  # Directory for feature store
 DATA_INGESTION_INGESTED_DIR: str = "ingested"  # Directory for ingested data
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25  # Train-test split ratio for data ingestion
+DATA_INGESTION_FILE_FORMAT: str = "parquet"  # Format of ingestion artifacts: "csv", "parquet" or "feather" (Arrow IPC)
+DATA_INGESTION_FILE_COMPRESSION: str = "zstd"  # Compression codec used for columnar ingestion artifacts
+DATA_INGESTION_EXPORT_MODE: str = "aggregate"  # "find" (clean in pandas) or "aggregate" (clean in a server-side pipeline)
+DATA_INGESTION_ENCODE_CATEGORICALS: bool = False  # Encode categorical columns on the server in "aggregate" mode
+DATA_INGESTION_SPLIT_MODE: str = "random"  # "random" (in-memory train_test_split) or "hash" (streaming split on the record id)
+DATA_INGESTION_STRATIFY: bool = False  # Stratify the streaming split on the target column
+DATA_INGESTION_STRATIFY_CLASS_RATIOS: dict = {}  # Test ratio of a target class in the stratified streaming split (other classes use the split ratio)
+DATA_INGESTION_SPLIT_ID_COLUMN: str = "id"  # Record id used by the streaming split
+DATA_INGESTION_SPLIT_HASH_KEY: str = "vehicle-split-01"  # 16 character key of the deterministic split hash
+DATA_INGESTION_SPLIT_WORKERS: int = 2  # Threads writing the train and test files concurrently (1 writes them in turn)
+ARTIFACT_FILE_EXTENSIONS: dict = {"csv": "csv", "parquet": "parquet", "feather": "arrow"}  # File extension per artifact format
 
 # Data validation constants
 DATA_VALIDATION_DIR_NAME: str = "data_validation"  # Directory for data validation artifacts
 DATA_VALIDATION_REPORT_FILE_NAME:str = "reports.yaml"  # File name for data validation report
+DATA_VALIDATION_MODE: str = "full"  # "full" counts every violation, "early_abort" stops at the first failing chunk
+DATA_VALIDATION_CHUNK_SIZE: int = 1_000_000  # Rows validated per chunk
+DATA_VALIDATION_MAX_NULL_RATE: float = 0.0  # Allowed share of nulls for columns without a max_null_rates entry in the schema
+DATA_VALIDATION_PROFILE_FILE_NAME: str = "profile.json"  # Column profile (sketches) of the validated data
+DATA_VALIDATION_PROFILE_WORKERS: int = 4  # Threads profiling chunks in parallel
+DATA_VALIDATION_SPLIT_WORKERS: int = 2  # Threads validating the train and test files concurrently ("full" mode)
+DATA_VALIDATION_PSI_THRESHOLD: float = 0.2  # PSI above which a column is reported as drifted
+DATA_VALIDATION_FAIL_ON_DRIFT: bool = False  # Fail validation when a column drifted from the previous run
+
+# Column profile sketch constants
+PROFILE_HISTOGRAM_BINS: int = 20  # Fixed histogram bins spanning the schema value range
+PROFILE_QUANTILE_SKETCH_SIZE: int = 256  # Items kept per quantile sketch level
+PROFILE_HLL_PRECISION: int = 12  # Distinct count sketch uses 2^precision registers
 
 # Path to the schema file used for data validation
 SCHEMA_FILE_PATH = os.path.join("config","schema.yaml")  # Path to schema file
+FLOAT32_RELATIVE_TOLERANCE: float = 1e-6  # Max relative error allowed when compacting float64 columns to float32
 
 # Data transformation constants
 DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"  # Directory for data transformation artifacts
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"  # Directory for transformed data
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"  # Directory for transformed objects
+DATA_TRANSFORMATION_ARRAY_DTYPE: str = "float32"  # Dtype of the transformed train/test feature arrays
+DATA_TRANSFORMATION_LABEL_DTYPE: str = "int8"  # Dtype of the transformed train/test label arrays
+DATA_TRANSFORMATION_MODE: str = "in_memory"  # "in_memory" or "out_of_core" (fit scalers with partial_fit over streamed chunks)
+DATA_TRANSFORMATION_SPLIT_WORKERS: int = 2  # Threads reading, transforming and writing train and test concurrently
+DATA_TRANSFORMATION_CHUNK_SIZE: int = 500_000  # Rows read, fitted and transformed per chunk in "out_of_core" mode
+DATA_TRANSFORMATION_VALIDATION_SPLIT_RATIO: float = 0.1  # Share of every class of the training rows held out for validation before rebalancing, only when search or compaction is enabled in config/model.yaml (0 disables)
+DATA_TRANSFORMATION_VALIDATION_RANDOM_STATE: int = 42  # Seed of the validation rows selection
+VALIDATION_FILE_NAME: str = "validation.csv"  # Validation data file name (held out of the training rows)
+
+# Class rebalancing constants (training set only)
+REBALANCING_STRATEGY: str = "smote_enn"  # "none", "class_weight", "undersample", "smote" or "smote_enn"
+REBALANCING_SAMPLING_RATIO: float = 1.0  # Target size of the other classes relative to the majority class
+REBALANCING_SMOTE_NEIGHBORS: int = 5  # Minority neighbors used to synthesize a row
+REBALANCING_ENN_NEIGHBORS: int = 3  # Neighbors that must agree with a majority row for ENN to keep it
+REBALANCING_ENN_REFERENCE_SIZE: int = 50_000  # Rows sampled as the ENN neighbor search space
+REBALANCING_CHUNK_SIZE: int = 100_000  # Rows queried or synthesized per chunk
+REBALANCING_N_JOBS: int = -1  # Cores used by neighbor searches
+REBALANCING_RANDOM_STATE: int = 42  # Seed of the rebalancing sampling
 
 # Model trainer constants
 MODEL_TRAINER_DIR_NAME: str = "model_trainer"  # Directory for model trainer artifacts
@@ -55,11 +158,48 @@ MODEL_TRAINER_MIN_SAMPLES_LEAF: int = 6  # Minimum samples required to be at a l
 MIN_SAMPLES_SPLIT_MAX_DEPTH: int = 10  # Maximum depth of the tree
 MIN_SAMPLES_SPLIT_CRITERION: str = "entropy"  # Criterion for splitting
 MIN_SAMPLES_SPLIT_RANDOM_STATE: int = 101  # Random state for reproducibility
+MODEL_TRAINER_ESTIMATOR: str = "random_forest"  # Model built by the model factory ("random_forest" or "hist_gradient_boosting")
+MODEL_TRAINER_HGB_MAX_ITER: int = 300  # Boosting iterations of the histogram gradient boosting model
+MODEL_TRAINER_HGB_LEARNING_RATE: float = 0.1  # Shrinkage of every boosting iteration
+MODEL_TRAINER_HGB_MAX_LEAF_NODES: int = 31  # Leaves per boosted tree
+MODEL_TRAINER_HGB_MIN_SAMPLES_LEAF: int = 20  # Minimum samples per leaf of a boosted tree
+MODEL_TRAINER_HGB_MAX_BINS: int = 255  # Feature bins (features are binned into uint8)
+MODEL_TRAINER_HGB_EARLY_STOPPING: bool = True  # Stop boosting when the validation loss stops improving
+MODEL_TRAINER_N_JOBS: int = -1  # Cores used to fit and predict (overridden by parallelism.n_jobs in model.yaml)
+MODEL_TRAINER_PARALLEL_BACKEND: str = "threading"  # joblib backend of the forest ("threading" or "loky")
+MODEL_TRAINER_MAX_MEMORY_MB: int = 4096  # Memory limit used to cap the number of parallel workers
+MODEL_TRAINER_INCREMENTAL_N_ESTIMATORS: int = 50  # Trees added to the base forest in incremental mode
+MODEL_TRAINER_SHARDING_N_SHARDS: int = 4  # Shards of the training rows in sharded training, one sub-forest each
+MODEL_TRAINER_SHARDING_COORDINATOR: str = "process"  # "process" (local worker processes) or "file" (shared directory)
+MODEL_TRAINER_SHARDING_N_JOBS_PER_WORKER: int = 1  # Cores used by every shard worker
+MODEL_TRAINER_SHARDING_COORDINATOR_DIR: str = "sharded_training"  # Directory of the file coordinator, shared with the workers
+MODEL_TRAINER_SHARDING_LOCAL_WORKERS: int = 4  # Worker processes started by the trainer with the file coordinator
+MODEL_TRAINER_SHARDING_TIMEOUT_S: int = 3600  # Time to wait for all shards with the file coordinator
+MODEL_TRAINER_COMPACTION_MAX_F1_LOSS: float = 0.005  # F1 loss beyond which forest compaction is rejected
+MODEL_TRAINER_COMPACTION_MIN_TREES: int = 20  # Fewest trees kept by forest compaction
+MODEL_TRAINER_COMPACTION_VALIDATION_FRACTION: float = 0.5  # Share of the validation rows ranking the trees, the rest guards the F1 loss
+MODEL_TRAINER_COMPACTION_THRESHOLD_DTYPE: str = "float32"  # Split thresholds of the compact forest ("float32" or "float16")
+MODEL_TRAINER_COMPACTION_LEAF_DTYPE: str = "uint8"  # Leaf probabilities of the compact forest ("uint8" or "float16")
+MODEL_TRAINER_COMPACTION_REPORT_FILE_NAME: str = "compaction_report.json"  # Size, load time and latency before and after compaction
+MODEL_TRAINER_TRAINING_METRICS_SOURCE: str = "predict"  # Training metrics from a prediction pass ("predict") or out-of-bag estimates ("oob", lower accuracy: adjust MODEL_TRAINER_EXPECTED_SCORE)
+MODEL_TRAINER_SCORING_CHUNK_SIZE: int = 500_000  # Rows predicted at once when scoring
+MODEL_TRAINER_SEARCH_LEADERBOARD_FILE_NAME: str = "search_leaderboard.json"  # Trials of the hyperparameter search
+MODEL_TRAINER_SEARCH_METHOD: str = "successive_halving"  # "successive_halving" or "hyperband"
+MODEL_TRAINER_SEARCH_N_CANDIDATES: int = 27  # Candidates sampled from the search space (successive halving)
+MODEL_TRAINER_SEARCH_ETA: int = 3  # Each rung keeps 1/eta of the candidates and gives them eta times more rows
+MODEL_TRAINER_SEARCH_MIN_SAMPLES: int = 20_000  # Training rows of the first rung
+MODEL_TRAINER_SEARCH_MAX_SAMPLES: int = None  # Training rows of the last rung (None for all)
+MODEL_TRAINER_SEARCH_MAX_WORKERS: int = -1  # Processes evaluating candidates concurrently (-1 for all cores)
+MODEL_TRAINER_SEARCH_RANDOM_STATE: int = 42  # Seed of the candidate sampling and row subsets
 
 # Preprocessing and target column constants
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"  # File name for the preprocessing object (pickle file)
 TARGET_COLUMN = "Response"  # Name of the target column
 
+# Synthetic data generation constants (benchmarks and scaling tests)
+SYNTHETIC_DATA_POSITIVE_RATE: float = 0.12  # Share of Response == 1 in generated records
+SYNTHETIC_DATA_SEED: int = 42  # Base random seed of the generator
+
 # AWS credentials and region configuration
 AWS_ACCESS_KEY_ID_ENV_KEY = AWS_ACCESS_KEY_ID  # AWS access key ID
 AWS_SECRET_ACCESS_KEY_ENV_KEY = AWS_SECRET_ACCESS_KEY  # AWS secret access key
@@ -67,6 +207,9 @@ REGION_NAME = "us-east-1"  # AWS region name
 
 # Model evaluation and S3 bucket configuration
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE : float = 0.02  # Threshold for model evaluation score change
+MODEL_EVALUATION_CHUNK_SIZE: int = 500_000  # Test rows scored at once by each model
+MODEL_EVALUATION_PREDICTION_CACHE_DIR: str = "prediction_cache"  # Directory shared by all runs holding the cached production model predictions
+MODEL_EVALUATION_PREDICTION_CACHE_MAX_ENTRIES: int = 8  # Cached prediction files kept, least recently used removed first
 MODEL_BUCKET_NAME = "vehicle-model-bucket-1"  # S3 bucket name for model storage
 MODEL_PUSHER_S3_KEY = "model-registry"  # S3 key for model registry
 MODEL_FILE_NAME = "model.pkl"  # Model file name for S3 upload
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import dill
+import numpy as np
+import pandas as pd
+
+from src.constants import ARTIFACT_STORE_MEMORY_BUDGET_MB, ARTIFACT_STORE_MMAP_MODE
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import save_dataframe, read_dataframe, iter_dataframe_chunks, count_dataframe_rows, save_numpy_data, load_numpy_data, save_object, load_object, replace_file
+
+
+class ArtifactStore:
+    """
+    Hands artifacts (dataframes, numpy arrays and python objects) from one pipeline stage to the next.
+
+    Every artifact is persisted to its file path for reproducibility, and the most recently
+    produced ones are also kept in memory (up to a byte budget, least recently used first out)
+    so later stages of the same run can reuse them without going back to disk. The memory copy
+    is private to the store: mutating a saved or loaded artifact never changes what later loads return.
+    Bytes read and written are tracked per pipeline stage.
+    """
+
+    def __init__(self, memory_budget_bytes: int = ARTIFACT_STORE_MEMORY_BUDGET_MB * 1024 ** 2):
+        """
+        Args:
+            memory_budget_bytes (int): Maximum number of bytes kept in memory.
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self._cache = OrderedDict()  # Absolute file path -> (artifact copy or serialized object, size in bytes)
+        self._cached_bytes = 0
+        self._stage_stats = {}
+        self._local = threading.local()  # Current stage name, per thread
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        """
+        Attributes the reads and writes performed inside the context to the given pipeline stage.
+        """
+        previous_stage = getattr(self._local, "stage", None)
+        self._local.stage = stage_name
+        try:
+            yield self
+        finally:
+            self._local.stage = previous_stage
+
+    def run_concurrently(self, tasks: list, max_workers: int) -> list:
+        """
+        Runs independent tasks (e.g. the train and test halves of a stage) on up to max_workers threads,
+        attributing their reads and writes to the calling stage. Returns their results in order.
+        """
+        try:
+            stage_name = getattr(self._local, "stage", None)
+
+            def run_in_stage(task):
+                with self.stage(stage_name):
+                    return task()
+
+            if max_workers <= 1 or len(tasks) <= 1:
+                return [task() for task in tasks]
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+                futures = [executor.submit(run_in_stage, task) for task in tasks]
+                return [future.result() for future in futures]
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _record(self, **counters):
+        # Add counters to the statistics of the current stage
+        stage_name = getattr(self._local, "stage", None) or "default"
+        with self._lock:
+            stats = self._stage_stats.setdefault(stage_name, {
+                "disk_bytes_written": 0,
+                "disk_bytes_read": 0,
+                "disk_reads": 0,
+                "memory_hits": 0,
+                "memory_bytes_served": 0,
+            })
+            for key, value in counters.items():
+                stats[key] += value
+
+    def _put(self, file_path: str, artifact, size: int):
+        # Keep the artifact in memory, evicting the least recently used ones beyond the budget
+        key = os.path.abspath(file_path)
+        with self._lock:
+            self._drop(key)
+            if size > self.memory_budget_bytes:
+                logging.info(f"Artifact {file_path} ({size} bytes) exceeds the memory budget, kept on disk only")
+                return
+            self._cache[key] = (artifact, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.memory_budget_bytes:
+                evicted_key, (_, evicted_size) = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted_size
+                logging.info(f"Evicted {evicted_key} from artifact store memory")
+
+    def _drop(self, key: str):
+        # Remove an artifact from memory if present
+        if key in self._cache:
+            _, size = self._cache.pop(key)
+            self._cached_bytes -= size
+
+    def _get(self, file_path: str):
+        # Return the in-memory artifact for the file path, or None
+        key = os.path.abspath(file_path)
+        with self._lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            artifact, size = self._cache[key]
+        self._record(memory_hits=1, memory_bytes_served=size)
+        return artifact
+
+    def save_dataframe(self, file_path: str, dataframe: pd.DataFrame, compression: str = None):
+        """
+        Persists a dataframe artifact and keeps a copy of it in memory.
+        """
+        try:
+            save_dataframe(file_path, dataframe, compression=compression)
+            self._record(disk_bytes_written=os.path.getsize(file_path))
+            self._put(file_path, dataframe.copy(), int(dataframe.memory_usage(deep=True).sum()))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def read_dataframe(self, file_path: str, columns: list = None) -> pd.DataFrame:
+        """
+        Returns a dataframe artifact from memory (as a copy) if available, otherwise reads it from disk.
+        """
+        try:
+            dataframe = self._get(file_path)
+            if dataframe is not None:
+                return (dataframe[columns] if columns is not None else dataframe).copy()
+            self._record(disk_bytes_read=os.path.getsize(file_path), disk_reads=1)
+            return read_dataframe(file_path, columns=columns)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def iter_dataframe_chunks(self, file_path: str, chunk_size: int, columns: list = None):
+        """
+        Yields a dataframe artifact in chunks of at most chunk_size rows, sliced from memory
+        if available, otherwise read chunk by chunk from disk.
+        """
+        try:
+            dataframe = self._get(file_path)
+            if dataframe is not None:
+                if columns is not None:
+                    dataframe = dataframe[columns]
+                for start in range(0, len(dataframe), chunk_size):
+                    yield dataframe.iloc[start:start + chunk_size].copy()
+                return
+            self._record(disk_bytes_read=os.path.getsize(file_path), disk_reads=1)
+            yield from iter_dataframe_chunks(file_path, chunk_size, columns=columns)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def count_rows(self, file_path: str) -> int:
+        """
+        Returns the number of rows of a dataframe artifact, from memory if available, otherwise from the file metadata.
+        """
+        try:
+            with self._lock:
+                cached = self._cache.get(os.path.abspath(file_path))
+            if cached is not None:
+                return len(cached[0])
+            return count_dataframe_rows(file_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def save_array(self, file_path: str, array: np.ndarray):
+        """
+        Persists a numpy array artifact and keeps a read-only copy of it in memory.
+        """
+        try:
+            save_numpy_data(file_path, array)
+            self._record(disk_bytes_written=os.path.getsize(file_path))
+            array = np.array(array)
+            array.flags.writeable = False
+            self._put(file_path, array, array.nbytes)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def load_array(self, file_path: str, mmap_mode: str = ARTIFACT_STORE_MMAP_MODE) -> np.ndarray:
+        """
+        Returns a numpy array artifact from memory if available, otherwise opens it from disk,
+        memory-mapped by default so pages are only read when used and slices are zero-copy views.
+        Arrays served from memory or mapped read-only cannot be modified.
+        """
+        try:
+            array = self._get(file_path)
+            if array is not None:
+                return array
+            self._record(disk_bytes_read=os.path.getsize(file_path), disk_reads=1)
+            return load_numpy_data(file_path, mmap_mode=mmap_mode)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def save_object(self, file_path: str, obj):
+        """
+        Persists a python object artifact with dill and keeps its serialized bytes in memory.
+        """
+        try:
+            save_object(file_path, obj)
+            # The bytes just written (from the page cache), so loads rebuild exactly the file content
+            with open(file_path, "rb") as file_obj:
+                payload = file_obj.read()
+            self._record(disk_bytes_written=len(payload))
+            self._put(file_path, payload, len(payload))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def load_object(self, file_path: str):
+        """
+        Returns a python object artifact, deserialized from memory if available, otherwise loaded from disk.
+        """
+        try:
+            payload = self._get(file_path)
+            if payload is not None:
+                return dill.loads(payload)
+            self._record(disk_bytes_read=os.path.getsize(file_path), disk_reads=1)
+            return load_object(file_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def record_disk_write(self, file_path: str):
+        """
+        Accounts for an artifact file written outside the store (e.g. streamed chunk by chunk).
+        """
+        self._record(disk_bytes_written=os.path.getsize(file_path))
+
+    def report(self) -> dict:
+        """
+        Returns the per-stage read/write statistics and the current memory usage.
+        """
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "memory_bytes_in_use": self._cached_bytes,
+                "stages": {stage_name: dict(stats) for stage_name, stats in self._stage_stats.items()},
+            }
+
+    def save_report(self, file_path: str):
+        """
+        Writes the statistics report to a JSON file.
+        """
+        try:
+            with replace_file(file_path) as tmp_path, open(tmp_path, "w") as report_file:
+                json.dump(self.report(), report_file, indent=4)
+        except Exception as e:
+            raise MyException(e, sys)
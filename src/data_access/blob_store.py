@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import stat
+import shutil
+import argparse
+from datetime import datetime
+
+from src.constants import (BLOB_STORE_DIR, BLOB_MANIFEST_FILE_NAME, CHECKPOINT_DIR_NAME, RUN_TIMESTAMP_FORMAT, ARTFACT_DIR,
+                           RETENTION_KEEP_LAST_RUNS, RETENTION_KEEP_PUSHED_MODELS, RETENTION_MAX_SIZE_MB)
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import get_file_digest
+
+
+def list_run_dirs(artifacts_dir: str) -> list:
+    """
+    Returns the run directories (artifacts/<timestamp>), newest first.
+    """
+    runs = []
+    for run_name in os.listdir(artifacts_dir) if os.path.isdir(artifacts_dir) else []:
+        try:
+            runs.append((datetime.strptime(run_name, RUN_TIMESTAMP_FORMAT), os.path.join(artifacts_dir, run_name)))
+        except ValueError:
+            continue
+    return [run_dir for _, run_dir in sorted(runs, reverse=True)]
+
+
+class BlobStore:
+    """
+    Content-addressed storage of run artifacts, shared by all runs.
+
+    Every file of a run is stored once under objects/<digest[:2]>/<digest> and the file in the run
+    directory is replaced by a hard link to it, so identical outputs of different runs (unchanged
+    data, preprocessing objects, models) take disk space once while every run directory keeps
+    working as before. Each run directory holds a manifest mapping its relative paths to digests,
+    from which missing files can be restored. Blobs are read-only: artifact writers replace files
+    instead of truncating them (see replace_file), and a run directory that is written to again
+    (resumed, or a reused run timestamp) is detached first. Blobs and runs are dropped by the
+    retention policy of collect_garbage.
+    """
+
+    def __init__(self, blob_dir: str = BLOB_STORE_DIR, file_digest=get_file_digest):
+        """
+        Args:
+            blob_dir (str): Directory of the blobs, on the same filesystem as the run directories (hard links).
+            file_digest (callable): Returns the content digest of a file (e.g. memoized by the stage cache).
+        """
+        self.blob_dir = blob_dir
+        self.objects_dir = os.path.join(blob_dir, "objects")
+        self.file_digest = file_digest
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    @staticmethod
+    def manifest_path(run_dir: str) -> str:
+        return os.path.join(run_dir, BLOB_MANIFEST_FILE_NAME)
+
+    def load_manifest(self, run_dir: str):
+        """
+        Returns the blob manifest of a run, None for runs not stored in the blob store.
+        """
+        try:
+            with open(self.manifest_path(run_dir)) as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, run_dir: str, manifest: dict):
+        # Written atomically, so a crash never leaves a partial manifest
+        tmp_path = f"{self.manifest_path(run_dir)}.tmp"
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+        os.replace(tmp_path, self.manifest_path(run_dir))
+
+    def put_file(self, file_path: str) -> str:
+        """
+        Stores a file in the blob store and replaces it with a hard link to its blob. Returns its digest.
+        Files on another filesystem than the blob store are left as they are.
+        """
+        try:
+            digest = self.file_digest(file_path)
+            blob_path = self.blob_path(digest)
+            if os.path.exists(blob_path) and os.path.samefile(blob_path, file_path):
+                return digest
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+            try:
+                if not os.path.exists(blob_path):
+                    # New content: the run file becomes the blob
+                    os.link(file_path, tmp_path)
+                    os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                    os.replace(tmp_path, blob_path)
+                else:
+                    # Known content: the run file is swapped for a link to the existing blob
+                    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+                    os.link(blob_path, tmp_path)
+                    os.replace(tmp_path, file_path)
+            except OSError as link_error:
+                logging.info(f"{file_path} not deduplicated, hard link to the blob store failed: {link_error}")
+            return digest
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def ingest_run(self, run_dir: str) -> dict:
+        """
+        Stores every file of a run directory in the blob store and writes the run manifest.
+        A run whose model pusher completed (checkpoint of the stage present) is marked as pushed.
+        """
+        try:
+            files, stored_bytes = {}, 0
+            for root, _, file_names in os.walk(run_dir):
+                for file_name in file_names:
+                    file_path = os.path.join(root, file_name)
+                    relative_path = os.path.relpath(file_path, run_dir)
+                    if relative_path == BLOB_MANIFEST_FILE_NAME or os.path.islink(file_path) or file_name.endswith(".tmp"):
+                        continue
+                    size = os.path.getsize(file_path)
+                    files[relative_path] = {"digest": self.put_file(file_path), "size": size}
+                    stored_bytes += size
+            manifest = {
+                "files": files,
+                "pushed": os.path.isfile(os.path.join(run_dir, CHECKPOINT_DIR_NAME, "model_pusher.json")),
+                "size_bytes": stored_bytes,
+                "stored_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._write_manifest(run_dir, manifest)
+            logging.info(f"Run {run_dir} stored in the blob store: {len(files)} files, {stored_bytes} bytes")
+            return manifest
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def materialize(self, run_dir: str) -> int:
+        """
+        Restores the files of a run missing from its directory by linking (or copying) their blobs.
+        Returns the number of files restored.
+        """
+        try:
+            manifest = self.load_manifest(run_dir)
+            restored = 0
+            for relative_path, entry in (manifest or {"files": {}})["files"].items():
+                file_path = os.path.join(run_dir, relative_path)
+                if os.path.exists(file_path):
+                    continue
+                blob_path = self.blob_path(entry["digest"])
+                if not os.path.exists(blob_path):
+                    logging.info(f"Blob of {file_path} was collected, file not restored")
+                    continue
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                try:
+                    os.link(blob_path, file_path)
+                except OSError:
+                    shutil.copyfile(blob_path, file_path)
+                restored += 1
+            return restored
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def detach_run(self, run_dir: str):
+        """
+        Replaces the blob links of a run directory with private writable copies, so the run can be
+        written to again (e.g. resumed) without modifying the blobs shared with other runs.
+        """
+        try:
+            manifest = self.load_manifest(run_dir)
+            if manifest is None:
+                return
+            self.materialize(run_dir)
+            for relative_path in manifest["files"]:
+                file_path = os.path.join(run_dir, relative_path)
+                if os.path.isfile(file_path) and os.stat(file_path).st_nlink > 1:
+                    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+                    shutil.copyfile(file_path, tmp_path)
+                    os.replace(tmp_path, file_path)
+            os.remove(self.manifest_path(run_dir))
+            logging.info(f"Run {run_dir} detached from the blob store")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _prune_run(self, run_dir: str, manifest: dict, keep_files: list):
+        # Delete every file of a run but keep_files, and drop them from its manifest
+        for relative_path in list(manifest["files"]):
+            if relative_path not in keep_files:
+                file_path = os.path.join(run_dir, relative_path)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                del manifest["files"][relative_path]
+        manifest["pruned"] = True
+        manifest["size_bytes"] = sum(entry["size"] for entry in manifest["files"].values())
+        self._write_manifest(run_dir, manifest)
+
+    def collect_garbage(self, artifacts_dir: str = ARTFACT_DIR, keep_last_runs: int = RETENTION_KEEP_LAST_RUNS,
+                        keep_pushed_models: bool = RETENTION_KEEP_PUSHED_MODELS, max_size_bytes: int = RETENTION_MAX_SIZE_MB * 1024 ** 2,
+                        pushed_model_files: list = (), dry_run: bool = False) -> dict:
+        """
+        Applies the retention policy to the run directories, then deletes the blobs no kept run refers to.
+
+        The newest keep_last_runs runs are kept; older runs are deleted, except that runs which pushed
+        their model keep pushed_model_files (e.g. the trained model) when keep_pushed_models is set.
+        While the blobs of the kept runs exceed max_size_bytes, the oldest kept runs are dropped the
+        same way (the newest run always stays). Runs without a manifest (failed, still running or
+        older than the blob store) are left out of the size cap and only stored when pruned.
+
+        Returns:
+            dict: Kept, pruned and deleted runs, and blobs and bytes freed (planned only with dry_run).
+        """
+        try:
+            runs = list_run_dirs(artifacts_dir)
+            manifests = {run_dir: self.load_manifest(run_dir) for run_dir in runs}
+            kept = runs[:max(keep_last_runs, 1)]
+            dropped = runs[len(kept):]
+
+            def is_pushed(run_dir):
+                manifest = manifests[run_dir]
+                if manifest is not None:
+                    return manifest.get("pushed", False)
+                return os.path.isfile(os.path.join(run_dir, CHECKPOINT_DIR_NAME, "model_pusher.json"))
+
+            def live_files(run_dir):
+                files = (manifests[run_dir] or {"files": {}})["files"]
+                if run_dir in kept:
+                    return files
+                if keep_pushed_models and is_pushed(run_dir):
+                    return {path: entry for path, entry in files.items() if path in pushed_model_files}
+                return {}
+
+            def live_blobs():
+                return {entry["digest"]: entry["size"] for run_dir in runs for entry in live_files(run_dir).values()}
+
+            while sum(live_blobs().values()) > max_size_bytes and len(kept) > 1:
+                dropped.insert(0, kept.pop())
+            if not dry_run:
+                for run_dir in dropped:
+                    # Unmanaged runs keeping their model are stored first, so the model is deduplicated and restorable
+                    if manifests[run_dir] is None and keep_pushed_models and is_pushed(run_dir):
+                        manifests[run_dir] = self.ingest_run(run_dir)
+            live = live_blobs()
+
+            report = {"kept_runs": kept, "pruned_runs": [], "deleted_runs": [], "deleted_blobs": 0, "freed_bytes": 0,
+                      "live_bytes": sum(live.values()), "dry_run": dry_run}
+            for run_dir in dropped:
+                keep_files = live_files(run_dir)
+                if keep_files or (keep_pushed_models and is_pushed(run_dir)):
+                    # Unmanaged only in a dry run, where it would be stored then pruned
+                    if manifests[run_dir] is None or set(manifests[run_dir]["files"]) != set(keep_files):
+                        report["pruned_runs"].append(run_dir)
+                        if not dry_run:
+                            self._prune_run(run_dir, manifests[run_dir], list(keep_files))
+                else:
+                    report["deleted_runs"].append(run_dir)
+                    if not dry_run:
+                        shutil.rmtree(run_dir, ignore_errors=True)
+            for root, _, file_names in os.walk(self.objects_dir):
+                for digest in file_names:
+                    if digest in live or digest.endswith(".tmp"):
+                        continue
+                    blob_path = os.path.join(root, digest)
+                    report["deleted_blobs"] += 1
+                    report["freed_bytes"] += os.path.getsize(blob_path)
+                    if not dry_run:
+                        os.remove(blob_path)
+            logging.info(f"Blob store garbage collection: {report}")
+            return report
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def size_bytes(self) -> int:
+        """
+        Returns the bytes held by the blobs.
+        """
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(self.objects_dir) for name in names)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blob store of the run artifacts: garbage collection and restore")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gc_parser = subparsers.add_parser("gc", help="Apply the retention policy and delete unreferenced blobs")
+    gc_parser.add_argument("--artifacts-dir", default=ARTFACT_DIR, help="Directory of the run directories")
+    gc_parser.add_argument("--blob-dir", default=BLOB_STORE_DIR, help="Directory of the blob store")
+    gc_parser.add_argument("--keep-last-runs", type=int, default=RETENTION_KEEP_LAST_RUNS, help="Newest runs kept in full")
+    gc_parser.add_argument("--no-keep-pushed-models", action="store_true", help="Also delete the models of older pushed runs")
+    gc_parser.add_argument("--max-size-mb", type=int, default=RETENTION_MAX_SIZE_MB, help="Size cap of the kept blobs")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    restore_parser = subparsers.add_parser("materialize", help="Restore the missing files of a run from its manifest")
+    restore_parser.add_argument("run_dir", help="Run directory (artifacts/<timestamp>)")
+    restore_parser.add_argument("--blob-dir", default=BLOB_STORE_DIR, help="Directory of the blob store")
+    args = parser.parse_args()
+
+    if args.command == "gc":
+        from src.entity.config_entity import ModelTrainerConfig, training_pipeline_config
+        # The trained model of a pushed run, relative to its run directory
+        model_file = os.path.relpath(ModelTrainerConfig().trained_model_file_path, training_pipeline_config.artifact_dir)
+        print(json.dumps(BlobStore(args.blob_dir).collect_garbage(
+            args.artifacts_dir, args.keep_last_runs, not args.no_keep_pushed_models, args.max_size_mb * 1024 ** 2,
+            pushed_model_files=[model_file], dry_run=args.dry_run), indent=4))
+    else:
+        print(f"Restored {BlobStore(args.blob_dir).materialize(args.run_dir)} files")
@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, MONGO_DB_EXPORT_BATCH_SIZE
 from src.exception import MyException
 from typing import Optional
 
@@ -12,37 +12,75 @@ class ProjData:
     Data access class for project data stored in MongoDB.
     """
 
-    def __init__(self):
+    def __init__(self, mongo_client: Optional[MongoDBClient] = None):
         """
-        Initializes the MongoDB client using the specified database name.
+        Initializes the MongoDB client using the specified database name,
+        unless an already configured client is given.
         """
         try:
-            self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            self.mongo_client = mongo_client or MongoDBClient(database_name=DATABASE_NAME)
         except Exception as e:
             # Raise a custom exception if initialization fails
             raise MyException(e, sys)
         
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str]=None):
+    @staticmethod
+    def build_export_pipeline(schema_config: dict, encode_categoricals: bool = False, keep_columns: Optional[list] = None) -> list:
+        """
+        Builds a server-side aggregation pipeline from the schema config that projects only the
+        schema columns, converts "na" strings to null and optionally encodes the categorical
+        columns with the schema's categorical mappings.
+
+        Args:
+            schema_config (dict): Parsed content of config/schema.yaml.
+            encode_categoricals (bool): Replace categorical labels by their integer codes.
+            keep_columns (list, optional): Columns to keep even though the schema drops them at export.
+
+        Returns:
+            list: Aggregation pipeline stages.
+        """
+        projection = {"_id": 0}
+        for column in schema_config["columns"]:
+            for column_name in column:
+                if column_name in schema_config["export_drop_columns"] and column_name not in (keep_columns or []):
+                    continue
+                field = f"${column_name}"
+                mapping = schema_config["categorical_mappings"].get(column_name)
+                if encode_categoricals and mapping is not None:
+                    # Unknown labels (including "na") become null
+                    projection[column_name] = {"$switch": {
+                        "branches": [{"case": {"$eq": [field, label]}, "then": code} for label, code in mapping.items()],
+                        "default": None
+                    }}
+                else:
+                    projection[column_name] = {"$cond": [{"$eq": [field, "na"]}, None, field]}
+        return [{"$project": projection}]
+
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str]=None, pipeline: Optional[list]=None):
         """
         Exports a MongoDB collection as a pandas DataFrame.
 
         Args:
             collection_name (str): Name of the MongoDB collection.
             database_name (str): Name of the MongoDB database.
+            pipeline (list, optional): Aggregation pipeline (see build_export_pipeline) that projects and
+                cleans the documents on the server. When not given, all fields are fetched and cleaned here.
 
         Returns:
             pd.DataFrame: DataFrame containing the collection data.
         """
         try:
-            # Select the collection from the specified or default database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            # Select the collection from the specified or default database, using the bulk read preference
+            database = self.mongo_client.get_database(database_name, bulk_read=True)
+            collection = database[collection_name]
 
             print("Fetching data from MongoDB")
-            # Fetch all documents from the collection and convert to DataFrame
-            df = pd.DataFrame(list(collection.find()))
+            if pipeline is not None:
+                # Projection and cleaning already happened on the server
+                cursor = collection.aggregate(pipeline, batchSize=MONGO_DB_EXPORT_BATCH_SIZE, allowDiskUse=True)
+                return pd.DataFrame(list(cursor))
+
+            # Fetch all documents from the collection in large batches and convert to DataFrame
+            df = pd.DataFrame(list(collection.find(batch_size=MONGO_DB_EXPORT_BATCH_SIZE)))
 
             # Drop the 'id' column if it exists
             if "id" in df.columns.to_list():
@@ -53,4 +91,82 @@ class ProjData:
         
         except Exception as e:
             # Raise a custom exception if export fails
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def iter_collection_batches(self, collection_name: str, database_name: Optional[str]=None, pipeline: Optional[list]=None,
+                                batch_size: int=MONGO_DB_EXPORT_BATCH_SIZE, sort_field: Optional[str]=None):
+        """
+        Streams a MongoDB collection as pandas DataFrames of at most batch_size rows,
+        so the full collection never has to sit in memory.
+
+        Args:
+            collection_name (str): Name of the MongoDB collection.
+            database_name (str): Name of the MongoDB database.
+            pipeline (list, optional): Aggregation pipeline that projects and cleans the documents on the server.
+                When not given, full documents are fetched and "na" strings are replaced here.
+            batch_size (int): Number of rows per yielded DataFrame.
+            sort_field (str, optional): Field to sort the documents by, for a deterministic order.
+
+        Yields:
+            pd.DataFrame: Batch of documents.
+        """
+        try:
+            database = self.mongo_client.get_database(database_name, bulk_read=True)
+            collection = database[collection_name]
+
+            if pipeline is not None:
+                stages = ([{"$sort": {sort_field: 1}}] if sort_field else []) + pipeline
+                cursor = collection.aggregate(stages, batchSize=batch_size, allowDiskUse=True)
+            else:
+                cursor = collection.find(batch_size=batch_size, sort=[(sort_field, 1)] if sort_field else None)
+
+            documents = []
+            for document in cursor:
+                documents.append(document)
+                if len(documents) == batch_size:
+                    yield self._batch_to_dataframe(documents, cleaned=pipeline is not None)
+                    documents = []
+            if documents:
+                yield self._batch_to_dataframe(documents, cleaned=pipeline is not None)
+
+        except Exception as e:
+            # Raise a custom exception if export fails
+            raise MyException(e, sys)
+
+    def get_collection_fingerprint(self, collection_name: str, database_name: Optional[str]=None) -> dict:
+        """
+        Returns a cheap fingerprint of the collection content, used to detect unchanged source data.
+        Uses the server's dbHash (an md5 of the documents) when permitted, otherwise the document
+        count and the first and last _id, which detects inserts and deletes but not in-place updates.
+
+        Args:
+            collection_name (str): Name of the MongoDB collection.
+            database_name (str): Name of the MongoDB database.
+
+        Returns:
+            dict: Fingerprint of the collection.
+        """
+        try:
+            database = self.mongo_client.get_database(database_name)
+            try:
+                return {"md5": database.command("dbHash", collections=[collection_name])["collections"][collection_name]}
+            except Exception:
+                # dbHash needs extra privileges and is not offered by every deployment
+                collection = database[collection_name]
+                first = collection.find_one(sort=[("_id", 1)], projection={"_id": 1})
+                last = collection.find_one(sort=[("_id", -1)], projection={"_id": 1})
+                return {
+                    "count": collection.count_documents({}),
+                    "first_id": str(first["_id"]) if first else None,
+                    "last_id": str(last["_id"]) if last else None,
+                }
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def _batch_to_dataframe(documents: list, cleaned: bool) -> pd.DataFrame:
+        # Convert a batch of documents, replacing "na" strings unless the server already did it
+        df = pd.DataFrame(documents)
+        if not cleaned:
+            df = df.replace({"na": np.nan})
+        return df
@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import dataclasses
+from datetime import datetime
+from typing import get_type_hints
+
+from src.constants import CHECKPOINT_DIR_NAME, RUN_TIMESTAMP_FORMAT
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import get_file_digest
+
+
+def find_latest_run_dir(artifacts_dir: str):
+    """
+    Returns the most recent run directory (artifacts/<timestamp>) holding stage checkpoints, None if there is none.
+    """
+    try:
+        runs = []
+        for run_name in os.listdir(artifacts_dir) if os.path.isdir(artifacts_dir) else []:
+            try:
+                run_time = datetime.strptime(run_name, RUN_TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            if os.path.isdir(os.path.join(artifacts_dir, run_name, CHECKPOINT_DIR_NAME)):
+                runs.append((run_time, run_name))
+        return os.path.join(artifacts_dir, max(runs)[1]) if runs else None
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def rebase_paths(config, old_dir: str, new_dir: str):
+    """
+    Points the path attributes of a config object inside old_dir to the same place inside new_dir.
+    """
+    old_dir = os.path.normpath(old_dir)
+    for name, value in vars(config).items():
+        if isinstance(value, str) and (os.path.normpath(value) == old_dir or os.path.normpath(value).startswith(old_dir + os.sep)):
+            setattr(config, name, os.path.join(new_dir, os.path.relpath(os.path.normpath(value), old_dir)))
+    return config
+
+
+class RunCheckpoint:
+    """
+    Stage completion manifests of one pipeline run, used to resume a failed run.
+
+    When a stage completes, checkpoints/<stage>.json records its artifact and the size and content
+    digest of every file it wrote. A resumed run reuses the artifacts of the completed stages, in
+    order, as long as their files are intact; from the first stage that is incomplete or has
+    missing or modified files, every stage runs again.
+    """
+
+    def __init__(self, run_artifact_dir: str, resume: bool = False, file_digest=get_file_digest):
+        """
+        Args:
+            run_artifact_dir (str): Artifact directory of the run.
+            resume (bool): Reuse the completed stages of an earlier attempt of this run.
+            file_digest (callable): Returns the content digest of a file (e.g. memoized by the stage cache).
+        """
+        self.checkpoint_dir = os.path.join(run_artifact_dir, CHECKPOINT_DIR_NAME)
+        self.file_digest = file_digest
+        # Cleared once a stage runs, since later stages then depend on new artifacts
+        self.resuming = resume
+        self._report = []
+
+    def _manifest_path(self, stage_name: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{stage_name}.json")
+
+    def _describe_files(self, artifact, output_files: list) -> dict:
+        # Size and digest of the files of the artifact fields and of the extra output files
+        paths = set(output_files)
+
+        def collect(value):
+            for artifact_field in dataclasses.fields(value):
+                field_value = getattr(value, artifact_field.name)
+                if dataclasses.is_dataclass(field_value):
+                    collect(field_value)
+                elif isinstance(field_value, str):
+                    paths.add(field_value)
+
+        collect(artifact)
+        return {path: {"size": os.path.getsize(path), "digest": self.file_digest(path)}
+                for path in sorted(paths) if os.path.isfile(path)}
+
+    @staticmethod
+    def _decode_artifact(artifact_class, encoded: dict):
+        # Rebuild the artifact (and nested artifacts) from its JSON form
+        type_hints = get_type_hints(artifact_class)
+        values = {}
+        for artifact_field in dataclasses.fields(artifact_class):
+            if artifact_field.name not in encoded:
+                continue
+            value = encoded[artifact_field.name]
+            field_type = type_hints.get(artifact_field.name)
+            if dataclasses.is_dataclass(field_type) and isinstance(value, dict):
+                value = RunCheckpoint._decode_artifact(field_type, value)
+            elif isinstance(value, dict) and field_type is dict:
+                # JSON turns integer keys (e.g. class labels) into strings
+                value = {int(k) if k.lstrip("-").isdigit() else k: v for k, v in value.items()}
+            values[artifact_field.name] = value
+        return artifact_class(**values)
+
+    def load(self, stage_name: str, artifact_class):
+        """
+        Returns the artifact of a completed stage whose files are intact, otherwise None.
+        """
+        try:
+            with open(self._manifest_path(stage_name)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+        for path, expected in manifest["files"].items():
+            if not os.path.isfile(path) or os.path.getsize(path) != expected["size"] or self.file_digest(path) != expected["digest"]:
+                logging.info(f"Checkpoint of {stage_name} not reused, {path} is missing or modified")
+                return None
+        return self._decode_artifact(artifact_class, manifest["artifact"])
+
+    def record(self, stage_name: str, artifact, elapsed_s: float, output_files: list = ()):
+        """
+        Writes the completion manifest of a stage (atomically, so a crash never leaves a partial one).
+        """
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            manifest = {
+                "stage": stage_name,
+                "artifact_class": type(artifact).__name__,
+                "artifact": dataclasses.asdict(artifact),
+                "files": self._describe_files(artifact, list(output_files)),
+                "elapsed_s": round(elapsed_s, 3),
+                "completed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            tmp_path = f"{self._manifest_path(stage_name)}.tmp"
+            with open(tmp_path, "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=4, default=str)
+            os.replace(tmp_path, self._manifest_path(stage_name))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def run(self, stage_name: str, artifact_class, compute, output_files: list = ()):
+        """
+        Returns the checkpointed artifact of the stage when resuming and it is intact, otherwise
+        runs compute() and records the stage as complete.
+        """
+        try:
+            if self.resuming:
+                artifact = self.load(stage_name, artifact_class)
+                if artifact is not None:
+                    logging.info(f"Stage {stage_name} resumed from its checkpoint")
+                    self._report.append({"stage": stage_name, "status": "resumed"})
+                    return artifact
+                logging.info(f"Resuming run from stage {stage_name}")
+                self.resuming = False
+            start = time.perf_counter()
+            artifact = compute()
+            elapsed_s = time.perf_counter() - start
+            self.record(stage_name, artifact, elapsed_s, output_files=output_files)
+            self._report.append({"stage": stage_name, "status": "completed", "elapsed_s": round(elapsed_s, 3)})
+            return artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def report(self) -> list:
+        """
+        Returns the stages resumed from checkpoints and the stages run in this attempt.
+        """
+        return [dict(stage) for stage in self._report]
@@ -0,0 +1,346 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import threading
+import dataclasses
+from datetime import datetime
+from typing import get_type_hints
+
+from src.constants import STAGE_CACHE_DIR, STAGE_CACHE_MAX_SIZE_MB, STAGE_CACHE_STAGES
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import get_file_digest, replace_file
+from src.entity.artifact_entity import is_run_specific
+
+# Bytes read at a time when hashing or copying artifact files
+HASH_BLOCK_SIZE = 1024 ** 2
+# Name of the file describing a cache entry
+MANIFEST_FILE_NAME = "manifest.json"
+
+
+class StageCache:
+    """
+    Memoizes pipeline stages across runs.
+
+    The inputs of a stage (data fingerprints, config, schema sections, code version) are hashed into a
+    key. On a hit, the artifact files stored under that key are copied into the current run directory
+    and the stage artifact is rebuilt without running the stage; on a miss the stage runs and its
+    artifact files are stored. Entries are evicted least recently used first beyond a size limit.
+    """
+
+    def __init__(self, run_artifact_dir: str, cache_dir: str = STAGE_CACHE_DIR,
+                 max_size_bytes: int = STAGE_CACHE_MAX_SIZE_MB * 1024 ** 2, enabled: bool = True,
+                 stages: list = STAGE_CACHE_STAGES):
+        """
+        Args:
+            run_artifact_dir (str): Artifact directory of the current run; artifact paths are stored relative to it.
+            cache_dir (str): Directory holding the cache entries, shared by all runs.
+            max_size_bytes (int): Size of the cache beyond which entries are evicted.
+            enabled (bool): When False every stage runs and nothing is stored.
+            stages (list): Names of the stages that may be cached.
+        """
+        self.run_artifact_dir = os.path.abspath(run_artifact_dir)
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.enabled = enabled
+        self.stages = list(stages)
+        self._file_digests = {}  # (absolute path, size, mtime) -> content digest
+        self._report = []
+        self._lock = threading.RLock()
+
+    def file_fingerprint(self, file_path: str) -> str:
+        """
+        Returns the content digest of a file, computed once per file version.
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._file_digests:
+                return self._file_digests[key]
+        digest = get_file_digest(path, block_size=HASH_BLOCK_SIZE)
+        with self._lock:
+            self._file_digests[key] = digest
+        return self._file_digests[key]
+
+    @staticmethod
+    def code_fingerprint(*objects) -> str:
+        """
+        Returns a digest of the source files defining the given modules, classes or functions.
+        """
+        digest = hashlib.blake2b()
+        for source_file in sorted({inspect.getsourcefile(obj) for obj in objects}):
+            with open(source_file, "rb") as file_obj:
+                digest.update(file_obj.read())
+        return digest.hexdigest()
+
+    def _relative(self, value):
+        # Paths inside the run directory are made relative so keys do not depend on the run timestamp
+        if isinstance(value, str) and os.path.abspath(value).startswith(self.run_artifact_dir + os.sep):
+            return os.path.relpath(os.path.abspath(value), self.run_artifact_dir)
+        return value
+
+    def artifact_fingerprint(self, artifact) -> dict:
+        """
+        Returns a JSON-able fingerprint of an upstream stage artifact: file fields are replaced by
+        their content digest, other fields are kept as is.
+        """
+        fingerprint = {}
+        for artifact_field in dataclasses.fields(artifact):
+            if is_run_specific(artifact_field):
+                continue
+            value = getattr(artifact, artifact_field.name)
+            if dataclasses.is_dataclass(value):
+                fingerprint[artifact_field.name] = self.artifact_fingerprint(value)
+            elif isinstance(value, str) and os.path.isfile(value):
+                fingerprint[artifact_field.name] = self.file_fingerprint(value)
+            else:
+                fingerprint[artifact_field.name] = value
+        return fingerprint
+
+    def config_fingerprint(self, config) -> dict:
+        """
+        Returns the settings of a stage config with run directory paths made relative.
+        Class attributes without annotation (e.g. the model trainer hyperparameters) are included.
+        """
+        settings = {}
+        for name in dir(config):
+            value = getattr(config, name)
+            if not name.startswith("__") and not callable(value):
+                settings[name] = self._relative(value)
+        return settings
+
+    @staticmethod
+    def make_key(stage_name: str, inputs: dict) -> str:
+        """
+        Returns the cache key of a stage: a digest of its name and JSON-able inputs.
+        """
+        payload = json.dumps({"stage": stage_name, "inputs": inputs}, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+    def _entry_dir(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, key)
+
+    def _copy(self, source: str, destination: str) -> str:
+        # Copy a file while hashing it, and remember the digest of both copies
+        digest = hashlib.blake2b()
+        with replace_file(destination) as tmp_path:
+            with open(source, "rb") as source_file, open(tmp_path, "wb") as destination_file:
+                for block in iter(lambda: source_file.read(HASH_BLOCK_SIZE), b""):
+                    digest.update(block)
+                    destination_file.write(block)
+            shutil.copystat(source, tmp_path)
+        for path in (source, destination):
+            stat = os.stat(path)
+            with self._lock:
+                self._file_digests[(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)] = digest.hexdigest()
+        return digest.hexdigest()
+
+    def _encode_artifact(self, artifact, files: dict) -> dict:
+        # Artifact fields as JSON, file fields replaced by their relative path and registered in files
+        encoded = {}
+        for artifact_field in dataclasses.fields(artifact):
+            if is_run_specific(artifact_field):
+                continue
+            value = getattr(artifact, artifact_field.name)
+            if dataclasses.is_dataclass(value):
+                encoded[artifact_field.name] = self._encode_artifact(value, files)
+            elif isinstance(value, str) and os.path.isfile(value):
+                relative_path = self._relative(value)
+                files[relative_path] = value
+                encoded[artifact_field.name] = {"file": relative_path}
+            else:
+                encoded[artifact_field.name] = value
+        return encoded
+
+    def _decode_artifact(self, artifact_class, encoded: dict):
+        # Rebuild the artifact, pointing file fields to their restored location in the current run
+        type_hints = get_type_hints(artifact_class)
+        values = {}
+        for artifact_field in dataclasses.fields(artifact_class):
+            # Run-specific fields are not stored and keep their default
+            if artifact_field.name not in encoded:
+                continue
+            value = encoded[artifact_field.name]
+            field_type = type_hints.get(artifact_field.name)
+            if dataclasses.is_dataclass(field_type) and isinstance(value, dict):
+                value = self._decode_artifact(field_type, value)
+            elif isinstance(value, dict) and set(value) == {"file"}:
+                value = self._restored_path(value["file"])
+            elif isinstance(value, dict) and field_type is dict:
+                # JSON turns integer keys (e.g. class labels) into strings
+                value = {int(k) if k.lstrip("-").isdigit() else k: v for k, v in value.items()}
+            values[artifact_field.name] = value
+        return artifact_class(**values)
+
+    def _restored_path(self, relative_path: str) -> str:
+        if os.path.isabs(relative_path):
+            return relative_path
+        return os.path.join(self.run_artifact_dir, relative_path)
+
+    def _load_manifest(self, entry_dir: str):
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_FILE_NAME)) as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry_dir: str, manifest: dict):
+        with open(os.path.join(entry_dir, MANIFEST_FILE_NAME), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+
+    def lookup(self, stage_name: str, key: str, artifact_class):
+        """
+        Restores the cached artifact files into the current run and returns (artifact, manifest),
+        or None on a miss.
+        """
+        entry_dir = self._entry_dir(stage_name, key)
+        manifest = self._load_manifest(entry_dir)
+        if manifest is None:
+            return None
+        for relative_path, stored_name in manifest["files"].items():
+            self._copy(os.path.join(entry_dir, stored_name), self._restored_path(relative_path))
+        manifest["last_used_at"] = time.time()
+        self._write_manifest(entry_dir, manifest)
+        return self._decode_artifact(artifact_class, manifest["artifact"]), manifest
+
+    def store(self, stage_name: str, key: str, artifact, elapsed_s: float, output_files: list = ()):
+        """
+        Stores the artifact files (and extra output files) of a stage run under its key, then evicts
+        old entries beyond the size limit.
+        """
+        files = {}
+        encoded = self._encode_artifact(artifact, files)
+        for file_path in output_files:
+            if os.path.isfile(file_path):
+                files[self._relative(file_path)] = file_path
+        size_bytes = sum(os.path.getsize(file_path) for file_path in files.values())
+        if size_bytes > self.max_size_bytes:
+            logging.info(f"Stage {stage_name} artifacts ({size_bytes} bytes) exceed the stage cache size, not cached")
+            return
+        entry_dir = self._entry_dir(stage_name, key)
+        # Build the entry next to its final location and move it in place once complete
+        staging_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        stored_files = {}
+        for position, (relative_path, file_path) in enumerate(sorted(files.items())):
+            stored_name = f"{position}_{os.path.basename(file_path)}"
+            self._copy(file_path, os.path.join(staging_dir, stored_name))
+            stored_files[relative_path] = stored_name
+        now = time.time()
+        self._write_manifest(staging_dir, {
+            "stage": stage_name,
+            "key": key,
+            "artifact": encoded,
+            "files": stored_files,
+            "size_bytes": size_bytes,
+            "elapsed_s": elapsed_s,
+            "created_at": now,
+            "last_used_at": now,
+        })
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(staging_dir, entry_dir)
+        self.evict(keep=entry_dir)
+
+    def entries(self) -> list:
+        """
+        Returns (entry directory, manifest) of every complete cache entry.
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for stage_name in os.listdir(self.cache_dir):
+            stage_dir = os.path.join(self.cache_dir, stage_name)
+            if not os.path.isdir(stage_dir):
+                continue
+            for key in os.listdir(stage_dir):
+                manifest = self._load_manifest(os.path.join(stage_dir, key))
+                if manifest is not None:
+                    entries.append((os.path.join(stage_dir, key), manifest))
+        return entries
+
+    def evict(self, keep: str = None):
+        """
+        Deletes the least recently used entries until the cache fits in max_size_bytes.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[1]["last_used_at"])
+        total_bytes = sum(manifest["size_bytes"] for _, manifest in entries)
+        for entry_dir, manifest in entries:
+            if total_bytes <= self.max_size_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_bytes -= manifest["size_bytes"]
+            logging.info(f"Evicted stage cache entry {entry_dir} ({manifest['size_bytes']} bytes)")
+
+    def run(self, stage_name: str, artifact_class, compute, inputs, output_files: list = ()):
+        """
+        Returns the stage artifact from the cache when the inputs were seen before, otherwise runs
+        compute() and caches its result.
+
+        Args:
+            stage_name (str): Name of the stage.
+            artifact_class (type): Dataclass of the stage artifact.
+            compute (callable): Runs the stage and returns its artifact.
+            inputs (callable): Returns the JSON-able inputs of the stage, hashed into the cache key;
+                only called when the stage is cached.
+            output_files (list): Files written by the stage besides the artifact file fields.
+
+        Returns:
+            The stage artifact.
+        """
+        try:
+            start = time.perf_counter()
+            if not self.enabled or stage_name not in self.stages:
+                artifact = compute()
+                self._add_report(stage_name, "not_cached", None, time.perf_counter() - start)
+                return artifact
+            key = self.make_key(stage_name, inputs())
+            cached = self.lookup(stage_name, key, artifact_class)
+            if cached is not None:
+                artifact, manifest = cached
+                elapsed_s = time.perf_counter() - start
+                logging.info(f"Stage {stage_name} skipped, reused cache entry {key}")
+                self._add_report(stage_name, "hit", key, elapsed_s, saved_s=max(manifest["elapsed_s"] - elapsed_s, 0.0))
+                return artifact
+            artifact = compute()
+            elapsed_s = time.perf_counter() - start
+            self.store(stage_name, key, artifact, elapsed_s, output_files=output_files)
+            self._add_report(stage_name, "miss", key, elapsed_s)
+            return artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _add_report(self, stage_name: str, status: str, key, elapsed_s: float, saved_s: float = 0.0):
+        with self._lock:
+            self._report.append({"stage": stage_name, "status": status, "key": key,
+                                 "elapsed_s": round(elapsed_s, 3), "saved_s": round(saved_s, 3)})
+
+    def report(self) -> dict:
+        """
+        Returns which stages were skipped and how much time they saved in this run.
+        """
+        with self._lock:
+            return {
+                "stages": [dict(stage) for stage in self._report],
+                "skipped_stages": [stage["stage"] for stage in self._report if stage["status"] == "hit"],
+                "time_saved_s": round(sum(stage["saved_s"] for stage in self._report), 3),
+                "cache_size_bytes": sum(manifest["size_bytes"] for _, manifest in self.entries()),
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+
+    def save_report(self, file_path: str):
+        """
+        Writes the report to a JSON file.
+        """
+        try:
+            with replace_file(file_path) as tmp_path, open(tmp_path, "w") as report_file:
+                json.dump(self.report(), report_file, indent=4)
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,149 @@
+import sys
+import numpy as np
+import pandas as pd
+
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN, SYNTHETIC_DATA_POSITIVE_RATE, SYNTHETIC_DATA_SEED
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml
+
+# Most frequent region codes and sales channels with their share of records (the rest is spread uniformly)
+FREQUENT_REGION_CODES = {28: 0.28, 8: 0.09, 46: 0.05, 41: 0.05, 15: 0.035, 30: 0.03, 29: 0.03}
+FREQUENT_SALES_CHANNELS = {152: 0.35, 26: 0.21, 124: 0.19, 160: 0.06, 156: 0.03, 122: 0.03}
+# Share of records with the minimum annual premium
+MIN_PREMIUM_SHARE = 0.17
+MIN_PREMIUM = 2630.0
+
+
+class SyntheticVehicleData:
+    """
+    Generates vehicle insurance records matching config/schema.yaml, with distributions close to
+    the production collection (age mixture, dominant regions and sales channels, premium floor)
+    and an imbalanced Response driven by the same features as the real data.
+    """
+
+    def __init__(self, positive_rate: float = SYNTHETIC_DATA_POSITIVE_RATE, seed: int = SYNTHETIC_DATA_SEED, na_rate: float = 0.0):
+        """
+        Args:
+            positive_rate (float): Target share of Response == 1.
+            seed (int): Base random seed; the same seed always produces the same records.
+            na_rate (float): Share of categorical values replaced by the "na" string found in raw exports.
+        """
+        try:
+            self.positive_rate = positive_rate
+            self.seed = seed
+            self.na_rate = na_rate
+            self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
+            self._intercept = None
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def _choice_with_frequent(rng, n_rows: int, frequent: dict, low: int, high: int) -> np.ndarray:
+        # Draw from a few frequent values, falling back to a uniform integer range for the rest
+        values = rng.integers(low, high + 1, n_rows)
+        draw = rng.random(n_rows)
+        cumulative = 0.0
+        for value, share in frequent.items():
+            values[(draw >= cumulative) & (draw < cumulative + share)] = value
+            cumulative += share
+        return values
+
+    def _features(self, rng, n_rows: int) -> pd.DataFrame:
+        # Generate the feature columns of n_rows records
+        young = rng.random(n_rows) < 0.45
+        age = np.where(young, rng.normal(25, 3, n_rows), rng.normal(46, 13, n_rows)).clip(20, 85).astype(np.int64)
+        vehicle_age = np.where(age < 30,
+                               rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"], n_rows, p=[0.80, 0.19, 0.01]),
+                               rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"], n_rows, p=[0.12, 0.80, 0.08]))
+        previously_insured = (rng.random(n_rows) < 0.46).astype(np.int64)
+        # Customers that were already insured rarely report vehicle damage
+        damage_probability = np.where(previously_insured == 1, 0.02, 0.92)
+        vehicle_damage = np.where(rng.random(n_rows) < damage_probability, "Yes", "No")
+        premium = rng.lognormal(np.log(31000), 0.35, n_rows).round()
+        premium[rng.random(n_rows) < MIN_PREMIUM_SHARE] = MIN_PREMIUM
+        return pd.DataFrame({
+            "Gender": np.where(rng.random(n_rows) < 0.54, "Male", "Female"),
+            "Age": age,
+            "Driving_License": (rng.random(n_rows) < 0.998).astype(np.int64),
+            "Region_Code": self._choice_with_frequent(rng, n_rows, FREQUENT_REGION_CODES, 0, 52),
+            "Previously_Insured": previously_insured,
+            "Vehicle_Age": vehicle_age,
+            "Vehicle_Damage": vehicle_damage,
+            "Annual_Premium": premium.clip(MIN_PREMIUM, 540165.0),
+            "Policy_Sales_Channel": self._choice_with_frequent(rng, n_rows, FREQUENT_SALES_CHANNELS, 1, 163),
+            "Vintage": rng.integers(10, 300, n_rows),
+        })
+
+    @staticmethod
+    def _logits(features: pd.DataFrame) -> np.ndarray:
+        # Response signal without intercept: damage and no previous insurance drive the purchase
+        return (2.2 * (features["Vehicle_Damage"] == "Yes")
+                - 3.5 * features["Previously_Insured"]
+                + 0.9 * (features["Vehicle_Age"] != "< 1 Year")
+                - 0.02 * (features["Age"] - 40).abs()
+                + 0.4 * features["Policy_Sales_Channel"].isin([26, 124]).astype(float)).to_numpy(dtype=float)
+
+    def _calibrate_intercept(self) -> float:
+        # Bisect the intercept so the expected positive rate matches the requested one
+        if self._intercept is None:
+            logits = self._logits(self._features(np.random.default_rng(self.seed), 200_000))
+            low, high = -20.0, 20.0
+            for _ in range(50):
+                middle = (low + high) / 2
+                if (1 / (1 + np.exp(-(logits + middle)))).mean() < self.positive_rate:
+                    low = middle
+                else:
+                    high = middle
+            self._intercept = (low + high) / 2
+        return self._intercept
+
+    def generate(self, n_rows: int, start_id: int = 1, batch_index: int = 0) -> pd.DataFrame:
+        """
+        Generates n_rows records with consecutive ids starting at start_id.
+
+        Args:
+            n_rows (int): Number of records.
+            start_id (int): Id of the first record.
+            batch_index (int): Index mixed into the seed so successive batches differ but stay reproducible.
+
+        Returns:
+            pd.DataFrame: Records with the schema columns, as stored in the collection.
+        """
+        try:
+            rng = np.random.default_rng([self.seed, batch_index])
+            features = self._features(rng, n_rows)
+            probability = 1 / (1 + np.exp(-(self._logits(features) + self._calibrate_intercept())))
+            features[TARGET_COLUMN] = (rng.random(n_rows) < probability).astype(np.int64)
+            if self.na_rate > 0:
+                for column in self._schema_config["categorical_columns"]:
+                    features.loc[rng.random(n_rows) < self.na_rate, column] = "na"
+            features.insert(0, "id", np.arange(start_id, start_id + n_rows))
+            return features
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def iter_batches(self, n_rows: int, batch_size: int = 100_000):
+        """
+        Yields n_rows records in batches of at most batch_size rows, with consecutive ids.
+        """
+        for batch_index, start in enumerate(range(0, n_rows, batch_size)):
+            yield self.generate(min(batch_size, n_rows - start), start_id=start + 1, batch_index=batch_index)
+
+    def load_into_collection(self, collection, n_rows: int, batch_size: int = 100_000):
+        """
+        Replaces the content of a MongoDB collection with n_rows synthetic records.
+
+        Args:
+            collection: pymongo collection (or a compatible stand-in).
+            n_rows (int): Number of records.
+            batch_size (int): Records generated and inserted per batch.
+        """
+        try:
+            collection.drop()
+            for batch in self.iter_batches(n_rows, batch_size=batch_size):
+                collection.insert_many(batch.to_dict(orient="records"), ordered=False)
+            collection.create_index("id")
+            logging.info(f"Loaded {n_rows} synthetic records into {collection.name}")
+        except Exception as e:
+            raise MyException(e, sys)
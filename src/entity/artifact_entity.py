@@ -1,10 +1,38 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+# Field metadata of values that describe how a run went rather than what it produced (e.g. timings);
+# they are left out of the stage cache fingerprints and entries
+RUN_SPECIFIC = {"run_specific": True}
+
+
+def is_run_specific(artifact_field) -> bool:
+    """
+    Returns True for artifact fields marked with RUN_SPECIFIC.
+    """
+    return artifact_field.metadata.get("run_specific", False)
+
+# Data class to store the resources used by one pipeline stage
+@dataclass
+class StageProfile:
+    stage: str                            # Name of the pipeline stage
+    wall_time_s: float = None             # Wall time of the stage
+    cpu_time_s: float = None              # CPU time of the process (all threads) and of child processes that ended during the stage
+    peak_rss_mb: float = None             # Highest resident set size of the process sampled during the stage
+    rss_delta_mb: float = None            # Resident set size at the end minus at the start of the stage
+    peak_traced_mb: float = None          # Highest Python/numpy heap traced by tracemalloc ("tracemalloc" memory method)
+    rows: int = None                      # Rows processed by the stage
+    bytes_read: int = None                # Artifact bytes read from disk by the stage
+    bytes_written: int = None             # Artifact bytes written to disk by the stage
+    bytes_served_from_memory: int = None  # Artifact bytes handed over in memory by the artifact store
+    os_bytes_read: int = None             # Bytes the process read from storage during the stage (Linux)
+    os_bytes_written: int = None          # Bytes the process wrote to storage during the stage (Linux)
 
 # Data class to store file paths for data ingestion artifacts
 @dataclass
 class DataIngestionArtifact:
     trained_file_path : str  # Path to the file containing the training dataset
     test_file_path : str     # Path to the file containing the test dataset
+    stage_profile: StageProfile = field(default=None, metadata=RUN_SPECIFIC)  # Resources used by the stage in this run
 
 # Data class to store results and metadata from data validation step
 @dataclass
@@ -12,13 +40,20 @@ class DataValidationArtifact:
     validation_status: bool                # Indicates if validation passed or failed
     message: str                           # Message or summary about the validation
     validation_report_file_path: str       # Path to the validation report file
+    stage_profile: StageProfile = field(default=None, metadata=RUN_SPECIFIC)  # Resources used by the stage in this run
 
 # Data class to store file paths for data transformation artifacts
 @dataclass
 class DataTransformationArtifact:
     transformed_object_file_path: str      # Path to the serialized transformation object (e.g., scaler, encoder)
-    transformed_train_file_path: str       # Path to the transformed training dataset
-    transformed_test_file_path: str        # Path to the transformed test dataset
+    transformed_train_file_path: str       # Path to the transformed training features
+    transformed_test_file_path: str        # Path to the transformed test features
+    transformed_train_label_file_path: str # Path to the training labels
+    transformed_test_label_file_path: str  # Path to the test labels
+    class_weight: dict = None              # Class weights for the trainer ("class_weight" rebalancing only)
+    transformed_validation_file_path: str = None        # Path to the validation features (training rows held out before rebalancing), None without a split
+    transformed_validation_label_file_path: str = None  # Path to the validation labels
+    stage_profile: StageProfile = field(default=None, metadata=RUN_SPECIFIC)  # Resources used by the stage in this run
 
 # Data class to store classification metrics
 @dataclass
@@ -26,12 +61,20 @@ class ClassificationMetricArtifact:
     f1_score : float                      # F1 score of the model
     precision_score: float                # Precision score of the model
     recall_score: float                   # Recall score of the model
+    accuracy_score: float = None          # Accuracy of the model on the test set
+    training_accuracy_score: float = None # Accuracy on the training set (out-of-bag estimate when available)
+    training_f1_score: float = None       # F1 score on the training set (out-of-bag estimate when available)
+    training_metrics_source: str = None   # "oob" or "predict": how the training metrics were obtained
+    fit_time_s: float = None              # Wall time of fitting the model
+    test_score_time_s: float = None       # Wall time of the test set scoring pass
+    training_score_time_s: float = None   # Wall time of the training metrics (no prediction pass with "oob")
 
 # Data class to store model trainer artifacts, including metrics
 @dataclass
 class ModelTrainerArtifact:
     trained_model_file_path: str          # Path to the trained model file
     metric_artifact: ClassificationMetricArtifact  # Classification metrics for the trained model
+    stage_profile: StageProfile = field(default=None, metadata=RUN_SPECIFIC)  # Resources used by the stage in this run
 
 # Data class to store model evaluation results
 @dataclass
@@ -40,9 +83,11 @@ class ModelEvaluationArtifact:
     changed_accuracy: float               # Change in accuracy compared to previous model
     s3_model_path: str                    # S3 path where the evaluated model is stored
     trained_model_path: str               # Local path to the trained model
+    stage_profile: StageProfile = field(default=None, metadata=RUN_SPECIFIC)  # Resources used by the stage in this run
 
 # Data class to store model pusher artifacts
 @dataclass
 class ModelPusherArtifact:
     bucket_name: str                      # Name of the S3 bucket where the model is pushed
-    s3_model_path: str                    # S3 path where the model is pushed
\ No newline at end of file
+    s3_model_path: str                    # S3 path where the model is pushed
+    stage_profile: StageProfile = field(default=None, metadata=RUN_SPECIFIC)  # Resources used by the stage in this run
@@ -0,0 +1,97 @@
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from src.exception import MyException
+
+# Code marking a value outside the schema levels in the lookup arrays
+UNKNOWN_CODE = -1
+
+
+class CategoricalEncoder(BaseEstimator, TransformerMixin):
+    """
+    Encodes the categorical columns listed in the schema categorical_mappings in one vectorized pass.
+
+    Every column is looked up through a precomputed array indexed by category code, so the labels
+    themselves are only compared once per distinct set of categories. Columns may hold labels
+    ("Male"), integer codes (1) or codes sent as strings by the web form ("1"), and are returned
+    as int8 codes. The output columns follow the order seen during fit, extra columns are dropped.
+    """
+
+    def __init__(self, mappings: dict):
+        """
+        Args:
+            mappings (dict): Column name -> {label: code}, from the schema categorical_mappings.
+        """
+        self.mappings = mappings
+
+    def fit(self, X: pd.DataFrame, y=None):
+        """
+        Records the input column order and compiles the label and code lookups of every mapped column.
+        """
+        try:
+            self.feature_names_in_ = np.array(X.columns, dtype=object)
+            self.n_features_in_ = len(self.feature_names_in_)
+            self.columns_ = [column for column in self.mappings if column in X.columns]
+            # Accepted spellings of every level: the label, the code and the code as a string
+            self.lookups_ = {}
+            for column in self.columns_:
+                labels = list(self.mappings[column])
+                codes = [int(code) for code in self.mappings[column].values()]
+                self.lookups_[column] = (pd.Index(labels + codes + [str(code) for code in codes], dtype=object),
+                                         np.array(codes * 3, dtype=np.int8))
+            self._category_lookups = {}
+            return self
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _lookup(self, column: str, values) -> np.ndarray:
+        # Codes of the given distinct values, UNKNOWN_CODE for values outside the schema
+        index, codes = self.lookups_[column]
+        positions = index.get_indexer(pd.Index(values, dtype=object))
+        return np.where(positions >= 0, codes[positions], UNKNOWN_CODE).astype(np.int8)
+
+    def _encode_column(self, column: str, series: pd.Series) -> np.ndarray:
+        # Encode one column through a lookup array indexed by category code
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories
+            key = (column, tuple(categories))
+            if key not in self._category_lookups:
+                # The trailing entry catches code -1 (missing values)
+                self._category_lookups[key] = np.append(self._lookup(column, categories), np.int8(UNKNOWN_CODE))
+            # np.take wraps code -1 to the trailing entry
+            return np.take(self._category_lookups[key], series.array.codes)
+        # Plain columns are factorized first so each distinct value is looked up once
+        value_codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        lookup = np.append(self._lookup(column, uniques), np.int8(UNKNOWN_CODE))
+        return np.take(lookup, value_codes)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the frame with the fitted column order and the mapped columns encoded as int8.
+
+        Raises:
+            MyException: If a column is missing or a value is not a known label or code.
+        """
+        try:
+            missing_columns = [column for column in self.feature_names_in_ if column not in X.columns]
+            if missing_columns:
+                raise ValueError(f"Missing columns: {missing_columns}")
+            # Reorder without copying the column data; the shallow copy keeps the caller's frame untouched
+            encoded = X.reindex(columns=self.feature_names_in_, copy=False).copy(deep=False)
+            for column in self.columns_:
+                codes = self._encode_column(column, encoded[column])
+                if (codes == UNKNOWN_CODE).any():
+                    unknown = encoded[column][codes == UNKNOWN_CODE].unique()[:10].tolist()
+                    raise ValueError(f"Column {column} holds values outside {list(self.mappings[column])}: {unknown}")
+                encoded[column] = codes
+            return encoded
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        """
+        Returns the output column names (the fitted input order).
+        """
+        return self.feature_names_in_
@@ -0,0 +1,104 @@
+import sys
+import numpy as np
+
+from src.exception import MyException
+
+# Rows descended through all trees at once; bounds the (rows x trees) node index matrix
+COMPACT_FOREST_BATCH_SIZE = 1024
+
+
+def floor_to_dtype(thresholds: np.ndarray, dtype) -> np.ndarray:
+    """
+    Casts split thresholds to a smaller float dtype, rounding down, so `x <= threshold` keeps its
+    result for every feature value representable in that dtype.
+    """
+    cast = thresholds.astype(dtype)
+    above = cast.astype(np.float64) > thresholds
+    cast[above] = np.nextafter(cast[above], dtype(-np.inf))
+    return cast
+
+
+class CompactForest:
+    """
+    Binary classification forest stored as flat, reduced-precision node arrays.
+
+    All trees are concatenated into one set of arrays (children as interleaved int32, features as int16,
+    thresholds as float32 or float16, positive-class leaf probabilities as float16 or uint8), so
+    the pickle is small and loads quickly. Prediction descends all trees for a batch of rows at
+    once with numpy, avoiding sklearn's per-tree dispatch, which dominates single-row latency.
+    Exposes classes_, predict and predict_proba, so it plugs into MyModel like a sklearn forest.
+    """
+
+    def __init__(self, trees: list, classes, n_features_in: int, threshold_dtype: str = "float32", leaf_dtype: str = "uint8"):
+        """
+        Args:
+            trees (list): Fitted sklearn decision trees of a binary forest.
+            classes: Class labels of the forest (classes_).
+            n_features_in (int): Number of features of the forest.
+            threshold_dtype (str): "float32" (exact for float32 features) or "float16".
+            leaf_dtype (str): "float16" or "uint8" (probabilities quantized to 1/255).
+        """
+        try:
+            if len(classes) != 2:
+                raise ValueError(f"CompactForest supports binary forests, got {len(classes)} classes")
+            self.classes_ = np.asarray(classes)
+            self.n_features_in_ = n_features_in
+            self.n_trees = len(trees)
+            self.leaf_dtype = leaf_dtype
+            left, right, feature, threshold, leaf_value, roots, max_depth = [], [], [], [], [], [], 0
+            offset = 0
+            for tree in trees:
+                tree_ = tree.tree_
+                is_leaf = tree_.children_left < 0
+                node_ids = np.arange(tree_.node_count)
+                # Leaves point to themselves, so descending more levels than a tree has is harmless
+                left.append(np.where(is_leaf, node_ids, tree_.children_left) + offset)
+                right.append(np.where(is_leaf, node_ids, tree_.children_right) + offset)
+                feature.append(np.where(is_leaf, 0, tree_.feature))
+                threshold.append(np.where(is_leaf, np.inf, tree_.threshold))
+                value = tree_.value[:, 0, :]
+                leaf_value.append(value[:, 1] / value.sum(axis=1))
+                roots.append(offset)
+                max_depth = max(max_depth, tree_.max_depth)
+                offset += tree_.node_count
+            # Left and right child of node i at 2i and 2i + 1, so one lookup follows a split
+            self.children = np.column_stack([np.concatenate(left), np.concatenate(right)]).ravel().astype(np.int32)
+            self.feature = np.concatenate(feature).astype(np.int16)
+            self.threshold = floor_to_dtype(np.concatenate(threshold), np.dtype(threshold_dtype).type)
+            leaf_value = np.concatenate(leaf_value)
+            self.leaf_value = np.round(leaf_value * 255).astype(np.uint8) if leaf_dtype == "uint8" else leaf_value.astype(leaf_dtype)
+            self.roots = np.asarray(roots, dtype=np.int32)
+            self.max_depth = max_depth
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _leaf_probabilities(self, X: np.ndarray) -> np.ndarray:
+        # Positive-class probability of every tree for a batch of rows
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        row_offsets = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        X = X.ravel()
+        for _ in range(self.max_depth):
+            go_right = X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        values = self.leaf_value[nodes].astype(np.float32)
+        return values / 255 if self.leaf_dtype == "uint8" else values
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Returns the class probabilities, averaged over the trees.
+        """
+        try:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            positive = np.empty(len(X), dtype=np.float64)
+            for start in range(0, len(X), COMPACT_FOREST_BATCH_SIZE):
+                batch = X[start:start + COMPACT_FOREST_BATCH_SIZE]
+                positive[start:start + len(batch)] = self._leaf_probabilities(batch).mean(axis=1)
+            return np.column_stack([1 - positive, positive])
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Returns the class with the highest averaged probability, like sklearn forests.
+        """
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)]
@@ -1,10 +1,10 @@
 import os
 from src.constants import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
 # Generate a timestamp string for unique artifact directory naming
-TIME_STAMP : str = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}"
+TIME_STAMP : str = f"{datetime.now().strftime(RUN_TIMESTAMP_FORMAT)}"
 
 @dataclass
 class TrainingPipelineConfig:
@@ -14,6 +14,40 @@ class TrainingPipelineConfig:
     artifact_dir: str = os.path.join(ARTFACT_DIR, TIME_STAMP)
     # Timestamp for this pipeline run
     timestamp: str = TIME_STAMP
+    # Memory budget (in MB) of the in-memory artifact store shared by the stages of a run
+    artifact_store_memory_budget_mb: int = ARTIFACT_STORE_MEMORY_BUDGET_MB
+    # Path to the per-stage artifact read/write report
+    artifact_store_report_file_path: str = os.path.join(artifact_dir, ARTIFACT_STORE_REPORT_FILE_NAME)
+    # Look up and store stage artifacts in the stage cache shared by all runs
+    stage_cache_enabled: bool = STAGE_CACHE_ENABLED
+    # Directory of the stage cache
+    stage_cache_dir: str = STAGE_CACHE_DIR
+    # Size (in MB) beyond which the least recently used cache entries are evicted
+    stage_cache_max_size_mb: int = STAGE_CACHE_MAX_SIZE_MB
+    # Stages whose artifacts may be reused
+    stage_cache_stages: list = field(default_factory=lambda: list(STAGE_CACHE_STAGES))
+    # Path to the report of skipped stages and time saved
+    stage_cache_report_file_path: str = os.path.join(artifact_dir, STAGE_CACHE_REPORT_FILE_NAME)
+    # Stages running at once in the stage DAG
+    dag_max_workers: int = PIPELINE_DAG_MAX_WORKERS
+    # Path to the stage timings and critical path report
+    dag_report_file_path: str = os.path.join(artifact_dir, PIPELINE_DAG_REPORT_FILE_NAME)
+    # Memory measured by the stage profiler: "rss" or "tracemalloc"
+    profile_memory_method: str = STAGE_PROFILE_MEMORY_METHOD
+    # Seconds between resident set size samples
+    profile_sample_interval_s: float = STAGE_PROFILE_SAMPLE_INTERVAL_S
+    # Path to the per-stage profile report
+    profile_report_file_path: str = os.path.join(artifact_dir, STAGE_PROFILE_REPORT_FILE_NAME)
+    # Store the run artifacts in the content-addressed blob store and apply the retention policy after every run (opt-in)
+    blob_store_enabled: bool = BLOB_STORE_ENABLED
+    # Directory of the blob store
+    blob_store_dir: str = BLOB_STORE_DIR
+    # Newest runs kept in full by the retention policy
+    retention_keep_last_runs: int = RETENTION_KEEP_LAST_RUNS
+    # Keep the trained model of older runs that pushed it
+    retention_keep_pushed_models: bool = RETENTION_KEEP_PUSHED_MODELS
+    # Size (in MB) of the kept blobs beyond which the oldest runs are dropped
+    retention_max_size_mb: int = RETENTION_MAX_SIZE_MB
 
 # Create a global instance of TrainingPipelineConfig
 training_pipeline_config : TrainingPipelineConfig = TrainingPipelineConfig()
@@ -30,8 +64,37 @@ class DataIngestionConfig:
     testing_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     # Ratio for splitting data into train and test sets
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+    # Name of the MongoDB database holding the collection
+    database_name: str = DATABASE_NAME
     # Name of the collection in the data source (e.g., database)
     collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    # File format of the ingestion artifacts ("csv", "parquet" or "feather")
+    file_format: str = DATA_INGESTION_FILE_FORMAT
+    # Compression codec for columnar file formats (ignored for csv)
+    compression: str = DATA_INGESTION_FILE_COMPRESSION
+    # Export mode: "find" fetches full documents, "aggregate" projects and cleans them on the server
+    export_mode: str = DATA_INGESTION_EXPORT_MODE
+    # Encode categorical columns in the server-side pipeline ("aggregate" mode only)
+    encode_categoricals: bool = DATA_INGESTION_ENCODE_CATEGORICALS
+    # Split mode: "random" splits the exported frame in memory, "hash" streams records into train/test by id hash
+    split_mode: str = DATA_INGESTION_SPLIT_MODE
+    # Stratify the streaming split on the target column
+    stratify: bool = DATA_INGESTION_STRATIFY
+    # Test ratio of each target class in the stratified split, the split ratio for classes not listed
+    stratify_class_ratios: dict = field(default_factory=lambda: dict(DATA_INGESTION_STRATIFY_CLASS_RATIOS))
+    # Record id column hashed by the streaming split
+    split_id_column: str = DATA_INGESTION_SPLIT_ID_COLUMN
+    # Key of the deterministic split hash (changing it reshuffles the split)
+    split_hash_key: str = DATA_INGESTION_SPLIT_HASH_KEY
+    # Threads writing the train and test files concurrently
+    split_workers: int = DATA_INGESTION_SPLIT_WORKERS
+
+    def __post_init__(self):
+        # Keep the artifact file extensions in line with the selected file format
+        extension = ARTIFACT_FILE_EXTENSIONS[self.file_format]
+        self.feature_store_file_path = f"{os.path.splitext(self.feature_store_file_path)[0]}.{extension}"
+        self.training_file_path = f"{os.path.splitext(self.training_file_path)[0]}.{extension}"
+        self.testing_file_path = f"{os.path.splitext(self.testing_file_path)[0]}.{extension}"
 
 @dataclass
 class DataValidationConfig:
@@ -39,29 +102,91 @@ class DataValidationConfig:
     data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_VALIDATION_DIR_NAME)
     # Path to the validation report file
     validation_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
+    # Validation mode: "full" or "early_abort"
+    validation_mode: str = DATA_VALIDATION_MODE
+    # Rows validated per chunk
+    chunk_size: int = DATA_VALIDATION_CHUNK_SIZE
+    # Path to the column profile of this run, compared with the previous run's profile
+    profile_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_PROFILE_FILE_NAME)
+    # Threads profiling chunks in parallel
+    profile_workers: int = DATA_VALIDATION_PROFILE_WORKERS
+    # Threads validating the train and test files concurrently ("full" mode)
+    split_workers: int = DATA_VALIDATION_SPLIT_WORKERS
+    # PSI above which a column is reported as drifted
+    drift_psi_threshold: float = DATA_VALIDATION_PSI_THRESHOLD
+    # Fail validation when a column drifted
+    fail_on_drift: bool = DATA_VALIDATION_FAIL_ON_DRIFT
 
 @dataclass
 class DataTransformationConfig:
     # Directory for data transformation artifacts
     data_transformation_dir : str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
-    # Path to the transformed training data file (in .npy format)
+    # Path to the transformed training features file (in .npy format)
     transformed_train_file_path: str = os.path.join(
         data_transformation_dir,
         DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
         TRAIN_FILE_NAME.replace("csv", "npy")
     )
-    # Path to the transformed testing data file (in .npy format)
+    # Path to the transformed testing features file (in .npy format)
     transformed_test_file_path: str = os.path.join(
         data_transformation_dir,
         DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
         TEST_FILE_NAME.replace("csv", "npy")
     )
+    # Path to the training labels file (in .npy format), stored apart from the features
+    transformed_train_label_file_path: str = os.path.join(
+        data_transformation_dir,
+        DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+        TRAIN_FILE_NAME.replace(".csv", "_labels.npy")
+    )
+    # Path to the testing labels file (in .npy format)
+    transformed_test_label_file_path: str = os.path.join(
+        data_transformation_dir,
+        DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+        TEST_FILE_NAME.replace(".csv", "_labels.npy")
+    )
+    # Path to the validation features file (in .npy format), training rows held out before rebalancing
+    transformed_validation_file_path: str = os.path.join(
+        data_transformation_dir,
+        DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+        VALIDATION_FILE_NAME.replace("csv", "npy")
+    )
+    # Path to the validation labels file (in .npy format)
+    transformed_validation_label_file_path: str = os.path.join(
+        data_transformation_dir,
+        DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+        VALIDATION_FILE_NAME.replace(".csv", "_labels.npy")
+    )
     # Path to the serialized preprocessing object file
     transformed_object_file_path: str = os.path.join(
         data_transformation_dir,
         DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
         PREPROCESSING_OBJECT_FILE_NAME
     )
+    # Dtype of the saved transformed feature arrays
+    array_dtype: str = DATA_TRANSFORMATION_ARRAY_DTYPE
+    # Dtype of the saved transformed label arrays
+    label_dtype: str = DATA_TRANSFORMATION_LABEL_DTYPE
+    # Class rebalancing strategy applied to the training set
+    rebalancing_strategy: str = REBALANCING_STRATEGY
+    # Target size of the other classes relative to the majority class after rebalancing
+    rebalancing_sampling_ratio: float = REBALANCING_SAMPLING_RATIO
+    # Cores used by the rebalancing neighbor searches
+    rebalancing_n_jobs: int = REBALANCING_N_JOBS
+    # Trained model whose preprocessing object is reused instead of fitting a new one (incremental training)
+    base_model_file_path: str = None
+    # "in_memory" or "out_of_core" (chunked fit and transform for data larger than RAM)
+    transformation_mode: str = DATA_TRANSFORMATION_MODE
+    # Rows per chunk in "out_of_core" mode
+    chunk_size: int = DATA_TRANSFORMATION_CHUNK_SIZE
+    # Threads reading, transforming and writing train and test concurrently
+    split_workers: int = DATA_TRANSFORMATION_SPLIT_WORKERS
+    # Share of every class of the training rows held out for validation (hyperparameter search, compaction)
+    validation_split_ratio: float = DATA_TRANSFORMATION_VALIDATION_SPLIT_RATIO
+    # Hold out the validation rows; set by the pipeline when search or compaction is enabled in config/model.yaml
+    validation_split_enabled: bool = False
+    # Seed of the validation rows selection
+    validation_random_state: int = DATA_TRANSFORMATION_VALIDATION_RANDOM_STATE
 
 @dataclass
 class ModelTrainerConfig:
@@ -73,6 +198,10 @@ class ModelTrainerConfig:
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE 
     # Path to the model config file
     model_config_file_path = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
+    # Path to the leaderboard of the hyperparameter search trials
+    search_leaderboard_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_SEARCH_LEADERBOARD_FILE_NAME)
+    # Path to the report of the forest compaction
+    compaction_report_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_COMPACTION_REPORT_FILE_NAME)
     # Number of estimators for the model
     _n_estimators = MODEL_TRAINER_N_ESTIMATORS
     # Minimum samples required to split an internal node
@@ -85,6 +214,8 @@ class ModelTrainerConfig:
     _criterion = MIN_SAMPLES_SPLIT_CRITERION
     # Random state for reproducibility
     _random_state = MIN_SAMPLES_SPLIT_RANDOM_STATE
+    # Trained model whose forest is grown with new trees (incremental training), None to train from scratch
+    base_model_file_path: str = None
 
 @dataclass
 class ModelEvaluationConfig:
@@ -94,6 +225,12 @@ class ModelEvaluationConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     # S3 key path for the model file
     s3_model_key_path: str = MODEL_FILE_NAME
+    # Test rows scored at once by each model
+    chunk_size: int = MODEL_EVALUATION_CHUNK_SIZE
+    # Directory of the production model prediction cache, shared by all runs
+    prediction_cache_dir: str = MODEL_EVALUATION_PREDICTION_CACHE_DIR
+    # Cached prediction files kept
+    prediction_cache_max_entries: int = MODEL_EVALUATION_PREDICTION_CACHE_MAX_ENTRIES
 
 @dataclass
 class ModelPusherConfig:
@@ -40,6 +40,19 @@ class VehicleEstimator:
             logging.error(f"Error checking model presence: {e}")
             raise MyException(e, sys)
 
+    def get_model_version(self):
+        """
+        Get the version of the model in S3 (its ETag), without downloading it.
+
+        Returns:
+            str: Version identifier of the model.
+        """
+        try:
+            return self.s3.get_object_etag(bucket_name=self.bucket_name, s3_key=self.model_path)
+        except Exception as e:
+            logging.error(f"Error getting model version: {e}")
+            raise MyException(e, sys)
+
     def load_model(self):
         """
         Load the model from S3.
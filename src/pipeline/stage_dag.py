@@ -0,0 +1,208 @@
+import sys
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import get_context
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import replace_file
+
+# Executors a stage node can run on
+STAGE_NODE_EXECUTORS = ["thread", "process"]
+
+
+@dataclass
+class StageNode:
+    # Unique name of the node
+    name: str
+    # Called with the results of depends_on, in order; must be picklable (module level) on the "process" executor
+    func: Callable
+    # Nodes whose results this node needs
+    depends_on: list = field(default_factory=list)
+    # "thread" (shares the pipeline state, for I/O bound or GIL releasing work) or "process"
+    executor: str = "thread"
+
+
+def _timed_call(func, args):
+    # Runs a node and returns its result with its wall clock start and end, comparable across processes
+    start = time.time()
+    result = func(*args)
+    return result, start, time.time()
+
+
+class StageDAGExecutor:
+    """
+    Runs a declarative DAG of pipeline stages, starting every node as soon as its dependencies are done.
+
+    Independent nodes run concurrently, on threads or on spawned processes, with at most
+    max_workers nodes running at once across both. Every node is timed, and the run
+    summary gives the critical path: the chain of dependent nodes that bounds the wall time,
+    so speeding up any other node does not shorten the run. The slack of a node is how much
+    longer it could have taken without lengthening the critical path.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers (int): Nodes running at once.
+        """
+        self.max_workers = max(1, max_workers)
+        self._timings = {}
+        self._nodes = []
+        self._wall_time_s = 0.0
+
+    @staticmethod
+    def topological_order(nodes: list) -> list:
+        """
+        Returns the nodes ordered so every node comes after its dependencies, keeping the declaration order otherwise.
+
+        Raises:
+            MyException: If names are duplicated, a dependency is unknown or the graph has a cycle.
+        """
+        try:
+            by_name = {}
+            for node in nodes:
+                if node.name in by_name:
+                    raise ValueError(f"Duplicate stage node {node.name}")
+                if node.executor not in STAGE_NODE_EXECUTORS:
+                    raise ValueError(f"Unknown executor {node.executor} of {node.name}, expected one of {STAGE_NODE_EXECUTORS}")
+                by_name[node.name] = node
+            for node in nodes:
+                unknown = [name for name in node.depends_on if name not in by_name]
+                if unknown:
+                    raise ValueError(f"Stage node {node.name} depends on unknown nodes {unknown}")
+            ordered, done = [], set()
+            while len(ordered) < len(nodes):
+                ready = [node for node in nodes if node.name not in done and all(name in done for name in node.depends_on)]
+                if not ready:
+                    raise ValueError(f"Stage nodes form a cycle: {sorted(set(by_name) - done)}")
+                ordered.extend(ready)
+                done.update(node.name for node in ready)
+            return ordered
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def run(self, nodes: list) -> dict:
+        """
+        Runs the nodes and returns their results by name.
+        When a node fails, no new node is started, running nodes are awaited and the error is raised.
+        """
+        try:
+            self._nodes = self.topological_order(nodes)
+            self._timings = {}
+            results, running, error = {}, {}, None
+            pending = list(self._nodes)
+            start = time.time()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as thread_pool:
+                process_pool = None
+                try:
+                    while pending or running:
+                        # Start ready nodes in declaration order within the worker budget
+                        for node in list(pending):
+                            if error is not None or len(running) >= self.max_workers:
+                                break
+                            if not all(name in results for name in node.depends_on):
+                                continue
+                            if node.executor == "process" and process_pool is None:
+                                process_pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+                            pool = process_pool if node.executor == "process" else thread_pool
+                            args = [results[name] for name in node.depends_on]
+                            logging.info(f"Starting stage node {node.name} on a {node.executor}")
+                            running[pool.submit(_timed_call, node.func, args)] = node
+                            pending.remove(node)
+                        if not running:
+                            break
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            node = running.pop(future)
+                            try:
+                                results[node.name], node_start, node_end = future.result()
+                            except Exception as node_error:
+                                logging.error(f"Stage node {node.name} failed: {node_error}")
+                                self._timings[node.name] = {"status": "failed"}
+                                error = error or node_error
+                                continue
+                            self._timings[node.name] = {"status": "completed", "start_s": node_start - start, "end_s": node_end - start}
+                finally:
+                    if process_pool is not None:
+                        process_pool.shutdown()
+            self._wall_time_s = time.time() - start
+            for node in pending:
+                self._timings[node.name] = {"status": "skipped"}
+            logging.info(self.summary())
+            if error is not None:
+                raise error
+            return results
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def report(self) -> dict:
+        """
+        Returns the timings of every node, the critical path and the achieved parallelism.
+        """
+        elapsed = {node.name: self._timings[node.name]["end_s"] - self._timings[node.name]["start_s"]
+                   for node in self._nodes if self._timings.get(node.name, {}).get("status") == "completed"}
+        # Longest chain of completed nodes ending at (to) and starting from (from) every node
+        path_to, previous = {}, {}
+        for node in self._nodes:
+            if node.name not in elapsed:
+                continue
+            parents = [name for name in node.depends_on if name in path_to]
+            previous[node.name] = max(parents, key=path_to.get) if parents else None
+            path_to[node.name] = elapsed[node.name] + (path_to[previous[node.name]] if parents else 0.0)
+        path_from = {}
+        for node in reversed(self._nodes):
+            if node.name not in elapsed:
+                continue
+            children = [child.name for child in self._nodes if node.name in child.depends_on and child.name in path_from]
+            path_from[node.name] = elapsed[node.name] + max((path_from[name] for name in children), default=0.0)
+        critical_path = []
+        name = max(path_to, key=path_to.get) if path_to else None
+        while name is not None:
+            critical_path.insert(0, name)
+            name = previous[name]
+        critical_path_s = max(path_to.values(), default=0.0)
+        nodes = {}
+        for node in self._nodes:
+            timing = dict(self._timings.get(node.name, {"status": "not_run"}))
+            if node.name in elapsed:
+                timing = {
+                    "status": timing["status"],
+                    "start_s": round(timing["start_s"], 3),
+                    "end_s": round(timing["end_s"], 3),
+                    "elapsed_s": round(elapsed[node.name], 3),
+                    "slack_s": round(critical_path_s - (path_to[node.name] + path_from[node.name] - elapsed[node.name]), 3),
+                }
+            nodes[node.name] = {**timing, "depends_on": list(node.depends_on), "executor": node.executor}
+        return {
+            "max_workers": self.max_workers,
+            "wall_time_s": round(self._wall_time_s, 3),
+            "node_time_s": round(sum(elapsed.values()), 3),
+            "critical_path_s": round(critical_path_s, 3),
+            "critical_path": critical_path,
+            # Node time over wall time: 1 when nothing overlapped
+            "parallelism": round(sum(elapsed.values()) / self._wall_time_s, 2) if self._wall_time_s else 0.0,
+            "nodes": nodes,
+        }
+
+    def summary(self) -> str:
+        """
+        Returns a one line critical path timing summary.
+        """
+        report = self.report()
+        return (f"Stage DAG ran in {report['wall_time_s']} s ({report['node_time_s']} s of stage time, "
+                f"parallelism {report['parallelism']}); critical path {report['critical_path_s']} s: "
+                + " -> ".join(f"{name} ({report['nodes'][name]['elapsed_s']} s)" for name in report["critical_path"]))
+
+    def save_report(self, file_path: str):
+        """
+        Writes the timing report to a JSON file.
+        """
+        try:
+            with replace_file(file_path) as tmp_path, open(tmp_path, "w") as report_file:
+                json.dump(self.report(), report_file, indent=4)
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,286 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+import dataclasses
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.constants import (STAGE_PROFILE_MEMORY_METHOD, STAGE_PROFILE_SAMPLE_INTERVAL_S, STAGE_PROFILE_REPORT_FILE_NAME,
+                           STAGE_PROFILE_REGRESSION_THRESHOLD, STAGE_PROFILE_REGRESSION_MIN_DELTAS)
+from src.entity.artifact_entity import StageProfile
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import check_choice, replace_file
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, child process CPU time is then left out
+    resource = None
+
+# Memory measurements of the profiler: resident set size samples, or also tracemalloc peaks
+STAGE_PROFILE_MEMORY_METHODS = ["rss", "tracemalloc"]
+
+
+def get_rss_bytes():
+    """
+    Returns the resident set size of the process, None when the OS does not expose it (/proc/self/statm).
+    """
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def get_io_bytes():
+    """
+    Returns the bytes the process read from and wrote to storage so far, None when not exposed (/proc/self/io).
+    """
+    try:
+        with open("/proc/self/io") as io_file:
+            counters = dict(line.split(": ") for line in io_file.read().splitlines())
+        return int(counters["read_bytes"]), int(counters["write_bytes"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def get_cpu_time_s() -> float:
+    """
+    Returns the CPU time of the process (all threads) plus the CPU time of its ended child processes.
+    """
+    cpu_time_s = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_time_s += children.ru_utime + children.ru_stime
+    return cpu_time_s
+
+
+class _PeakRSSSampler:
+    # Samples the resident set size on a background thread and keeps the highest value
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.peak_bytes = get_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def _sample(self):
+        rss_bytes = get_rss_bytes()
+        if rss_bytes is not None:
+            self.peak_bytes = max(self.peak_bytes or 0, rss_bytes)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class StageProfiler:
+    """
+    Measures the resources used by every pipeline stage: wall and CPU time, peak and change of
+    resident memory, rows processed and bytes read and written.
+
+    Artifact bytes come from the artifact store statistics of the stage, so they stay exact when
+    stages overlap. CPU time, memory and OS I/O are process-wide: for stages running concurrently
+    in the stage DAG they include the work of the other stages.
+    """
+
+    def __init__(self, artifact_store=None, memory_method: str = STAGE_PROFILE_MEMORY_METHOD,
+                 sample_interval_s: float = STAGE_PROFILE_SAMPLE_INTERVAL_S):
+        """
+        Args:
+            artifact_store (ArtifactStore, optional): Store whose per-stage statistics give the artifact bytes.
+            memory_method (str): One of STAGE_PROFILE_MEMORY_METHODS; "tracemalloc" slows allocations down.
+            sample_interval_s (float): Seconds between resident set size samples.
+        """
+        check_choice("memory method", memory_method, STAGE_PROFILE_MEMORY_METHODS)
+        self.artifact_store = artifact_store
+        self.memory_method = memory_method
+        self.sample_interval_s = sample_interval_s
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._traced_stages = 0
+        self._owns_tracing = False
+
+    def _artifact_stats(self, stage_name: str) -> dict:
+        # Artifact store counters of the stage so far
+        if self.artifact_store is None:
+            return {}
+        return self.artifact_store.report()["stages"].get(stage_name, {})
+
+    def _start_tracing(self):
+        # Trace allocations while at least one stage is profiled with tracemalloc
+        with self._lock:
+            if self._traced_stages == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            self._traced_stages += 1
+            tracemalloc.reset_peak()
+
+    def _stop_tracing(self) -> float:
+        # Peak traced memory since the stage started, in MB
+        with self._lock:
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            self._traced_stages -= 1
+            if self._traced_stages == 0 and self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+        return peak_mb
+
+    @contextmanager
+    def profile(self, stage_name: str):
+        """
+        Profiles the code inside the context as the given stage and yields its StageProfile, whose
+        rows the caller sets. The profile is recorded even when the stage fails.
+        """
+        profile = StageProfile(stage=stage_name)
+        artifact_stats_start = self._artifact_stats(stage_name)
+        io_start = get_io_bytes()
+        rss_start = get_rss_bytes()
+        if self.memory_method == "tracemalloc":
+            self._start_tracing()
+        cpu_start = get_cpu_time_s()
+        wall_start = time.perf_counter()
+        try:
+            with _PeakRSSSampler(self.sample_interval_s) as sampler:
+                yield profile
+        finally:
+            profile.wall_time_s = round(time.perf_counter() - wall_start, 3)
+            profile.cpu_time_s = round(get_cpu_time_s() - cpu_start, 3)
+            if self.memory_method == "tracemalloc":
+                profile.peak_traced_mb = round(self._stop_tracing(), 1)
+            rss_end = get_rss_bytes()
+            if sampler.peak_bytes is not None:
+                profile.peak_rss_mb = round(sampler.peak_bytes / 1024 ** 2, 1)
+            if rss_start is not None and rss_end is not None:
+                profile.rss_delta_mb = round((rss_end - rss_start) / 1024 ** 2, 1)
+            artifact_stats = self._artifact_stats(stage_name)
+            if self.artifact_store is not None:
+                for profile_field, counter in (("bytes_read", "disk_bytes_read"), ("bytes_written", "disk_bytes_written"),
+                                               ("bytes_served_from_memory", "memory_bytes_served")):
+                    setattr(profile, profile_field, artifact_stats.get(counter, 0) - artifact_stats_start.get(counter, 0))
+            io_end = get_io_bytes()
+            if io_start is not None and io_end is not None:
+                profile.os_bytes_read, profile.os_bytes_written = io_end[0] - io_start[0], io_end[1] - io_start[1]
+            with self._lock:
+                self._profiles[stage_name] = profile
+            logging.info(f"Stage profile: {profile}")
+
+    @staticmethod
+    def attach(artifact, profile: StageProfile):
+        """
+        Returns a copy of the stage artifact holding its profile (None stays None).
+        """
+        return dataclasses.replace(artifact, stage_profile=profile) if artifact is not None else None
+
+    def report(self) -> dict:
+        """
+        Returns the profile of every stage and totals over the run.
+        """
+        with self._lock:
+            stages = {stage_name: dataclasses.asdict(profile) for stage_name, profile in self._profiles.items()}
+
+        def total(metric, aggregate=sum):
+            values = [profile[metric] for profile in stages.values() if profile[metric] is not None]
+            return aggregate(values) if values else None
+
+        return {
+            "memory_method": self.memory_method,
+            "stages": stages,
+            "totals": {
+                # Stages overlapping in the stage DAG are counted once each
+                "wall_time_s": total("wall_time_s"),
+                "cpu_time_s": total("cpu_time_s"),
+                "peak_rss_mb": total("peak_rss_mb", max),
+                "rows": total("rows"),
+                "bytes_read": total("bytes_read"),
+                "bytes_written": total("bytes_written"),
+            },
+        }
+
+    def save_report(self, file_path: str):
+        """
+        Writes the profile report to a JSON file.
+        """
+        try:
+            with replace_file(file_path) as tmp_path, open(tmp_path, "w") as report_file:
+                json.dump(self.report(), report_file, indent=4)
+        except Exception as e:
+            raise MyException(e, sys)
+
+
+def load_profile_report(path: str) -> dict:
+    """
+    Loads a stage profile report from its file or from the run directory (artifacts/<timestamp>) holding it.
+    """
+    try:
+        if os.path.isdir(path):
+            path = os.path.join(path, STAGE_PROFILE_REPORT_FILE_NAME)
+        with open(path) as report_file:
+            return json.load(report_file)
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def compare_profile_reports(base_report: dict, new_report: dict, threshold: float = STAGE_PROFILE_REGRESSION_THRESHOLD,
+                            min_deltas: dict = None) -> list:
+    """
+    Compares the stage metrics of two runs. A metric of STAGE_PROFILE_REGRESSION_MIN_DELTAS regressed when
+    it grew by more than threshold (relative) and by at least its minimum delta (absolute); other metrics,
+    such as rows, are informational.
+
+    Returns:
+        list: One dict per stage and metric with the base and new values, the change and the regression flag.
+    """
+    min_deltas = STAGE_PROFILE_REGRESSION_MIN_DELTAS if min_deltas is None else min_deltas
+    metrics = [profile_field.name for profile_field in dataclasses.fields(StageProfile) if profile_field.name != "stage"]
+    rows = []
+    for stage_name in list(base_report["stages"]) + [name for name in new_report["stages"] if name not in base_report["stages"]]:
+        base_profile = base_report["stages"].get(stage_name, {})
+        new_profile = new_report["stages"].get(stage_name, {})
+        for metric in metrics:
+            base_value, new_value = base_profile.get(metric), new_profile.get(metric)
+            if base_value is None and new_value is None:
+                continue
+            change = new_value - base_value if base_value is not None and new_value is not None else None
+            change_pct = round(100 * change / base_value, 1) if change is not None and base_value else None
+            regression = (metric in min_deltas and change is not None and change >= min_deltas[metric]
+                          and change > threshold * abs(base_value))
+            rows.append({"stage": stage_name, "metric": metric, "base": base_value, "new": new_value,
+                         "change": round(change, 3) if change is not None else None,
+                         "change_pct": change_pct, "regression": regression})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the stage profiles of two training runs and flag regressions")
+    parser.add_argument("base", help="Baseline run directory (artifacts/<timestamp>) or profile report file")
+    parser.add_argument("new", help="Run directory or profile report file compared with the baseline")
+    parser.add_argument("--threshold", type=float, default=STAGE_PROFILE_REGRESSION_THRESHOLD,
+                        help="Relative increase of a metric reported as a regression")
+    parser.add_argument("--all", action="store_true", help="Show every metric, not only the changed ones")
+    args = parser.parse_args()
+
+    comparison = pd.DataFrame(compare_profile_reports(load_profile_report(args.base), load_profile_report(args.new), args.threshold))
+    if not args.all and not comparison.empty:
+        comparison = comparison[comparison["change"].fillna(1) != 0]
+    print(comparison.to_string(index=False) if not comparison.empty else "No stage metric changed")
+    regressions = comparison[comparison["regression"]] if not comparison.empty else comparison
+    for row in regressions.itertuples():
+        change = f"{row.change_pct:+}%" if pd.notna(row.change_pct) else f"{row.change:+}"
+        print(f"REGRESSION {row.stage}.{row.metric}: {row.base} -> {row.new} ({change})")
+    # Non-zero exit status so CI jobs fail on regressions
+    sys.exit(1 if len(regressions) else 0)
@@ -1,4 +1,6 @@
+import os
 import sys
+import dataclasses
 from src.exception import MyException
 from src.logger import logging
 
@@ -8,18 +10,136 @@ from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
 from src.components.model_evaluation import ModelEvaluation
 from src.components.model_pusher import ModelPusher
-from src.entity.config_entity import DataIngestionConfig, DataValidationConfig, DataTransformationConfig, ModelTrainerConfig, ModelEvaluationConfig,ModelPusherConfig
+from src.components.rebalancer import Rebalancer
+from src.components.hyperparameter_search import HyperparameterSearch
+from src.components.model_factory import ModelFactory
+from src.components.metrics_engine import MetricsEngine
+from src.components.sharded_training import ShardedForestTrainer
+from src.components.forest_compaction import ForestCompactor
+from src.entity.compact_forest import CompactForest
+from src.constants import SCHEMA_FILE_PATH, STAGE_CACHE_SCHEMA_SECTIONS, ARTFACT_DIR, RESUME_LATEST_RUN
+from src.data_access.artifact_store import ArtifactStore
+from src.data_access.proj_data import ProjData
+from src.data_access.stage_cache import StageCache
+from src.data_access.run_checkpoint import RunCheckpoint, find_latest_run_dir, rebase_paths
+from src.data_access.blob_store import BlobStore
+from src.pipeline.stage_dag import StageNode, StageDAGExecutor
+from src.pipeline.stage_profiler import StageProfiler
+from src.entity.categorical_encoder import CategoricalEncoder
+from src.entity.estimator import MyModel
+from src.utils import main_utils
+from src.utils.schema_validator import SchemaValidator
+from src.utils.column_profile import DataProfile
+from src.utils.main_utils import read_yaml, get_previous_run_file_path, load_numpy_data
+from src.entity.config_entity import training_pipeline_config, DataIngestionConfig, DataValidationConfig, DataTransformationConfig, ModelTrainerConfig, ModelEvaluationConfig,ModelPusherConfig
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact, ModelTrainerArtifact, ModelPusherArtifact,ModelEvaluationArtifact
 
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, resume_run_dir: str = None):
+        """
+        Args:
+            resume_run_dir (str, optional): Run directory (artifacts/<timestamp>) of a failed run to resume
+                from its first incomplete stage, or "latest" for the most recent run with checkpoints.
+                A new run directory is used when not set.
+        """
         # Initialize configuration objects for each pipeline stage
+        self.training_pipeline_config = training_pipeline_config
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
         self.data_transformation_config = DataTransformationConfig()
         self.model_trainer_config = ModelTrainerConfig()
         self.model_eval_config = ModelEvaluationConfig()
         self.model_pusher_config = ModelPusherConfig()
+        if resume_run_dir == RESUME_LATEST_RUN:
+            resume_run_dir = find_latest_run_dir(ARTFACT_DIR)
+            if resume_run_dir is None:
+                logging.info("No run with checkpoints to resume, starting a new run")
+        if resume_run_dir:
+            self.use_run_dir(resume_run_dir)
+        # Shared store that hands artifacts between stages in memory and tracks I/O per stage
+        self.artifact_store = ArtifactStore(
+            memory_budget_bytes=self.training_pipeline_config.artifact_store_memory_budget_mb * 1024 ** 2
+        )
+        # Cache shared by all runs that skips stages whose inputs did not change since an earlier run
+        self.stage_cache = StageCache(
+            run_artifact_dir=self.training_pipeline_config.artifact_dir,
+            cache_dir=self.training_pipeline_config.stage_cache_dir,
+            max_size_bytes=self.training_pipeline_config.stage_cache_max_size_mb * 1024 ** 2,
+            enabled=self.training_pipeline_config.stage_cache_enabled,
+            stages=self.training_pipeline_config.stage_cache_stages
+        )
+        # Stage completion manifests of this run, reused when resuming it
+        self.checkpoint = RunCheckpoint(
+            run_artifact_dir=self.training_pipeline_config.artifact_dir,
+            resume=bool(resume_run_dir),
+            file_digest=self.stage_cache.file_fingerprint
+        )
+        # Content-addressed storage shared by all runs, deduplicating identical run artifacts
+        self.blob_store = BlobStore(
+            blob_dir=self.training_pipeline_config.blob_store_dir,
+            file_digest=self.stage_cache.file_fingerprint
+        )
+        # Wall and CPU time, memory, rows and bytes of every stage
+        self.profiler = StageProfiler(
+            artifact_store=self.artifact_store,
+            memory_method=self.training_pipeline_config.profile_memory_method,
+            sample_interval_s=self.training_pipeline_config.profile_sample_interval_s
+        )
+        # Runs the stages of get_stage_dag, overlapping the independent ones
+        self.dag_executor = StageDAGExecutor(max_workers=self.training_pipeline_config.dag_max_workers)
+        self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
+
+    def use_run_dir(self, run_dir: str):
+        """
+        Points the pipeline and stage configs to an existing run directory instead of the new one.
+        """
+        logging.info(f"Resuming run {run_dir}")
+        current_run_dir = self.training_pipeline_config.artifact_dir
+        self.training_pipeline_config = rebase_paths(dataclasses.replace(self.training_pipeline_config), current_run_dir, run_dir)
+        for config in (self.data_ingestion_config, self.data_validation_config, self.data_transformation_config,
+                       self.model_trainer_config, self.model_eval_config, self.model_pusher_config):
+            rebase_paths(config, current_run_dir, run_dir)
+
+    def get_base_model_path(self):
+        """
+        Returns the trained model grown in incremental training (config/model.yaml), None to train from scratch.
+        Defaults to the trained model of the most recent earlier run.
+        """
+        incremental = ModelTrainer.load_model_config(self.model_trainer_config.model_config_file_path)["incremental"]
+        if not incremental["enabled"]:
+            return None
+        base_model_path = incremental["base_model_path"] or get_previous_run_file_path(self.model_trainer_config.trained_model_file_path)
+        if base_model_path is None:
+            logging.info("Incremental training enabled but no earlier trained model found, training from scratch")
+        return base_model_path
+
+    def needs_validation_split(self) -> bool:
+        """
+        Returns whether the trainer scores candidates on held-out validation rows: hyperparameter search
+        or forest compaction enabled in config/model.yaml.
+        """
+        model_config = ModelTrainer.load_model_config(self.model_trainer_config.model_config_file_path)
+        return model_config["search"]["enabled"] or model_config["compaction"]["enabled"]
+
+    def count_ingested_rows(self, data_ingestion_artifact: DataIngestionArtifact) -> int:
+        """
+        Returns the rows of the train and test data files (from the file metadata).
+        """
+        return (self.artifact_store.count_rows(data_ingestion_artifact.trained_file_path)
+                + self.artifact_store.count_rows(data_ingestion_artifact.test_file_path))
+
+    @staticmethod
+    def count_array_rows(*file_paths) -> int:
+        """
+        Returns the total rows of numpy array files (from their headers, memory-mapped).
+        """
+        return sum(load_numpy_data(file_path, mmap_mode="r").shape[0] for file_path in file_paths)
+
+    def get_stage_schema(self, stage_name: str) -> dict:
+        """
+        Returns the schema sections the given stage depends on.
+        """
+        return {section: self._schema_config.get(section) for section in STAGE_CACHE_SCHEMA_SECTIONS.get(stage_name, [])}
 
     def start_data_ingestion(self) -> DataIngestionArtifact:
         """
@@ -32,12 +152,27 @@ class TrainPipeline:
             logging.info("Entered the data ingestion method of training pipeline")
             logging.info("Getting data from mongodb")
             # Create a DataIngestion object with the configuration
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config,
+                                           artifact_store=self.artifact_store)
             # Start the data ingestion process and get the artifact
-            data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            with self.profiler.profile("data_ingestion") as stage_profile:
+                with self.artifact_store.stage("data_ingestion"):
+                    data_ingestion_artifact = self.checkpoint.run("data_ingestion", DataIngestionArtifact, lambda: self.stage_cache.run(
+                        "data_ingestion", DataIngestionArtifact, data_ingestion.initiate_data_ingestion,
+                        inputs=lambda: {
+                            "data": ProjData().get_collection_fingerprint(self.data_ingestion_config.collection_name,
+                                                                          self.data_ingestion_config.database_name),
+                            "config": self.stage_cache.config_fingerprint(self.data_ingestion_config),
+                            "schema": self.get_stage_schema("data_ingestion"),
+                            "code": self.stage_cache.code_fingerprint(DataIngestion, ProjData, main_utils),
+                        },
+                        # The feature store export is restored with the train and test files on a cache hit
+                        output_files=[self.data_ingestion_config.feature_store_file_path]
+                    ), output_files=[self.data_ingestion_config.feature_store_file_path])
+                stage_profile.rows = self.count_ingested_rows(data_ingestion_artifact)
             logging.info("Got train and test data from mongoDB")
             logging.info("Exited the data ingestion method of training pipeline")
-            return data_ingestion_artifact
+            return self.profiler.attach(data_ingestion_artifact, stage_profile)
         
         except Exception as e:
             # Raise a custom exception if any error occurs
@@ -55,18 +190,41 @@ class TrainPipeline:
             # Create a DataValidation object with the ingestion artifact and config
             data_validation = DataValidation(
                 data_ingestion_artifact=data_ingestion_artifact,
-                data_validation_config=self.data_validation_config
+                data_validation_config=self.data_validation_config,
+                artifact_store=self.artifact_store
             )
             # Start the data validation process and get the artifact
-            data_validation_artifact = data_validation.initiate_data_validation()
+            with self.profiler.profile("data_validation") as stage_profile:
+                with self.artifact_store.stage("data_validation"):
+                    data_validation_artifact = self.checkpoint.run("data_validation", DataValidationArtifact, lambda: self.stage_cache.run(
+                        "data_validation", DataValidationArtifact, data_validation.initiate_data_validation,
+                        inputs=lambda: self.get_data_validation_inputs(data_validation, data_ingestion_artifact),
+                        output_files=[self.data_validation_config.profile_file_path]
+                    ), output_files=[self.data_validation_config.profile_file_path])
+                stage_profile.rows = self.count_ingested_rows(data_ingestion_artifact)
             logging.info("Performed the data validation operation")
             logging.info("Exited the start data validation method")
-            return data_validation_artifact
+            return self.profiler.attach(data_validation_artifact, stage_profile)
         except Exception as e:
             # Raise a custom exception if any error occurs
             raise MyException(e, sys)
         
 
+    def get_data_validation_inputs(self, data_validation: DataValidation, data_ingestion_artifact: DataIngestionArtifact) -> dict:
+        """
+        Returns the stage cache inputs of data validation.
+        The previous run's profile only changes the outcome when drift fails the validation;
+        otherwise the cached drift section stays informational.
+        """
+        previous_profile_path = data_validation.get_previous_profile_path() if self.data_validation_config.fail_on_drift else None
+        return {
+            "data": self.stage_cache.artifact_fingerprint(data_ingestion_artifact),
+            "previous_profile": self.stage_cache.file_fingerprint(previous_profile_path) if previous_profile_path else None,
+            "config": self.stage_cache.config_fingerprint(self.data_validation_config),
+            "schema": self.get_stage_schema("data_validation"),
+            "code": self.stage_cache.code_fingerprint(DataValidation, SchemaValidator, DataProfile, main_utils),
+        }
+
     def start_data_transformation(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact):
         """
         Starts the data transformation process:
@@ -75,15 +233,36 @@ class TrainPipeline:
         - Returns the data transformation artifact
         """
         try:
+            # Reuse the base model's preprocessor when growing its forest
+            self.data_transformation_config.base_model_file_path = self.get_base_model_path()
+            # Hold out validation rows only for the trainer stages scoring on them
+            self.data_transformation_config.validation_split_enabled = self.needs_validation_split()
             # Create a DataTransformation object with the required artifacts and config
             data_transformation = DataTransformation(
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_transformation_config=self.data_transformation_config,
-                data_validation_artifact=data_validation_artifact  # Pass validation artifact
+                data_validation_artifact=data_validation_artifact,  # Pass validation artifact
+                artifact_store=self.artifact_store
             )
             # Start the data transformation process and get the artifact
-            data_transformation_artifact = data_transformation.initiate_data_transformation()
-            return data_transformation_artifact
+            with self.profiler.profile("data_transformation") as stage_profile:
+                with self.artifact_store.stage("data_transformation"):
+                    data_transformation_artifact = self.checkpoint.run("data_transformation", DataTransformationArtifact, lambda: self.stage_cache.run(
+                        "data_transformation", DataTransformationArtifact, data_transformation.initiate_data_transformation,
+                        inputs=lambda: {
+                            "data": self.stage_cache.artifact_fingerprint(data_ingestion_artifact),
+                            "validation": data_validation_artifact.validation_status,
+                            "base_model": self.stage_cache.file_fingerprint(self.data_transformation_config.base_model_file_path)
+                            if self.data_transformation_config.base_model_file_path else None,
+                            "config": self.stage_cache.config_fingerprint(self.data_transformation_config),
+                            "schema": self.get_stage_schema("data_transformation"),
+                            "code": self.stage_cache.code_fingerprint(DataTransformation, CategoricalEncoder, Rebalancer, main_utils),
+                        }
+                    ))
+                # Training rows after rebalancing plus test rows
+                stage_profile.rows = self.count_array_rows(data_transformation_artifact.transformed_train_label_file_path,
+                                                           data_transformation_artifact.transformed_test_label_file_path)
+            return self.profiler.attach(data_transformation_artifact, stage_profile)
         
         except Exception as e:
             # Raise a custom exception if any error occurs
@@ -97,31 +276,76 @@ class TrainPipeline:
         - Trains the model and returns the model trainer artifact
         """
         try:
+            # Forest grown in incremental training, None to train from scratch
+            self.model_trainer_config.base_model_file_path = self.get_base_model_path()
             # Create a ModelTrainer object with the transformation artifact and config
             model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
-                                         model_trainer_config=self.model_trainer_config)
+                                         model_trainer_config=self.model_trainer_config,
+                                         artifact_store=self.artifact_store)
             # Start the model training process and get the artifact
-            model_trainer_artifact = model_trainer.initiate_model_trainer()
-            return model_trainer_artifact
+            with self.profiler.profile("model_trainer") as stage_profile:
+                with self.artifact_store.stage("model_trainer"):
+                    model_trainer_artifact = self.checkpoint.run("model_trainer", ModelTrainerArtifact, lambda: self.stage_cache.run(
+                        "model_trainer", ModelTrainerArtifact, model_trainer.initiate_model_trainer,
+                        inputs=lambda: {
+                            "data": self.stage_cache.artifact_fingerprint(data_transformation_artifact),
+                            "model_config": self.stage_cache.file_fingerprint(self.model_trainer_config.model_config_file_path),
+                            "base_model": self.stage_cache.file_fingerprint(self.model_trainer_config.base_model_file_path)
+                            if self.model_trainer_config.base_model_file_path else None,
+                            "config": self.stage_cache.config_fingerprint(self.model_trainer_config),
+                            "code": self.stage_cache.code_fingerprint(ModelTrainer, HyperparameterSearch, ModelFactory, MetricsEngine, ShardedForestTrainer, ForestCompactor, CompactForest, MyModel, main_utils),
+                        },
+                        output_files=[self.model_trainer_config.search_leaderboard_file_path,
+                                      self.model_trainer_config.compaction_report_file_path]
+                    ), output_files=[self.model_trainer_config.search_leaderboard_file_path,
+                                     self.model_trainer_config.compaction_report_file_path])
+                stage_profile.rows = self.count_array_rows(data_transformation_artifact.transformed_train_label_file_path)
+            return self.profiler.attach(model_trainer_artifact, stage_profile)
         
         except Exception as e:
             # Raise a custom exception if any error occurs
             raise MyException(e,sys)
         
-    def start_model_evaluation(self,data_transformation_artifact:DataTransformationArtifact,model_trainer_artifact:ModelTrainerArtifact):
+    def start_champion_prefetch(self, data_ingestion_artifact: DataIngestionArtifact):
+        """
+        Fetches the production model (if any) for model evaluation, downloading it unless its
+        predictions on the test data are cached. Returns the VehicleEstimator or None.
+        """
+        try:
+            # Only the ingestion artifact is needed before the model is trained
+            model_evaluation = ModelEvaluation(model_eval_config=self.model_eval_config,
+                                               data_ingestion_artifact=data_ingestion_artifact,
+                                               data_transformation_artifact=None,
+                                               model_trainer_artifact=None,
+                                               artifact_store=self.artifact_store)
+            with self.profiler.profile("champion_prefetch"), self.artifact_store.stage("champion_prefetch"):
+                return model_evaluation.prefetch_best_model()
+        except Exception as e:
+            # Raise a custom exception if any error occurs
+            raise MyException(e, sys)
+
+    def start_model_evaluation(self,data_ingestion_artifact:DataIngestionArtifact,data_transformation_artifact:DataTransformationArtifact,model_trainer_artifact:ModelTrainerArtifact,best_model=None):
         """
         Starts the model evaluation process:
-        - Uses the transformation and trainer artifacts
+        - Uses the ingestion (raw test data), transformation and trainer artifacts
+        - Uses the production model prefetched by start_champion_prefetch, fetched here when not given
         - Evaluates the trained model and returns the evaluation artifact
         """
         try:
             # Create a ModelEvaluation object with the required configs and artifacts
             model_evaluation = ModelEvaluation(model_eval_config=self.model_eval_config,
+                                               data_ingestion_artifact=data_ingestion_artifact,
                                                data_transformation_artifact=data_transformation_artifact,
-                                               model_trainer_artifact=model_trainer_artifact)
+                                               model_trainer_artifact=model_trainer_artifact,
+                                               artifact_store=self.artifact_store,
+                                               best_model=best_model)
             # Start the model evaluation process and get the artifact
-            model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
-            return model_evaluation_artifact
+            with self.profiler.profile("model_evaluation") as stage_profile:
+                with self.artifact_store.stage("model_evaluation"):
+                    model_evaluation_artifact = self.checkpoint.run("model_evaluation", ModelEvaluationArtifact,
+                                                                    model_evaluation.initiate_model_evaluation)
+                stage_profile.rows = self.count_array_rows(data_transformation_artifact.transformed_test_label_file_path)
+            return self.profiler.attach(model_evaluation_artifact, stage_profile)
         
         except Exception as e:
             # Raise a custom exception if any error occurs
@@ -139,49 +363,92 @@ class TrainPipeline:
             model_pusher = ModelPusher(model_evaluation_artifact=model_evaluation_artifact,
                                        model_pusher_config=self.model_pusher_config)
             # Start the model pusher process and get the artifact
-            model_pusher_artifact = model_pusher.initiate_model_pusher()
-            return model_pusher_artifact
+            with self.profiler.profile("model_pusher") as stage_profile:
+                model_pusher_artifact = self.checkpoint.run("model_pusher", ModelPusherArtifact, model_pusher.initiate_model_pusher)
+            return self.profiler.attach(model_pusher_artifact, stage_profile)
         
         except Exception as e:
             # Raise a custom exception if any error occurs
             raise MyException(e,sys)
 
 
-    def run_pipeline(self):
+    def get_stage_dag(self) -> list:
         """
-        Runs the complete training pipeline:
-        - Starts data ingestion
-        - Starts data validation
-        - Starts data transformation
-        - Starts model training
-        - Starts model evaluation
-        - Handles exceptions using custom exception class
+        Returns the stages of a training run as a DAG: every node is called with the artifacts of
+        the nodes it depends on. The production model is fetched as soon as the test data exists,
+        so its download overlaps validation, transformation and training.
         """
-        try:
-            # Start the data ingestion process
-            data_ingestion_artifact = self.start_data_ingestion()
-            # Start the data validation process
-            data_validation_artifact = self.start_data_validation(
-                data_ingestion_artifact=data_ingestion_artifact
-            )
-            # Start the data transformation process
-            data_transformation_artifact = self.start_data_transformation(
-                data_ingestion_artifact=data_ingestion_artifact,
-                data_validation_artifact=data_validation_artifact
-            )
-            # Start the model training process
-            model_trainer_artifact = self.start_model_training(data_transformation_artifact=data_transformation_artifact)
-            # Start the model evaluation process
-            model_evaluation_artifact = self.start_model_evaluation(data_transformation_artifact=data_transformation_artifact,
-                                                                    model_trainer_artifact=model_trainer_artifact)
-            
+        def push_accepted_model(model_evaluation_artifact: ModelEvaluationArtifact):
             # Check if the model is accepted before pushing
             if not model_evaluation_artifact.is_model_accepted:
                 logging.info("Model not accepted")
                 return None
-            
-            # Start the model pusher process
-            model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            return self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+
+        return [
+            StageNode("data_ingestion", self.start_data_ingestion),
+            StageNode("champion_prefetch", self.start_champion_prefetch, depends_on=["data_ingestion"]),
+            StageNode("data_validation", self.start_data_validation, depends_on=["data_ingestion"]),
+            StageNode("data_transformation", self.start_data_transformation, depends_on=["data_ingestion", "data_validation"]),
+            StageNode("model_trainer", self.start_model_training, depends_on=["data_transformation"]),
+            StageNode("model_evaluation", self.start_model_evaluation,
+                      depends_on=["data_ingestion", "data_transformation", "model_trainer", "champion_prefetch"]),
+            StageNode("model_pusher", push_accepted_model, depends_on=["model_evaluation"]),
+        ]
+
+    def run_pipeline(self):
+        """
+        Runs the complete training pipeline as a stage DAG (see get_stage_dag):
+        - Data ingestion, validation, transformation, model training and evaluation, in dependency order
+        - Production model download overlapped with the stages before evaluation
+        - Pushes the model when accepted
+        - Saves the per-stage artifact read/write report, the stage cache report, the stage timings and the stage profiles
+        - Stores the run artifacts in the blob store and applies the retention policy, after a successful run (when blob_store_enabled)
+        - Handles exceptions using custom exception class
+        """
+        completed = False
+        try:
+            # The run directory may already be in the blob store (resumed run, or a run timestamp reused by
+            # a long-lived process): its files must no longer be shared with other runs before being written
+            self.blob_store.detach_run(self.training_pipeline_config.artifact_dir)
+            self.dag_executor.run(self.get_stage_dag())
+            completed = True
         except Exception as e:
             # Raise a custom exception if any error occurs during pipeline run
+            raise MyException(e, sys)
+        finally:
+            # Persist how many bytes each stage read and wrote, from disk or memory
+            logging.info(f"Artifact store report: {self.artifact_store.report()}")
+            self.artifact_store.save_report(self.training_pipeline_config.artifact_store_report_file_path)
+            # Persist which stages were skipped thanks to the stage cache and the time saved
+            logging.info(f"Stage cache report: {self.stage_cache.report()}")
+            self.stage_cache.save_report(self.training_pipeline_config.stage_cache_report_file_path)
+            # Stages resumed from checkpoints and stages run in this attempt
+            logging.info(f"Run checkpoints: {self.checkpoint.report()}")
+            # Persist the stage timings and the critical path
+            self.dag_executor.save_report(self.training_pipeline_config.dag_report_file_path)
+            # Persist the time, memory, rows and bytes of every stage (compare runs with python -m src.pipeline.stage_profiler)
+            logging.info(f"Stage profile totals: {self.profiler.report()['totals']}")
+            self.profiler.save_report(self.training_pipeline_config.profile_report_file_path)
+            # A failed run stays as it is, to be resumed
+            if completed and self.training_pipeline_config.blob_store_enabled:
+                self.apply_retention()
+
+    def apply_retention(self) -> dict:
+        """
+        Stores the artifacts of this run in the blob store, then applies the retention policy to all runs
+        (see BlobStore.collect_garbage) and deletes the blobs no kept run refers to.
+        """
+        try:
+            self.blob_store.ingest_run(self.training_pipeline_config.artifact_dir)
+            # Trained model kept from older runs that pushed it, relative to their run directory
+            model_file = os.path.relpath(self.model_trainer_config.trained_model_file_path, self.training_pipeline_config.artifact_dir)
+            return self.blob_store.collect_garbage(
+                artifacts_dir=os.path.dirname(self.training_pipeline_config.artifact_dir),
+                keep_last_runs=self.training_pipeline_config.retention_keep_last_runs,
+                keep_pushed_models=self.training_pipeline_config.retention_keep_pushed_models,
+                max_size_bytes=self.training_pipeline_config.retention_max_size_mb * 1024 ** 2,
+                pushed_model_files=[model_file]
+            )
+        except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
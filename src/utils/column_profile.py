@@ -0,0 +1,325 @@
+import sys
+import base64
+
+import numpy as np
+import pandas as pd
+
+from src.constants import PROFILE_HISTOGRAM_BINS, PROFILE_QUANTILE_SKETCH_SIZE, PROFILE_HLL_PRECISION
+from src.exception import MyException
+
+# Quantiles stored in the profile summary
+PROFILE_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+# Floor applied to bin shares so PSI stays finite on empty bins
+PSI_EPSILON = 1e-6
+
+
+class HyperLogLog:
+    """
+    Approximate distinct count with 2^precision one-byte registers; two sketches merge by register maximum.
+    """
+
+    def __init__(self, precision: int = PROFILE_HLL_PRECISION, registers: np.ndarray = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray):
+        """
+        Adds values to the sketch.
+        """
+        # The top bits of the 64-bit hash pick the register, the rank of the first set bit of the rest is stored
+        hashes = pd.util.hash_array(values)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << np.uint64(self.precision)
+        rank = np.full(len(hashes), 64 - self.precision + 1, dtype=np.uint8)
+        nonzero = rest != 0
+        # float64 rounding can push values close to 2^64 to a log2 of 64, rank is at least 1
+        rank[nonzero] = np.maximum(64 - np.floor(np.log2(rest[nonzero].astype(np.float64))), 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        """
+        Merges another sketch with the same precision into this one.
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """
+        Returns the estimated number of distinct values added.
+        """
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        empty = np.count_nonzero(self.registers == 0)
+        # Linear counting is more accurate while many registers are still empty
+        if raw <= 2.5 * m and empty:
+            return int(round(m * np.log(m / empty)))
+        return int(round(raw))
+
+    def to_dict(self) -> dict:
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        return cls(data["precision"], np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy())
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (KLL-style compactors): every level keeps at most k items, each item
+    of level i standing for 2^i values; a full level is sorted and every other item is promoted.
+    """
+
+    def __init__(self, k: int = PROFILE_QUANTILE_SKETCH_SIZE, levels: list = None, seed: int = 0):
+        self.k = k
+        self.levels = levels if levels is not None else [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        """
+        Adds values to the sketch.
+        """
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64)])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        """
+        Merges another sketch into this one, level by level.
+        """
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # An odd item out stays at this level so the total weight is preserved exactly
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], pairs[self._rng.integers(2)::2]])
+                self.levels[level] = keep
+            level += 1
+
+    def quantiles(self, probabilities: list) -> list:
+        """
+        Returns the approximate quantiles of the values added, None when the sketch is empty.
+        """
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return [None] * len(probabilities)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level) for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.array(probabilities) * cumulative[-1], side="left")
+        return items[order][np.minimum(positions, len(items) - 1)].tolist()
+
+    def to_dict(self) -> dict:
+        return {"k": self.k, "levels": [level_items.tolist() for level_items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        return cls(data["k"], [np.array(level_items, dtype=np.float64) for level_items in data["levels"]])
+
+
+class ColumnSketch:
+    """
+    Single-pass summary of one column: row and null counts, a fixed-bin histogram (or level counts
+    for categoricals) and, for numeric columns, a quantile sketch and a distinct count sketch.
+    """
+
+    def __init__(self, kind: str, bin_edges: list = None, levels: list = None, codes: list = None):
+        """
+        Args:
+            kind (str): Schema type of the column ("int", "float" or "category").
+            bin_edges (list, optional): Histogram bin edges of a numeric column.
+            levels (list, optional): Allowed labels of a categorical column.
+            codes (list, optional): Encoded values of the labels, in the same order.
+        """
+        self.kind = kind
+        self.count = 0
+        self.nulls = 0
+        self.bin_edges = np.asarray(bin_edges, dtype=np.float64) if bin_edges is not None else None
+        self.levels = levels
+        self.codes = codes
+        # Numeric histograms carry an underflow and an overflow bin, categoricals an "other" bin
+        if kind == "category":
+            self.counts = np.zeros(len(levels) + 1, dtype=np.int64)
+        else:
+            self.counts = np.zeros(len(self.bin_edges) + 1, dtype=np.int64) if self.bin_edges is not None else None
+            self.quantile_sketch = QuantileSketch()
+            self.distinct_sketch = HyperLogLog()
+
+    def update(self, series: pd.Series):
+        """
+        Adds the values of a chunk of the column to the sketch.
+        """
+        self.count += len(series)
+        is_null = series.isna().to_numpy()
+        self.nulls += int(np.count_nonzero(is_null))
+        if self.kind == "category":
+            self.counts += np.bincount(self._level_positions(series, is_null), minlength=len(self.counts))
+            return
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if self.counts is not None:
+            # Bin 0 is the underflow bin and the last one the overflow bin; the upper edge belongs to the last inner bin
+            positions = np.searchsorted(self.bin_edges, values, side="right")
+            positions[values == self.bin_edges[-1]] = len(self.bin_edges) - 1
+            self.counts += np.bincount(positions, minlength=len(self.counts))
+        self.quantile_sketch.update(values)
+        self.distinct_sketch.update(values)
+
+    def _level_positions(self, series: pd.Series, is_null: np.ndarray) -> np.ndarray:
+        # Position of every non-null value in the levels, unknown values go to the trailing "other" bin
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Look the labels up once per category and map the codes through the lookup
+            lookup = pd.Index(self.levels).get_indexer(series.cat.categories)
+            codes = series.cat.codes.to_numpy()
+            positions = lookup[codes[codes >= 0]]
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            positions = pd.Index(self.codes).get_indexer(series.to_numpy()[~is_null])
+        else:
+            positions = pd.Index(self.levels).get_indexer(series.to_numpy()[~is_null])
+        return np.where(positions < 0, len(self.levels), positions)
+
+    def merge(self, other: "ColumnSketch"):
+        """
+        Adds the counts and sketches of another sketch of the same column.
+        """
+        self.count += other.count
+        self.nulls += other.nulls
+        if self.counts is not None:
+            self.counts += other.counts
+        if self.kind != "category":
+            self.quantile_sketch.merge(other.quantile_sketch)
+            self.distinct_sketch.merge(other.distinct_sketch)
+
+    def to_dict(self) -> dict:
+        data = {"kind": self.kind, "count": self.count, "nulls": self.nulls,
+                "null_rate": self.nulls / self.count if self.count else 0.0,
+                "counts": self.counts.tolist() if self.counts is not None else None}
+        if self.kind == "category":
+            data.update(levels=self.levels, codes=self.codes, distinct_count=int(np.count_nonzero(self.counts)))
+        else:
+            data.update(bin_edges=self.bin_edges.tolist() if self.bin_edges is not None else None,
+                        quantiles=dict(zip(map(str, PROFILE_QUANTILES), self.quantile_sketch.quantiles(PROFILE_QUANTILES))),
+                        distinct_count=self.distinct_sketch.estimate(),
+                        quantile_sketch=self.quantile_sketch.to_dict(),
+                        distinct_sketch=self.distinct_sketch.to_dict())
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnSketch":
+        sketch = cls(data["kind"], bin_edges=data.get("bin_edges"), levels=data.get("levels"), codes=data.get("codes"))
+        sketch.count, sketch.nulls = data["count"], data["nulls"]
+        if data["counts"] is not None:
+            sketch.counts = np.array(data["counts"], dtype=np.int64)
+        if data["kind"] != "category":
+            sketch.quantile_sketch = QuantileSketch.from_dict(data["quantile_sketch"])
+            sketch.distinct_sketch = HyperLogLog.from_dict(data["distinct_sketch"])
+        return sketch
+
+
+class DataProfile:
+    """
+    Mergeable profile of a dataset: one ColumnSketch per schema column. Chunks are profiled
+    independently (possibly in parallel) and their profiles merged into one.
+    """
+
+    def __init__(self, column_sketches: dict):
+        self.column_sketches = column_sketches
+
+    @classmethod
+    def from_schema(cls, schema_config: dict, bins: int = PROFILE_HISTOGRAM_BINS) -> "DataProfile":
+        """
+        Creates an empty profile; histogram bins span the schema value_ranges, categorical levels come from categorical_mappings.
+        """
+        try:
+            value_ranges = schema_config.get("value_ranges", {})
+            mappings = schema_config.get("categorical_mappings", {})
+            column_sketches = {}
+            for column in schema_config["columns"]:
+                for column_name, kind in column.items():
+                    if column_name in schema_config.get("export_drop_columns", []):
+                        continue
+                    if kind == "category":
+                        mapping = mappings.get(column_name, {})
+                        column_sketches[column_name] = ColumnSketch(kind, levels=list(mapping), codes=list(mapping.values()))
+                    else:
+                        value_range = value_ranges.get(column_name)
+                        bin_edges = np.linspace(value_range["min"], value_range["max"], bins + 1) if value_range else None
+                        column_sketches[column_name] = ColumnSketch(kind, bin_edges=bin_edges)
+            return cls(column_sketches)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def update(self, chunk: pd.DataFrame) -> "DataProfile":
+        """
+        Adds a chunk of the dataset to the profile.
+        """
+        for column_name, sketch in self.column_sketches.items():
+            if column_name in chunk.columns:
+                sketch.update(chunk[column_name])
+        return self
+
+    def merge(self, other: "DataProfile") -> "DataProfile":
+        """
+        Merges the profile of another chunk or partition into this one.
+        """
+        for column_name, sketch in self.column_sketches.items():
+            sketch.merge(other.column_sketches[column_name])
+        return self
+
+    def to_dict(self) -> dict:
+        return {column_name: sketch.to_dict() for column_name, sketch in self.column_sketches.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DataProfile":
+        return cls({column_name: ColumnSketch.from_dict(sketch) for column_name, sketch in data.items()})
+
+
+def compare_histograms(current: list, previous: list) -> dict:
+    """
+    Returns the Population Stability Index and the Kolmogorov-Smirnov statistic between two binned distributions.
+    """
+    current = np.asarray(current, dtype=np.float64)
+    previous = np.asarray(previous, dtype=np.float64)
+    if not current.sum() or not previous.sum():
+        return {"psi": None, "ks": None}
+    current_share = current / current.sum()
+    previous_share = previous / previous.sum()
+    psi = np.sum((current_share - previous_share) * np.log(np.maximum(current_share, PSI_EPSILON) / np.maximum(previous_share, PSI_EPSILON)))
+    ks = np.max(np.abs(np.cumsum(current_share) - np.cumsum(previous_share)))
+    return {"psi": round(float(psi), 6), "ks": round(float(ks), 6)}
+
+
+def compare_profiles(current: dict, previous: dict) -> dict:
+    """
+    Compares two persisted profiles (as written by DataProfile.to_dict) column by column.
+
+    Returns:
+        dict: Per column PSI, KS, null rate change and distinct count of both runs.
+    """
+    try:
+        drift = {}
+        for column_name, current_column in current.items():
+            previous_column = previous.get(column_name)
+            if previous_column is None or previous_column["counts"] is None or current_column["counts"] is None:
+                continue
+            # Histograms are only comparable when built on the same bins or levels
+            if current_column.get("bin_edges") != previous_column.get("bin_edges") or current_column.get("levels") != previous_column.get("levels"):
+                continue
+            drift[column_name] = {
+                **compare_histograms(current_column["counts"], previous_column["counts"]),
+                "null_rate_change": round(current_column["null_rate"] - previous_column["null_rate"], 6),
+                "distinct_count": current_column["distinct_count"],
+                "previous_distinct_count": previous_column["distinct_count"],
+            }
+        return drift
+    except Exception as e:
+        raise MyException(e, sys)
@@ -1,12 +1,59 @@
 import os
 import sys
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
 
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import dill
 import yaml
 
 from src.exception import MyException
 from src.logger import logging
+from src.constants import ARTIFACT_FILE_EXTENSIONS, FLOAT32_RELATIVE_TOLERANCE, RUN_TIMESTAMP_FORMAT
+
+# Pandas dtype used for each column type declared in config/schema.yaml
+SCHEMA_TYPE_TO_DTYPE = {"int": "int64", "float": "float64", "category": "category"}
+# Integer dtypes from narrowest to widest, used to widen planned dtypes that cannot hold the data
+INTEGER_DTYPES = ["int8", "int16", "int32", "int64"]
+
+
+def check_choice(name: str, value, allowed):
+    """
+    Raises MyException when value is not one of the allowed choices of a setting.
+    """
+    if value not in allowed:
+        try:
+            raise ValueError(f"Unknown {name} {value}, expected one of {list(allowed)}")
+        except ValueError as e:
+            raise MyException(e, sys)
+
+
+def _tmp_file_path(file_path: str) -> str:
+    # Temporary file next to file_path, private to the writing process and thread
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+@contextmanager
+def replace_file(file_path: str):
+    """
+    Yields a temporary path next to file_path that is moved over file_path once the block completes.
+    The file is replaced rather than truncated in place, so hard links to its previous content
+    (blob store entries shared with other runs) are left untouched; the temporary file is removed on failure.
+    """
+    tmp_path = _tmp_file_path(file_path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 
 def read_yaml(file_path: str):
     """
@@ -68,8 +115,8 @@ def save_object(file_path,obj):
     try:
         # Create the directory if it doesn't exist
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        # Open the file in binary write mode and serialize the object
-        with open(file_path, "wb") as file_object:
+        # Serialize the object to a new file that replaces the previous one
+        with replace_file(file_path) as tmp_path, open(tmp_path, "wb") as file_object:
             dill.dump(obj, file_object)
     except Exception as e:
         # Raise custom exception if any error occurs
@@ -80,15 +127,401 @@ def save_numpy_data(file_path,array):
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path,exist_ok=True)
-        with open(file_path,"wb") as file_obj:
+        with replace_file(file_path) as tmp_path, open(tmp_path,"wb") as file_obj:
             np.save(file_obj,array)
     except Exception as e:
         raise MyException(e,sys)
     
 
-def load_numpy_data(file_path):
+def load_numpy_data(file_path, mmap_mode=None):
+    """
+    Loads a .npy array; with mmap_mode set ("r", "r+", "c") the file is memory-mapped instead of read.
+    """
     try:
+        if mmap_mode is not None:
+            return np.load(file_path, mmap_mode=mmap_mode)
         with open(file_path,"rb") as file_obj:
             return np.load(file_obj)
     except Exception as e:
         raise MyException(e,sys)
+
+
+def open_numpy_memmap(file_path, shape, dtype):
+    """
+    Creates a .npy file of the given shape and dtype and returns it memory-mapped for writing,
+    so large arrays can be filled chunk by chunk without being held in memory.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Unlink a previous file first: mapping it would write through its hard links
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+    except Exception as e:
+        raise MyException(e,sys)
+
+
+def get_previous_run_file_path(file_path: str):
+    """
+    Returns the same artifact file in the most recent earlier pipeline run, None if there is none.
+    Run directories are named after their timestamp (artifacts/<timestamp>/...).
+    """
+    try:
+        run_dir = os.path.dirname(os.path.abspath(file_path))
+        while True:
+            try:
+                current_run = datetime.strptime(os.path.basename(run_dir), RUN_TIMESTAMP_FORMAT)
+                break
+            except ValueError:
+                if os.path.dirname(run_dir) == run_dir:
+                    return None
+                run_dir = os.path.dirname(run_dir)
+        artifacts_dir = os.path.dirname(run_dir)
+        relative_path = os.path.relpath(os.path.abspath(file_path), run_dir)
+        previous_runs = []
+        for run_name in os.listdir(artifacts_dir):
+            try:
+                run_time = datetime.strptime(run_name, RUN_TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            if run_time < current_run and os.path.exists(os.path.join(artifacts_dir, run_name, relative_path)):
+                previous_runs.append((run_time, run_name))
+        if not previous_runs:
+            return None
+        return os.path.join(artifacts_dir, max(previous_runs)[1], relative_path)
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def get_file_format(file_path: str) -> str:
+    """
+    Returns the artifact file format ("csv", "parquet" or "feather") from the file extension.
+    """
+    extension = os.path.splitext(file_path)[1].lstrip(".")
+    for file_format, format_extension in ARTIFACT_FILE_EXTENSIONS.items():
+        if extension == format_extension:
+            return file_format
+    raise ValueError(f"Unsupported artifact file extension: {file_path}")
+
+
+def get_schema_dtypes(schema_config: dict, compact: bool = True) -> dict:
+    """
+    Builds a column -> pandas dtype mapping from the schema config.
+    With compact=True the narrow dtypes of the "compact_dtypes" section are used, otherwise the
+    default dtype of each declared column type. Categorical columns with a categorical mapping
+    get a CategoricalDtype with the known levels.
+
+    Args:
+        schema_config (dict): Parsed content of config/schema.yaml.
+        compact (bool): Use the compact dtypes declared in the schema.
+
+    Returns:
+        dict: Mapping of column name to pandas dtype.
+    """
+    compact_dtypes = schema_config.get("compact_dtypes", {}) if compact else {}
+    categorical_mappings = schema_config.get("categorical_mappings", {})
+    dtypes = {}
+    for column in schema_config["columns"]:
+        for column_name, column_type in column.items():
+            dtype = compact_dtypes.get(column_name, SCHEMA_TYPE_TO_DTYPE[column_type])
+            if dtype == "category" and column_name in categorical_mappings:
+                dtype = pd.CategoricalDtype(categories=list(categorical_mappings[column_name]))
+            dtypes[column_name] = dtype
+    return dtypes
+
+
+def plan_dtypes(dataframe: pd.DataFrame, schema_config: dict, compact: bool = True) -> dict:
+    """
+    Plans the dtype of every dataframe column from the schema dtypes, adjusted to the data:
+    - integer columns are widened when values do not fit and use nullable dtypes when holding nulls
+    - float32 columns stay float64 when float32 would lose precision
+    - categorical columns already encoded as numbers are stored as integers, and unknown
+      labels are added as extra categories instead of being turned into nulls
+    - object columns outside the schema (e.g. the MongoDB "_id") are stored as strings so that
+      columnar writers can serialize them
+
+    Returns:
+        dict: Mapping of column name to pandas dtype, ready for DataFrame.astype.
+    """
+    try:
+        dtypes = {}
+        for column_name, dtype in get_schema_dtypes(schema_config, compact=compact).items():
+            if column_name not in dataframe.columns:
+                continue
+            series = dataframe[column_name]
+            if isinstance(dtype, pd.CategoricalDtype) or dtype == "category":
+                if not pd.api.types.is_numeric_dtype(series):
+                    dtypes[column_name] = _plan_categorical_dtype(series, dtype)
+                    continue
+                dtype = "int8" if compact else "int64"
+            if dtype in INTEGER_DTYPES:
+                dtype = _plan_integer_dtype(series, dtype)
+            elif dtype == "float32":
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                if not np.allclose(values.astype(np.float32), values, rtol=FLOAT32_RELATIVE_TOLERANCE, equal_nan=True):
+                    logging.info(f"Column {column_name} keeps float64, float32 would lose precision")
+                    dtype = "float64"
+            dtypes[column_name] = dtype
+        for column_name in dataframe.columns:
+            if column_name not in dtypes and dataframe[column_name].dtype == object:
+                dtypes[column_name] = "string"
+        return dtypes
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def plan_schema_dtypes(schema_config: dict, compact: bool = True, encoded_categoricals: bool = False) -> dict:
+    """
+    Plans the dtype of every schema column from the schema alone (no data), for outputs written
+    chunk by chunk whose dtypes must not depend on the first chunk:
+    - integer columns get the narrowest dtype holding their declared value_ranges (int64 without a range)
+    - float32 columns stay float32 when their declared range fits float32 (float64 otherwise)
+    - categorical columns keep their known levels, or are integers when encoded_categoricals (mapped columns)
+
+    Values outside the declared ranges then fail the write instead of being narrowed.
+
+    Returns:
+        dict: Mapping of column name to pandas dtype.
+    """
+    try:
+        value_ranges = schema_config.get("value_ranges", {})
+        dtypes = {}
+        for column_name, dtype in get_schema_dtypes(schema_config, compact=compact).items():
+            value_range = value_ranges.get(column_name)
+            if isinstance(dtype, pd.CategoricalDtype) or dtype == "category":
+                # Category codes (a handful of levels) always fit int8
+                encoded = encoded_categoricals and column_name in schema_config.get("categorical_mappings", {})
+                dtypes[column_name] = ("int8" if compact else "int64") if encoded else dtype
+                continue
+            if dtype in INTEGER_DTYPES:
+                if value_range is None:
+                    dtype = "int64"
+                else:
+                    dtype = next(candidate for candidate in INTEGER_DTYPES[INTEGER_DTYPES.index(dtype):]
+                                 if np.iinfo(candidate).min <= value_range["min"] and value_range["max"] <= np.iinfo(candidate).max)
+            elif dtype == "float32":
+                float32_max = np.finfo(np.float32).max
+                if value_range is None or not (-float32_max <= value_range["min"] and value_range["max"] <= float32_max):
+                    dtype = "float64"
+            dtypes[column_name] = dtype
+        return dtypes
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def _plan_integer_dtype(series: pd.Series, dtype: str) -> str:
+    # Widen the integer dtype until it holds the value range, and make it nullable if needed
+    values = series.dropna()
+    if len(values) > 0:
+        low, high = values.min(), values.max()
+        for candidate in INTEGER_DTYPES[INTEGER_DTYPES.index(dtype):]:
+            if np.iinfo(candidate).min <= low and high <= np.iinfo(candidate).max:
+                break
+        if candidate != dtype:
+            logging.info(f"Column {series.name} widened from {dtype} to {candidate} to fit [{low}, {high}]")
+        dtype = candidate
+    return dtype.capitalize() if series.isna().any() else dtype
+
+
+def _plan_categorical_dtype(series: pd.Series, dtype):
+    # Keep the known levels and append unexpected labels so they are not silently nulled
+    if not isinstance(dtype, pd.CategoricalDtype) or dtype.categories is None:
+        return "category"
+    unknown_levels = sorted(set(series.dropna().unique()) - set(dtype.categories))
+    if unknown_levels:
+        logging.info(f"Column {series.name} holds labels outside the schema: {unknown_levels}")
+        return pd.CategoricalDtype(categories=list(dtype.categories) + unknown_levels)
+    return dtype
+
+
+def apply_schema_dtypes(dataframe: pd.DataFrame, schema_config: dict, compact: bool = True) -> pd.DataFrame:
+    """
+    Casts the dataframe columns to the dtypes planned by plan_dtypes.
+    """
+    try:
+        return dataframe.astype(plan_dtypes(dataframe, schema_config, compact=compact))
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def save_dataframe(file_path: str, dataframe: pd.DataFrame, compression: str = None):
+    """
+    Saves a dataframe in the format given by the file extension (csv, parquet or Arrow IPC).
+
+    Args:
+        file_path (str): Destination path of the artifact.
+        dataframe (pd.DataFrame): Data to save.
+        compression (str, optional): Compression codec for columnar formats.
+    """
+    try:
+        file_format = get_file_format(file_path)
+        with replace_file(file_path) as tmp_path:
+            if file_format == "csv":
+                dataframe.to_csv(tmp_path, index=False, header=True)
+            elif file_format == "parquet":
+                dataframe.to_parquet(tmp_path, index=False, compression=compression)
+            else:
+                dataframe.reset_index(drop=True).to_feather(tmp_path, compression=compression)
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def read_dataframe(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Reads a dataframe artifact written by save_dataframe.
+
+    Args:
+        file_path (str): Path of the artifact.
+        columns (list, optional): Only read these columns (column projection).
+
+    Returns:
+        pd.DataFrame: The loaded data.
+    """
+    try:
+        file_format = get_file_format(file_path)
+        if file_format == "csv":
+            return pd.read_csv(file_path, usecols=columns)
+        elif file_format == "parquet":
+            return pd.read_parquet(file_path, columns=columns)
+        return pd.read_feather(file_path, columns=columns)
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def iter_dataframe_chunks(file_path: str, chunk_size: int, columns: list = None):
+    """
+    Reads a dataframe artifact written by save_dataframe in chunks of at most chunk_size rows,
+    so large artifacts can be processed without loading them whole.
+
+    Args:
+        file_path (str): Path of the artifact.
+        chunk_size (int): Maximum number of rows per chunk.
+        columns (list, optional): Only read these columns (column projection).
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the artifact.
+    """
+    try:
+        file_format = get_file_format(file_path)
+        if file_format == "csv":
+            yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_size)
+        elif file_format == "parquet":
+            for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=columns):
+                yield batch.to_pandas()
+        else:
+            # Arrow IPC files are memory-mapped; batches are zero-copy slices of the mapped table
+            table = pa.ipc.open_file(pa.memory_map(file_path)).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            for batch in table.to_batches(max_chunksize=chunk_size):
+                yield batch.to_pandas()
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def count_dataframe_rows(file_path: str) -> int:
+    """
+    Returns the number of rows of a dataframe artifact without loading it
+    (from the metadata of columnar formats, by a chunked scan for csv).
+    """
+    try:
+        file_format = get_file_format(file_path)
+        if file_format == "csv":
+            return sum(len(chunk) for chunk in pd.read_csv(file_path, usecols=[0], chunksize=1_000_000))
+        elif file_format == "parquet":
+            return pq.ParquetFile(file_path).metadata.num_rows
+        return pa.ipc.open_file(pa.memory_map(file_path)).read_all().num_rows
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+def get_file_digest(file_path: str, block_size: int = 1024 ** 2) -> str:
+    """
+    Returns the blake2b digest of a file's content, read block by block.
+    """
+    try:
+        digest = hashlib.blake2b()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    except Exception as e:
+        raise MyException(e, sys)
+
+
+class DataFrameChunkWriter:
+    """
+    Appends dataframe chunks to a single artifact file (csv, parquet or Arrow IPC),
+    so large outputs can be written without holding them in memory.
+    Every chunk is cast to one Arrow schema: the planned dtypes when given (see plan_schema_dtypes),
+    otherwise the dtypes of the first chunk.
+    Chunks go to a temporary file that replaces the artifact on a successful close (see replace_file).
+    """
+
+    def __init__(self, file_path: str, compression: str = None, dtypes: dict = None):
+        """
+        Args:
+            file_path (str): Destination path of the artifact; the extension selects the format.
+            compression (str, optional): Compression codec for columnar formats.
+            dtypes (dict, optional): Column -> pandas dtype of the file, planned before streaming.
+        """
+        self.file_path = file_path
+        self.compression = compression
+        self.dtypes = dtypes or {}
+        self.file_format = get_file_format(file_path)
+        self.rows_written = 0
+        self._writer = None
+        self._schema = None
+        self._tmp_path = _tmp_file_path(file_path)
+
+    def write(self, dataframe: pd.DataFrame):
+        """
+        Appends a chunk to the artifact file.
+        """
+        try:
+            if self.file_format == "csv":
+                dataframe.to_csv(self._tmp_path, mode="a" if self.rows_written else "w",
+                                 header=not self.rows_written, index=False)
+            else:
+                table = pa.Table.from_pandas(dataframe, preserve_index=False)
+                if self._writer is None:
+                    self._schema = self._plan_schema(dataframe)
+                    if self.file_format == "parquet":
+                        self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression=self.compression)
+                    else:
+                        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                        self._writer = pa.ipc.new_file(self._tmp_path, self._schema, options=options)
+                try:
+                    table = table.cast(self._schema)
+                except (pa.ArrowInvalid, ValueError) as cast_error:
+                    raise ValueError(f"Chunk does not fit the planned dtypes of {self.file_path} "
+                                     f"(values outside the schema value_ranges?): {cast_error}")
+                self._writer.write_table(table)
+            self.rows_written += len(dataframe)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _plan_schema(self, dataframe: pd.DataFrame) -> pa.Schema:
+        # Arrow schema of the file: the planned dtypes, the first chunk's dtypes for columns not planned
+        empty = pd.DataFrame({column_name: pd.Series([], dtype=self.dtypes.get(column_name, dataframe[column_name].dtype))
+                              for column_name in dataframe.columns})
+        return pa.Schema.from_pandas(empty, preserve_index=False)
+
+    def close(self, failed: bool = False):
+        """
+        Finalizes the artifact file; with failed set, discards the chunks written instead.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._tmp_path):
+            if failed:
+                os.remove(self._tmp_path)
+            else:
+                os.replace(self._tmp_path, self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(failed=exc_type is not None)
@@ -0,0 +1,221 @@
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.constants import DATA_VALIDATION_MAX_NULL_RATE
+from src.exception import MyException
+from src.logger import logging
+
+# Row-level violation counters kept per column
+VIOLATION_TYPES = ("dtype_violations", "level_violations", "range_violations")
+
+
+@dataclass
+class ColumnRule:
+    # Column name
+    name: str
+    # Schema type: "int", "float" or "category"
+    kind: str
+    # Allowed labels of a categorical column
+    levels: np.ndarray = None
+    # Allowed encoded values of a categorical column exported with encode_categoricals
+    codes: np.ndarray = None
+    # Inclusive numeric bounds, None when unbounded
+    min_value: float = None
+    max_value: float = None
+    # Allowed share of nulls over the whole file
+    max_null_rate: float = DATA_VALIDATION_MAX_NULL_RATE
+
+
+class SchemaValidator:
+    """
+    Validates dataframe chunks against config/schema.yaml with vectorized checks.
+
+    The schema is compiled once into one rule per column (type, allowed categorical levels,
+    numeric range, allowed null rate); each chunk is then checked with a single pass of numpy
+    operations per column. Categorical columns are checked on their category codes, so the
+    labels themselves are only compared once per distinct set of categories.
+    """
+
+    def __init__(self, schema_config: dict, default_max_null_rate: float = DATA_VALIDATION_MAX_NULL_RATE):
+        """
+        Args:
+            schema_config (dict): Parsed config/schema.yaml.
+            default_max_null_rate (float): Allowed null rate of columns without a max_null_rates entry.
+        """
+        try:
+            self.rules = self.compile_rules(schema_config, default_max_null_rate)
+            # Columns that may be present without being validated (e.g. the MongoDB "_id")
+            self.ignored_columns = {schema_config["drop_columns"]}
+            self._category_lookups = {}
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def compile_rules(schema_config: dict, default_max_null_rate: float) -> dict:
+        """
+        Builds the rule of every column expected in the ingestion artifacts.
+        Columns listed in export_drop_columns are not expected.
+
+        Raises:
+            ValueError: If a numeric column allows nulls: nothing downstream imputes them, and the
+                nearest-neighbour rebalancing and the compact forest cannot handle them.
+        """
+        mappings = schema_config.get("categorical_mappings", {})
+        value_ranges = schema_config.get("value_ranges", {})
+        max_null_rates = schema_config.get("max_null_rates", {})
+        rules = {}
+        for column in schema_config["columns"]:
+            for column_name, kind in column.items():
+                if column_name in schema_config.get("export_drop_columns", []):
+                    continue
+                value_range = value_ranges.get(column_name, {})
+                max_null_rate = max_null_rates.get(column_name, default_max_null_rate)
+                if kind in ("int", "float") and max_null_rate > 0:
+                    raise ValueError(f"Numeric column {column_name} allows a null rate of {max_null_rate}, "
+                                     f"but numeric nulls are not imputed before training; keep it at 0")
+                rules[column_name] = ColumnRule(
+                    name=column_name,
+                    kind=kind,
+                    levels=np.array(list(mappings[column_name]), dtype=object) if column_name in mappings else None,
+                    codes=np.array(list(mappings[column_name].values())) if column_name in mappings else None,
+                    min_value=value_range.get("min"),
+                    max_value=value_range.get("max"),
+                    max_null_rate=max_null_rate,
+                )
+        return rules
+
+    def new_result(self) -> dict:
+        """
+        Returns empty validation counters for one file.
+        """
+        return {
+            "rows": 0,
+            "chunks_validated": 0,
+            "aborted": False,
+            "missing_columns": [],
+            "unexpected_columns": [],
+            "columns": {column_name: {"nulls": 0, **{violation: 0 for violation in VIOLATION_TYPES}}
+                        for column_name in self.rules},
+        }
+
+    def _category_lookup(self, rule: ColumnRule, categories: pd.Index) -> np.ndarray:
+        # Boolean array telling for each category code whether its label is allowed, cached per categories
+        key = (rule.name, tuple(categories))
+        if key not in self._category_lookups:
+            allowed = rule.codes if pd.api.types.is_numeric_dtype(categories) else rule.levels
+            self._category_lookups[key] = np.isin(categories.to_numpy(), allowed)
+        return self._category_lookups[key]
+
+    def _check_categorical(self, rule: ColumnRule, series: pd.Series, is_null: np.ndarray) -> dict:
+        # Count values outside the allowed levels (labels, or codes when encoded during export)
+        if rule.levels is None:
+            return {}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            lookup = self._category_lookup(rule, series.cat.categories)
+            return {"level_violations": int(np.count_nonzero(~lookup[codes[codes >= 0]]))}
+        values = series.to_numpy()[~is_null]
+        allowed = rule.codes if pd.api.types.is_numeric_dtype(series.dtype) else rule.levels
+        return {"level_violations": int(np.count_nonzero(~pd.Series(values).isin(allowed).to_numpy()))}
+
+    def _check_numeric(self, rule: ColumnRule, series: pd.Series, is_null: np.ndarray) -> dict:
+        # Count values that are not numbers (or not integers for int columns) and values out of range
+        dtype_violations = 0
+        if not pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            series = pd.to_numeric(series, errors="coerce")
+            dtype_violations = int(np.count_nonzero(series.isna().to_numpy() & ~is_null))
+        if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+            values = series.to_numpy()
+        else:
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            if rule.kind == "int":
+                with np.errstate(invalid="ignore"):
+                    dtype_violations += int(np.count_nonzero(np.isfinite(values) & (values != np.floor(values))))
+        out_of_range = np.zeros(len(values), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            if rule.min_value is not None:
+                out_of_range |= values < rule.min_value
+            if rule.max_value is not None:
+                out_of_range |= values > rule.max_value
+        return {"dtype_violations": dtype_violations, "range_violations": int(np.count_nonzero(out_of_range))}
+
+    def validate_chunk(self, chunk: pd.DataFrame, result: dict) -> bool:
+        """
+        Checks one chunk and adds its counts to result.
+
+        Returns:
+            bool: True when the chunk has a violation that fails validation regardless of later chunks.
+        """
+        try:
+            if result["chunks_validated"] == 0:
+                result["missing_columns"] = [column for column in self.rules if column not in chunk.columns]
+                result["unexpected_columns"] = [column for column in chunk.columns
+                                                if column not in self.rules and column not in self.ignored_columns]
+            failed = bool(result["missing_columns"] or result["unexpected_columns"])
+            for column_name, rule in self.rules.items():
+                if column_name not in chunk.columns:
+                    continue
+                series = chunk[column_name]
+                is_null = series.isna().to_numpy()
+                counts = {"nulls": int(np.count_nonzero(is_null))}
+                if rule.kind == "category":
+                    counts.update(self._check_categorical(rule, series, is_null))
+                else:
+                    counts.update(self._check_numeric(rule, series, is_null))
+                column_result = result["columns"][column_name]
+                for key, value in counts.items():
+                    column_result[key] += value
+                # Any null in a column that allows none already fails the file
+                failed |= any(counts.get(violation, 0) for violation in VIOLATION_TYPES)
+                failed |= rule.max_null_rate == 0 and counts["nulls"] > 0
+            result["rows"] += len(chunk)
+            result["chunks_validated"] += 1
+            return failed
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def validate(self, chunks, early_abort: bool = False) -> dict:
+        """
+        Validates a file given as an iterable of dataframe chunks.
+
+        Args:
+            chunks: Iterable of dataframe chunks of the file.
+            early_abort (bool): Stop at the first chunk with a violation instead of counting all of them.
+
+        Returns:
+            dict: Per-column null and violation counts, null rates and the overall "valid" flag.
+        """
+        try:
+            result = self.new_result()
+            for chunk in chunks:
+                if self.validate_chunk(chunk, result) and early_abort:
+                    result["aborted"] = True
+                    logging.info(f"Schema validation aborted after {result['chunks_validated']} chunks")
+                    break
+            result["failures"] = self.get_failures(result)
+            result["valid"] = not result["failures"]
+            return result
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_failures(self, result: dict) -> list:
+        """
+        Returns a readable description of every failed check, and fills in the null rates.
+        """
+        failures = []
+        if result["missing_columns"]:
+            failures.append(f"missing columns {result['missing_columns']}")
+        if result["unexpected_columns"]:
+            failures.append(f"unexpected columns {result['unexpected_columns']}")
+        for column_name, column_result in result["columns"].items():
+            rule = self.rules[column_name]
+            column_result["null_rate"] = column_result["nulls"] / result["rows"] if result["rows"] else 0.0
+            if column_result["null_rate"] > rule.max_null_rate:
+                failures.append(f"{column_name} null rate {column_result['null_rate']:.4f} above {rule.max_null_rate}")
+            for violation in VIOLATION_TYPES:
+                if column_result[violation]:
+                    failures.append(f"{column_name} {violation}={column_result[violation]}")
+        return failures
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from src.data_access.artifact_store import ArtifactStore
+
+
+def test_saved_dataframe_is_not_aliased(tmp_path):
+    store = ArtifactStore()
+    file_path = str(tmp_path / "train.parquet")
+    dataframe = pd.DataFrame({"Age": [21, 35, 50]})
+    store.save_dataframe(file_path, dataframe)
+    dataframe.loc[0, "Age"] = 99
+    loaded = store.read_dataframe(file_path)
+    loaded.loc[1, "Age"] = 77
+    assert store.read_dataframe(file_path)["Age"].tolist() == [21, 35, 50]
+    assert store.report()["stages"]["default"]["memory_hits"] == 2
+
+
+def test_saved_array_is_not_aliased(tmp_path):
+    store = ArtifactStore()
+    file_path = str(tmp_path / "train.npy")
+    array = np.arange(3)
+    store.save_array(file_path, array)
+    array[0] = 9
+    assert store.load_array(file_path).tolist() == [0, 1, 2]
+
+
+def test_saved_object_matches_file(tmp_path):
+    store = ArtifactStore()
+    file_path = str(tmp_path / "object.pkl")
+    obj = {"classes": [0]}
+    store.save_object(file_path, obj)
+    obj["classes"].append(1)
+    store.load_object(file_path)["classes"].append(2)
+    assert store.load_object(file_path) == {"classes": [0]}
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+
+from src.constants import CHECKPOINT_DIR_NAME
+from src.data_access.blob_store import BlobStore
+from src.utils.main_utils import DataFrameChunkWriter, get_file_digest, load_object, save_dataframe, save_object
+
+MODEL_FILE = os.path.join("model_trainer", "model.pkl")
+
+
+def make_run(artifacts_dir, run_name, files, pushed=False):
+    run_dir = os.path.join(artifacts_dir, run_name)
+    for relative_path, content in files.items():
+        os.makedirs(os.path.dirname(os.path.join(run_dir, relative_path)), exist_ok=True)
+        with open(os.path.join(run_dir, relative_path), "wb") as file_obj:
+            file_obj.write(content)
+    if pushed:
+        os.makedirs(os.path.join(run_dir, CHECKPOINT_DIR_NAME), exist_ok=True)
+        with open(os.path.join(run_dir, CHECKPOINT_DIR_NAME, "model_pusher.json"), "w") as file_obj:
+            file_obj.write("{}")
+    return run_dir
+
+
+def test_identical_files_share_one_blob_and_are_restored(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    artifacts_dir = str(tmp_path / "artifacts")
+    first = make_run(artifacts_dir, "01_01_2026_10_00_00", {"train.csv": b"rows", MODEL_FILE: b"model 1"})
+    second = make_run(artifacts_dir, "01_02_2026_10_00_00", {"train.csv": b"rows", MODEL_FILE: b"model 2"})
+    blob_store.ingest_run(first)
+    blob_store.ingest_run(second)
+    assert os.path.samefile(os.path.join(first, "train.csv"), os.path.join(second, "train.csv"))
+    assert blob_store.size_bytes() == len(b"rows") + 2 * len(b"model 1")
+    os.remove(os.path.join(second, "train.csv"))
+    assert blob_store.materialize(second) == 1
+    with open(os.path.join(second, "train.csv"), "rb") as file_obj:
+        assert file_obj.read() == b"rows"
+
+
+def test_gc_keeps_recent_runs_and_pushed_models(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    artifacts_dir = str(tmp_path / "artifacts")
+    pushed = make_run(artifacts_dir, "01_01_2026_10_00_00", {"train.csv": b"old rows", MODEL_FILE: b"pushed model"}, pushed=True)
+    old = make_run(artifacts_dir, "01_02_2026_10_00_00", {"train.csv": b"older rows", MODEL_FILE: b"old model"})
+    latest = make_run(artifacts_dir, "01_03_2026_10_00_00", {"train.csv": b"rows", MODEL_FILE: b"model"})
+    for run_dir in (pushed, old, latest):
+        blob_store.ingest_run(run_dir)
+
+    plan = blob_store.collect_garbage(artifacts_dir, keep_last_runs=1, pushed_model_files=[MODEL_FILE], dry_run=True)
+    assert os.path.isdir(old)
+    report = blob_store.collect_garbage(artifacts_dir, keep_last_runs=1, pushed_model_files=[MODEL_FILE])
+    assert {key: report[key] for key in ("kept_runs", "pruned_runs", "deleted_runs", "deleted_blobs")} == \
+        {key: plan[key] for key in ("kept_runs", "pruned_runs", "deleted_runs", "deleted_blobs")}
+    assert report["kept_runs"] == [latest] and report["pruned_runs"] == [pushed] and report["deleted_runs"] == [old]
+    # The pushed model survives its run, the other files of the old runs are gone
+    assert os.path.isfile(os.path.join(pushed, MODEL_FILE)) and not os.path.exists(os.path.join(pushed, "train.csv"))
+    assert not os.path.exists(old)
+    # train.csv of both old runs, the old model and the pushed run's checkpoint
+    assert report["deleted_blobs"] == 4
+    assert blob_store.size_bytes() == len(b"rows") + len(b"model") + len(b"pushed model")
+
+
+def test_writing_into_an_ingested_run_leaves_other_runs_unchanged(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    artifacts_dir = str(tmp_path / "artifacts")
+    frame = pd.DataFrame({"Age": [25, 40, 61]})
+    runs = [os.path.join(artifacts_dir, run_name) for run_name in ("01_01_2026_10_00_00", "01_02_2026_10_00_00")]
+    for run_dir in runs:
+        save_dataframe(os.path.join(run_dir, "data.parquet"), frame)
+        save_object(os.path.join(run_dir, MODEL_FILE), {"trees": 10})
+        blob_store.ingest_run(run_dir)
+    assert os.path.samefile(os.path.join(runs[0], "data.parquet"), os.path.join(runs[1], "data.parquet"))
+    # The second run is written to twice, through every kind of writer, without being detached
+    for n_trees in (20, 30):
+        with DataFrameChunkWriter(os.path.join(runs[1], "data.parquet")) as writer:
+            writer.write(frame.assign(Age=n_trees))
+        save_object(os.path.join(runs[1], MODEL_FILE), {"trees": n_trees})
+    manifest = blob_store.load_manifest(runs[0])
+    for relative_path, entry in manifest["files"].items():
+        assert get_file_digest(os.path.join(runs[0], relative_path)) == entry["digest"]
+        assert get_file_digest(blob_store.blob_path(entry["digest"])) == entry["digest"]
+    assert load_object(os.path.join(runs[0], MODEL_FILE)) == {"trees": 10}
+    assert load_object(os.path.join(runs[1], MODEL_FILE)) == {"trees": 30}
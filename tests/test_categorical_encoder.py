@@ -0,0 +1,41 @@
+import dill
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.entity.categorical_encoder import CategoricalEncoder
+from src.exception import MyException
+
+MAPPINGS = {"Gender": {"Female": 0, "Male": 1}, "Vehicle_Age": {"< 1 Year": 0, "1-2 Year": 1, "> 2 Years": 2}}
+
+
+def make_frame():
+    return pd.DataFrame({"Age": [25, 40, 61, 33], "Gender": ["Male", "Female", "Male", "Female"],
+                         "Vehicle_Age": ["< 1 Year", "> 2 Years", "1-2 Year", "< 1 Year"]})
+
+
+def test_labels_codes_and_categoricals_encode_alike():
+    frame = make_frame()
+    encoder = CategoricalEncoder(MAPPINGS).fit(frame)
+    expected = pd.DataFrame({"Age": [25, 40, 61, 33], "Gender": np.array([1, 0, 1, 0], dtype=np.int8),
+                             "Vehicle_Age": np.array([0, 2, 1, 0], dtype=np.int8)})
+    pd.testing.assert_frame_equal(encoder.transform(frame), expected)
+    # Already encoded codes, codes sent as strings and categorical columns give the same output
+    pd.testing.assert_frame_equal(encoder.transform(expected), expected)
+    pd.testing.assert_frame_equal(encoder.transform(expected.astype({"Gender": str, "Vehicle_Age": str})), expected)
+    pd.testing.assert_frame_equal(encoder.transform(frame.astype({"Gender": "category", "Vehicle_Age": "category"})), expected)
+
+
+def test_encoder_round_trips_through_pickling():
+    frame = make_frame()
+    encoder = CategoricalEncoder(MAPPINGS).fit(frame)
+    # Columns in another order come back in the fitted order
+    shuffled = frame[["Vehicle_Age", "Age", "Gender"]]
+    restored = dill.loads(dill.dumps(encoder))
+    pd.testing.assert_frame_equal(restored.transform(shuffled), encoder.transform(frame))
+
+
+def test_unknown_level_raises():
+    encoder = CategoricalEncoder(MAPPINGS).fit(make_frame())
+    with pytest.raises(MyException, match="Gender"):
+        encoder.transform(make_frame().assign(Gender=["Male", "Other", "Male", "Female"]))
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.constants import SCHEMA_FILE_PATH
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.utils.column_profile import DataProfile, HyperLogLog, QuantileSketch, compare_histograms, compare_profiles
+from src.utils.main_utils import apply_schema_dtypes, read_yaml
+
+
+@pytest.fixture(scope="module")
+def schema_config():
+    return read_yaml(SCHEMA_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def chunks(schema_config):
+    return [apply_schema_dtypes(batch.drop(columns=["id"]), schema_config)
+            for batch in SyntheticVehicleData(na_rate=0.0).iter_batches(6000, batch_size=2000)]
+
+
+def test_merged_chunk_profiles_match_a_single_pass(schema_config, chunks):
+    single_pass = DataProfile.from_schema(schema_config)
+    for chunk in chunks:
+        single_pass.update(chunk)
+    merged = DataProfile.from_schema(schema_config).update(chunks[0])
+    for chunk in chunks[1:]:
+        merged.merge(DataProfile.from_schema(schema_config).update(chunk))
+    single, combined = single_pass.to_dict(), merged.to_dict()
+    for column_name, column in single.items():
+        assert combined[column_name]["count"] == column["count"] == 6000
+        assert combined[column_name]["counts"] == column["counts"]
+    # The persisted profile reloads to the same summary
+    reloaded = DataProfile.from_dict(json.loads(json.dumps(combined))).to_dict()
+    assert reloaded["Annual_Premium"]["counts"] == combined["Annual_Premium"]["counts"]
+    assert reloaded["Annual_Premium"]["distinct_count"] == combined["Annual_Premium"]["distinct_count"]
+
+
+def test_sketches_approximate_distinct_counts_and_quantiles():
+    values = np.random.default_rng(0).permutation(np.arange(50_000, dtype=np.float64))
+    distinct, quantiles = HyperLogLog(), QuantileSketch()
+    for part in np.array_split(values, 5):
+        part_distinct, part_quantiles = HyperLogLog(), QuantileSketch()
+        part_distinct.update(part)
+        part_quantiles.update(part)
+        distinct.merge(part_distinct)
+        quantiles.merge(part_quantiles)
+    assert distinct.estimate() == pytest.approx(50_000, rel=0.05)
+    assert quantiles.quantiles([0.5])[0] == pytest.approx(25_000, abs=1_000)
+
+
+def test_psi_is_zero_for_the_same_distribution_and_grows_with_shift():
+    assert compare_histograms([10, 20, 30], [20, 40, 60]) == {"psi": 0.0, "ks": 0.0}
+    assert compare_histograms([30, 20, 10], [10, 20, 30])["psi"] > 0.2
+    assert compare_histograms([0, 0, 0], [1, 2, 3]) == {"psi": None, "ks": None}
+
+
+def test_profiles_on_different_bins_are_not_compared(schema_config, chunks):
+    profile = DataProfile.from_schema(schema_config).update(chunks[0]).to_dict()
+    rebinned = DataProfile.from_schema(schema_config, bins=5).update(chunks[1]).to_dict()
+    drift = compare_profiles(profile, rebinned)
+    assert "Annual_Premium" not in drift
+    assert "Gender" in drift
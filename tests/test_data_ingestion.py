@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_ingestion import DataIngestion
+from src.entity.config_entity import DataIngestionConfig
+
+
+def make_batch(ids, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"id": ids, "Response": (rng.random(len(ids)) < 0.12).astype(np.int8)})
+
+
+@pytest.mark.parametrize("stratify", [False, True])
+def test_split_is_stable_under_inserts_and_deletes(stratify):
+    ingestion = DataIngestion(DataIngestionConfig(split_mode="hash", stratify=stratify))
+    batch = make_batch(np.arange(1, 20001))
+    is_test = pd.Series(ingestion.get_test_mask(batch), index=batch["id"])
+    # New records inserted before existing ones and some records deleted, read in another order
+    changed = pd.concat([make_batch(np.arange(-5000, 0), seed=1), batch.iloc[::3]]).sample(frac=1, random_state=0)
+    changed_is_test = pd.Series(ingestion.get_test_mask(changed), index=changed["id"])
+    kept_ids = batch["id"].iloc[::3]
+    assert (changed_is_test[kept_ids] == is_test[kept_ids]).all()
+
+
+def test_stratified_split_follows_class_ratios():
+    config = DataIngestionConfig(split_mode="hash", stratify=True, stratify_class_ratios={1: 0.5})
+    ingestion = DataIngestion(config)
+    batch = make_batch(np.arange(1, 50001))
+    class_counts = {}
+    ingestion.get_test_mask(batch, class_counts)
+    test_shares = {label: test / (train + test) for label, (train, test) in class_counts.items()}
+    assert test_shares[0] == pytest.approx(config.train_test_split_ratio, abs=0.01)
+    assert test_shares[1] == pytest.approx(0.5, abs=0.02)
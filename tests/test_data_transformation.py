@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.components.data_transformation import DataTransformation
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.config_entity import DataTransformationConfig
+
+
+def make_transformation(**config):
+    return DataTransformation(DataIngestionArtifact("train.parquet", "test.parquet"),
+                              DataValidationArtifact(True, "", ""),
+                              DataTransformationConfig(**config))
+
+
+def test_validation_rows_keep_the_class_distribution():
+    labels = (np.random.default_rng(0).random(20000) < 0.12).astype(np.int8)
+    is_validation = make_transformation(validation_split_ratio=0.1, validation_split_enabled=True).split_validation_rows(labels)
+    for label in (0, 1):
+        assert is_validation[labels == label].mean() == pytest.approx(0.1, abs=0.001)
+    # The same seed holds out the same rows
+    assert (make_transformation(validation_split_ratio=0.1, validation_split_enabled=True).split_validation_rows(labels) == is_validation).all()
+
+
+def test_no_validation_rows_without_a_split():
+    labels = np.array([0, 1, 0, 1], dtype=np.int8)
+    assert not make_transformation(validation_split_ratio=0.0, validation_split_enabled=True).split_validation_rows(labels).any()
+    # Without search or compaction the configured share is not held out
+    assert not make_transformation(validation_split_ratio=0.1).split_validation_rows(labels).any()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.components.evaluation_engine import ChampionPredictionCache, EvaluationEngine
+from src.components.model_evaluation import ModelEvaluation
+from src.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, ModelTrainerArtifact
+from src.entity.config_entity import ModelEvaluationConfig
+from src.entity.estimator import MyModel
+from src.utils.main_utils import save_numpy_data, save_object
+
+MAPPINGS = {"Gender": {"Female": 0, "Male": 1}, "Vehicle_Damage": {"No": 0, "Yes": 1}}
+
+
+class LocalEstimator:
+    # Stands in for the S3 estimator with an already loaded model
+    bucket_name, model_path = "bucket", "model.pkl"
+
+    def __init__(self, model):
+        self.loaded_model = model
+
+    def get_model_version(self):
+        return "v1"
+
+    def predict(self, dataframe):
+        return self.loaded_model.predict(dataframe)
+
+
+def make_raw_test_set(tmp_path, n_rows=500):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({"Gender": rng.choice(["Female", "Male"], n_rows), "Age": rng.integers(20, 80, n_rows),
+                          "Vehicle_Damage": rng.choice(["No", "Yes"], n_rows)})
+    test_file_path = str(tmp_path / "test.parquet")
+    frame.to_parquet(test_file_path)
+    y = (frame["Vehicle_Damage"] == "Yes").to_numpy(dtype=np.int8)
+    return frame, test_file_path, y
+
+
+def make_engine(tmp_path):
+    return EvaluationEngine(chunk_size=128, prediction_cache=ChampionPredictionCache(str(tmp_path / "cache"), 2),
+                            categorical_mappings=MAPPINGS)
+
+
+def test_champion_without_encoder_scores_encoded_rows(tmp_path):
+    frame, test_file_path, y = make_raw_test_set(tmp_path)
+    # A champion trained before the encoder joined the pipeline: its preprocessor expects integer codes
+    encoded = frame.assign(Gender=(frame["Gender"] == "Male").astype(np.int8), Vehicle_Damage=y)
+    preprocessor = ColumnTransformer([("StandardScaler", StandardScaler(), ["Age"])], remainder="passthrough").fit(encoded)
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(preprocessor.transform(encoded), y)
+    metrics = make_engine(tmp_path).score_champion(LocalEstimator(MyModel(preprocessor, forest)), test_file_path, list(frame.columns), y)
+    assert metrics["f1_score"] == 1.0
+
+
+def test_champion_that_cannot_score_is_not_replaced(tmp_path):
+    frame, test_file_path, y = make_raw_test_set(tmp_path)
+    encoded = frame.assign(Gender=(frame["Gender"] == "Male").astype(np.int8), Vehicle_Damage=y)
+    # The champion preprocessor expects a column the test data does not have
+    training = encoded.assign(Region_Code=1.0)
+    preprocessor = ColumnTransformer([("StandardScaler", StandardScaler(), ["Age", "Region_Code"])], remainder="passthrough").fit(training)
+    champion = MyModel(preprocessor, RandomForestClassifier(n_estimators=10, random_state=0).fit(preprocessor.transform(training), y))
+    # A challenger scoring perfectly on the transformed test set
+    X_test = encoded.to_numpy(dtype=np.float32)
+    challenger = RandomForestClassifier(n_estimators=10, random_state=0).fit(X_test, y)
+    save_numpy_data(str(tmp_path / "test.npy"), X_test)
+    save_numpy_data(str(tmp_path / "test_labels.npy"), y)
+    save_object(str(tmp_path / "model.pkl"), MyModel(None, challenger))
+    model_evaluation = ModelEvaluation(
+        ModelEvaluationConfig(prediction_cache_dir=str(tmp_path / "cache")),
+        DataIngestionArtifact(trained_file_path=test_file_path, test_file_path=test_file_path),
+        DataTransformationArtifact(transformed_object_file_path=None, transformed_train_file_path=None,
+                                   transformed_test_file_path=str(tmp_path / "test.npy"), transformed_train_label_file_path=None,
+                                   transformed_test_label_file_path=str(tmp_path / "test_labels.npy")),
+        ModelTrainerArtifact(trained_model_file_path=str(tmp_path / "model.pkl"), metric_artifact=None),
+        best_model=LocalEstimator(champion))
+    model_evaluation.get_feature_columns = lambda: list(frame.columns)
+    response = model_evaluation.evaluate_model()
+    assert response.trained_model_f1_score == 1.0
+    assert response.best_model_f1_score is None
+    assert not response.is_model_accepted
@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.components.forest_compaction import ForestCompactor
+from src.entity.compact_forest import CompactForest
+
+
+def make_forest(n_estimators=30):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(4000, 6)).astype(np.float32)
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.8, size=len(X)) > 0.8).astype(np.int8)
+    forest = RandomForestClassifier(n_estimators=n_estimators, max_depth=8, random_state=0).fit(X[:3000], y[:3000])
+    return forest, X[3000:], y[3000:]
+
+
+def test_compact_forest_predicts_like_the_source_forest():
+    forest, X, _ = make_forest()
+    compact = CompactForest(forest.estimators_, forest.classes_, forest.n_features_in_, threshold_dtype="float32", leaf_dtype="float16")
+    np.testing.assert_allclose(compact.predict_proba(X), forest.predict_proba(X), atol=1e-3)
+    # Only rows whose probability is within the leaf precision of 0.5 may change class
+    undecided = np.abs(forest.predict_proba(X)[:, 1] - 0.5) < 1e-3
+    assert (compact.predict(X)[~undecided] == forest.predict(X)[~undecided]).all()
+
+
+def test_compaction_keeps_the_guarded_f1():
+    forest, X_validation, y_validation = make_forest()
+    compactor = ForestCompactor({"max_f1_loss": 0.01, "min_trees": 5, "leaf_dtype": "float16"})
+    model, report = compactor.compact(forest, X_validation, y_validation)
+    assert report["ranking_rows"] + report["guard_rows"] == len(y_validation)
+    assert report["trees_after"] <= report["trees_before"]
+    if report["accepted"]:
+        assert isinstance(model, CompactForest)
+        assert report["f1_before"] - report["f1_after"] <= 0.01
+    else:
+        assert model is forest
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from src.constants import SCHEMA_FILE_PATH
+from src.exception import MyException
+from src.utils.main_utils import DataFrameChunkWriter, apply_schema_dtypes, plan_schema_dtypes, read_dataframe, read_yaml
+
+
+@pytest.fixture(scope="module")
+def schema_config():
+    return read_yaml(SCHEMA_FILE_PATH)
+
+
+def make_batch(policy_sales_channel, annual_premium):
+    return pd.DataFrame({"Gender": ["Male"] * len(policy_sales_channel), "Policy_Sales_Channel": policy_sales_channel,
+                         "Annual_Premium": annual_premium})
+
+
+def test_chunk_writer_keeps_values_of_later_wider_batches(tmp_path, schema_config):
+    file_path = str(tmp_path / "train.parquet")
+    # The first batch alone plans int8 for the channel; the second one needs int16
+    batches = [make_batch([1, 26], [2630.0, 33000.5]), make_batch([152, 160], [540165.0, 0.0])]
+    with DataFrameChunkWriter(file_path, dtypes=plan_schema_dtypes(schema_config)) as writer:
+        for batch in batches:
+            writer.write(apply_schema_dtypes(batch, schema_config))
+    written = read_dataframe(file_path)
+    assert written["Policy_Sales_Channel"].tolist() == [1, 26, 152, 160]
+    assert written["Annual_Premium"].tolist() == [2630.0, 33000.5, 540165.0, 0.0]
+    assert str(written["Policy_Sales_Channel"].dtype) == "int16"
+
+
+def test_chunk_writer_rejects_values_outside_the_schema_ranges(tmp_path, schema_config):
+    file_path = str(tmp_path / "train.parquet")
+    with pytest.raises(MyException):
+        with DataFrameChunkWriter(file_path, dtypes=plan_schema_dtypes(schema_config)) as writer:
+            writer.write(apply_schema_dtypes(make_batch([1], [10.0]), schema_config))
+            writer.write(apply_schema_dtypes(make_batch([40000], [10.0]), schema_config))
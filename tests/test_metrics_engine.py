@@ -0,0 +1,30 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.components.metrics_engine import MetricsEngine
+
+
+def make_data(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(1000, 4)).astype(np.float32)
+    return X, (X[:, 0] > 0).astype(np.int8)
+
+
+def test_fresh_forest_scores_training_out_of_bag():
+    engine = MetricsEngine(training_source="oob")
+    X, y = make_data(0)
+    model = engine.prepare(RandomForestClassifier(n_estimators=20, random_state=0)).fit(X, y)
+    _, source, _ = engine.score_training(model, X, y)
+    assert source == "oob"
+
+
+def test_warm_started_forest_scores_training_with_a_prediction_pass():
+    engine = MetricsEngine(training_source="oob")
+    X, y = make_data(0)
+    base = engine.prepare(RandomForestClassifier(n_estimators=20, random_state=0)).fit(X, y)
+    # Growing the base forest on new rows, as in incremental training
+    X_new, y_new = make_data(1)
+    model = engine.prepare(base.set_params(warm_start=True, n_estimators=30)).fit(X_new, y_new)
+    metrics, source, _ = engine.score_training(model, X_new, y_new)
+    assert source == "predict"
+    assert metrics["accuracy_score"] == np.mean(model.predict(X_new) == y_new)
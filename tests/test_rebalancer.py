@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.components.rebalancer import Rebalancer
+from src.exception import MyException
+
+
+def make_imbalanced(n_rows=3000):
+    rng = np.random.default_rng(0)
+    y = (rng.random(n_rows) < 0.1).astype(np.int8)
+    X = (rng.normal(size=(n_rows, 3)) + y[:, None] * 2).astype(np.float32)
+    return X, y
+
+
+def test_class_weight_keeps_rows_and_balances_weights():
+    X, y = make_imbalanced()
+    X_out, y_out, class_weight = Rebalancer("class_weight").fit_resample(X, y)
+    assert X_out is X and y_out is y
+    counts = Rebalancer.get_class_counts(y)
+    assert class_weight[0] * counts[0] == pytest.approx(class_weight[1] * counts[1])
+
+
+@pytest.mark.parametrize("strategy", ["undersample", "smote"])
+def test_resampling_reaches_the_sampling_ratio(strategy):
+    X, y = make_imbalanced()
+    X_out, y_out, class_weight = Rebalancer(strategy, sampling_ratio=0.5).fit_resample(X, y)
+    counts = Rebalancer.get_class_counts(y_out)
+    assert class_weight is None and len(X_out) == len(y_out)
+    assert counts[1] / counts[0] == pytest.approx(0.5, abs=0.01)
+    assert X_out.dtype == X.dtype
+
+
+def test_smote_rows_lie_between_minority_rows():
+    X, y = make_imbalanced()
+    X_out, y_out, _ = Rebalancer("smote", sampling_ratio=1.0).fit_resample(X, y)
+    # Original rows come first and are untouched, synthetic rows stay within the minority bounding box
+    np.testing.assert_array_equal(X_out[:len(X)], X)
+    minority = X[y == 1]
+    synthetic = X_out[len(X):]
+    assert (y_out[len(X):] == 1).all()
+    assert (synthetic >= minority.min(axis=0) - 1e-6).all() and (synthetic <= minority.max(axis=0) + 1e-6).all()
+
+
+def test_smote_enn_only_drops_majority_rows():
+    X, y = make_imbalanced()
+    _, y_smote, _ = Rebalancer("smote", sampling_ratio=1.0).fit_resample(X, y)
+    _, y_out, _ = Rebalancer("smote_enn", sampling_ratio=1.0).fit_resample(X, y)
+    assert Rebalancer.get_class_counts(y_out)[1] == Rebalancer.get_class_counts(y_smote)[1]
+    assert Rebalancer.get_class_counts(y_out)[0] <= Rebalancer.get_class_counts(y_smote)[0]
+
+
+def test_unknown_strategy_raises():
+    with pytest.raises(MyException):
+        Rebalancer("oversample")
+
+
+@pytest.mark.parametrize("sampling_ratio", [0, -0.5])
+def test_sampling_ratio_must_be_positive(sampling_ratio):
+    with pytest.raises(MyException, match="sampling ratio"):
+        Rebalancer("undersample", sampling_ratio=sampling_ratio)
+
+
+@pytest.mark.parametrize("strategy", ["class_weight", "undersample", "smote", "smote_enn"])
+def test_single_class_is_returned_unchanged(strategy):
+    X, y = make_imbalanced(300)
+    y = np.zeros_like(y)
+    X_out, y_out, class_weight = Rebalancer(strategy).fit_resample(X, y)
+    assert X_out is X and y_out is y and class_weight is None
@@ -0,0 +1,68 @@
+import os
+
+from src.data_access.run_checkpoint import RunCheckpoint, find_latest_run_dir, rebase_paths
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+
+
+def run_stages(run_dir, calls, resume=False):
+    # Two stages: ingestion writes train and test, validation writes its report
+    train_path, test_path = os.path.join(run_dir, "train.csv"), os.path.join(run_dir, "test.csv")
+    report_path = os.path.join(run_dir, "report.yaml")
+
+    def ingest():
+        calls.append("data_ingestion")
+        for file_path in (train_path, test_path):
+            with open(file_path, "w") as file_obj:
+                file_obj.write(os.path.basename(file_path))
+        return DataIngestionArtifact(trained_file_path=train_path, test_file_path=test_path)
+
+    def validate():
+        calls.append("data_validation")
+        with open(report_path, "w") as file_obj:
+            file_obj.write("valid")
+        return DataValidationArtifact(validation_status=True, message="", validation_report_file_path=report_path)
+
+    checkpoint = RunCheckpoint(run_dir, resume=resume)
+    ingestion_artifact = checkpoint.run("data_ingestion", DataIngestionArtifact, ingest)
+    validation_artifact = checkpoint.run("data_validation", DataValidationArtifact, validate)
+    return ingestion_artifact, validation_artifact, checkpoint.report()
+
+
+def test_resume_reuses_intact_stages(tmp_path):
+    run_dir, calls = str(tmp_path / "run"), []
+    os.makedirs(run_dir)
+    first = run_stages(run_dir, calls)
+    resumed = run_stages(run_dir, calls, resume=True)
+    assert calls == ["data_ingestion", "data_validation"]
+    assert resumed[:2] == first[:2]
+    assert [stage["status"] for stage in resumed[2]] == ["resumed", "resumed"]
+
+
+def test_modified_file_reruns_the_stage_and_all_later_ones(tmp_path):
+    run_dir, calls = str(tmp_path / "run"), []
+    os.makedirs(run_dir)
+    run_stages(run_dir, calls)
+    with open(os.path.join(run_dir, "test.csv"), "w") as file_obj:
+        file_obj.write("changed")
+    _, _, report = run_stages(run_dir, calls, resume=True)
+    assert calls == ["data_ingestion", "data_validation"] * 2
+    assert [stage["status"] for stage in report] == ["completed", "completed"]
+
+
+def test_latest_run_with_checkpoints_is_found_and_paths_rebased(tmp_path):
+    artifacts_dir = str(tmp_path / "artifacts")
+    for run_name in ("01_01_2026_10_00_00", "01_02_2026_10_00_00"):
+        os.makedirs(os.path.join(artifacts_dir, run_name))
+    run_stages(os.path.join(artifacts_dir, "01_01_2026_10_00_00"), [])
+    latest = find_latest_run_dir(artifacts_dir)
+    assert latest == os.path.join(artifacts_dir, "01_01_2026_10_00_00")
+
+    class Config:
+        pass
+
+    config = Config()
+    config.training_file_path = os.path.join(artifacts_dir, "01_02_2026_10_00_00", "ingested", "train.csv")
+    config.collection_name = "vehicle-data"
+    rebase_paths(config, os.path.join(artifacts_dir, "01_02_2026_10_00_00"), latest)
+    assert config.training_file_path == os.path.join(latest, "ingested", "train.csv")
+    assert config.collection_name == "vehicle-data"
@@ -0,0 +1,41 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.constants import SCHEMA_FILE_PATH
+from src.data_access.synthetic_data import SyntheticVehicleData
+from src.exception import MyException
+from src.utils.main_utils import apply_schema_dtypes, read_yaml
+from src.utils.schema_validator import SchemaValidator
+
+
+@pytest.fixture(scope="module")
+def schema_config():
+    return read_yaml(SCHEMA_FILE_PATH)
+
+
+@pytest.fixture(scope="module")
+def sample(schema_config):
+    batch = next(SyntheticVehicleData(na_rate=0.0).iter_batches(2000, batch_size=2000))
+    return apply_schema_dtypes(batch.drop(columns=["id"]), schema_config)
+
+
+def test_clean_sample_is_valid(schema_config, sample):
+    assert SchemaValidator(schema_config).validate([sample])["valid"]
+
+
+def test_numeric_nulls_fail_validation(schema_config, sample):
+    dirty = sample.copy()
+    dirty.loc[dirty.index[:5], "Annual_Premium"] = np.nan
+    result = SchemaValidator(schema_config).validate([dirty])
+    assert not result["valid"]
+    assert result["columns"]["Annual_Premium"]["nulls"] == 5
+
+
+def test_numeric_null_rate_above_zero_is_rejected(schema_config):
+    schema = copy.deepcopy(schema_config)
+    schema["max_null_rates"] = {"Annual_Premium": 0.01}
+    with pytest.raises(MyException):
+        SchemaValidator(schema)
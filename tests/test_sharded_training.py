@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.components.sharded_training import ShardedForestTrainer, fit_shard, get_shard_rows, merge_forests
+from src.exception import MyException
+
+
+@pytest.fixture
+def training_files(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 4)).astype(np.float32)
+    y = (X[:, 0] + rng.normal(scale=0.5, size=len(X)) > 0).astype(np.int8)
+    features_file_path, labels_file_path = str(tmp_path / "train.npy"), str(tmp_path / "train_labels.npy")
+    np.save(features_file_path, X)
+    np.save(labels_file_path, y)
+    return X, y, features_file_path, labels_file_path
+
+
+def test_shards_cover_every_row_once():
+    rows = np.concatenate([get_shard_rows(shard, 3, 100) for shard in range(3)])
+    np.testing.assert_array_equal(np.sort(rows), np.arange(100))
+
+
+def test_merged_forest_averages_the_shard_forests(training_files):
+    X, y, features_file_path, labels_file_path = training_files
+    params = RandomForestClassifier(n_estimators=25, oob_score=True, random_state=0, n_jobs=1).get_params()
+    results = [fit_shard(features_file_path, labels_file_path, shard, 2, {**params, "random_state": shard}) for shard in (1, 0)]
+    shard_probabilities = [result["forest"].predict_proba(X) for result in sorted(results, key=lambda result: result["shard"])]
+    merged = merge_forests(results, len(y))
+    assert merged.n_estimators == len(merged.estimators_) == 50
+    # Both shards have as many trees, so the merged forest averages their probabilities
+    np.testing.assert_allclose(merged.predict_proba(X), np.mean(shard_probabilities, axis=0), atol=1e-12)
+    # Out-of-bag estimates of every shard sit at its own rows
+    np.testing.assert_array_equal(merged.oob_decision_function_[get_shard_rows(1, 2, len(y))],
+                                  results[0]["forest"].oob_decision_function_)
+    assert not hasattr(merged, "oob_score_")
+
+
+def test_unknown_coordinator_raises():
+    with pytest.raises(MyException, match="Unknown coordinator"):
+        ShardedForestTrainer({"coordinator": "ssh"})
@@ -0,0 +1,49 @@
+import os
+
+from src.data_access.stage_cache import StageCache
+from src.entity.artifact_entity import DataIngestionArtifact
+
+
+def ingestion_paths(run_dir):
+    ingestion_dir = os.path.join(run_dir, "data_ingestion")
+    return (os.path.join(ingestion_dir, "feature_store", "data.parquet"),
+            os.path.join(ingestion_dir, "ingested", "train.parquet"),
+            os.path.join(ingestion_dir, "ingested", "test.parquet"))
+
+
+def run_ingestion(run_dir, cache_dir, calls):
+    feature_store_path, train_path, test_path = ingestion_paths(run_dir)
+
+    def compute():
+        calls.append(run_dir)
+        for file_path, content in ((feature_store_path, b"all rows"), (train_path, b"train rows"), (test_path, b"test rows")):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as file_obj:
+                file_obj.write(content)
+        return DataIngestionArtifact(trained_file_path=train_path, test_file_path=test_path)
+
+    stage_cache = StageCache(run_artifact_dir=run_dir, cache_dir=cache_dir)
+    artifact = stage_cache.run("data_ingestion", DataIngestionArtifact, compute,
+                               inputs=lambda: {"data": "collection-v1"}, output_files=[feature_store_path])
+    return artifact, stage_cache.report()
+
+
+def test_cache_hit_restores_every_artifact(tmp_path):
+    cache_dir, calls = str(tmp_path / "stage_cache"), []
+    first_run, second_run = str(tmp_path / "artifacts" / "run_1"), str(tmp_path / "artifacts" / "run_2")
+    run_ingestion(first_run, cache_dir, calls)
+    artifact, report = run_ingestion(second_run, cache_dir, calls)
+
+    assert calls == [first_run]
+    assert [stage["status"] for stage in report["stages"]] == ["hit"]
+    feature_store_path, train_path, test_path = ingestion_paths(second_run)
+    assert artifact == DataIngestionArtifact(trained_file_path=os.path.abspath(train_path), test_file_path=os.path.abspath(test_path))
+    for file_path, content in ((feature_store_path, b"all rows"), (train_path, b"train rows"), (test_path, b"test rows")):
+        with open(file_path, "rb") as file_obj:
+            assert file_obj.read() == content
+
+
+def test_changed_inputs_miss(tmp_path):
+    stage_cache = StageCache(run_artifact_dir=str(tmp_path / "run"), cache_dir=str(tmp_path / "stage_cache"))
+    assert stage_cache.make_key("data_ingestion", {"data": "v1"}) != stage_cache.make_key("data_ingestion", {"data": "v2"})
+    assert stage_cache.make_key("data_ingestion", {"data": "v1"}) == stage_cache.make_key("data_ingestion", {"data": "v1"})